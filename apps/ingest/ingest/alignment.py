@@ -0,0 +1,297 @@
+"""Align a re-parsed letter with the sections already on disk.
+
+Anchors are ordinals, so a segmentation change in a new parser version would
+shift every later ``¶N`` in the letter. Instead of renumbering, the new
+sections are aligned to the old ones and inherit their anchors:
+
+1. Identical sections are paired by ``section_checksum``, in order (an LCS
+   over the checksum sequences).
+2. In each gap between identical runs, the remaining sections are paired
+   by ``difflib`` similarity (≥ ``FUZZY_MIN``) and keep the old anchor, as
+   "edited" sections.
+3. New sections with no match get a suffixed anchor after their predecessor
+   (``¶12a``, ``¶12b``). Anchors are never reused for different text.
+4. Old anchors with no counterpart go into a redirect table. An anchor whose
+   text was absorbed by a neighbour is "merged" and points to that section.
+   Otherwise it is "removed" and points to the next surviving section.
+
+Only added and edited sections need indexing, and only the ids that
+disappeared need deleting.
+
+Dry run:  python -m ingest.alignment data/normalized/letters_1990.jsonl /tmp/letters_1990.jsonl
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from .shards import iter_sections, list_years, redirects_path
+
+FUZZY_MIN = 0.6
+# Share of an unmatched old section that must reappear inside a new one to count as merged
+MERGE_COVERAGE = 0.5
+# Above this many pairs in a gap, only a diagonal band of the gap is compared
+MAX_GAP_PAIRS = 10000
+
+_ANCHOR_RE = re.compile(r'^¶(\d+)([a-z]*)$')
+
+
+def _suffixes():
+    n = 1
+    while True:
+        # a..z, then aa..zz, ...
+        for i in range(26 ** n):
+            s, k = '', i
+            for _ in range(n):
+                s = chr(ord('a') + k % 26) + s
+                k //= 26
+            yield s
+        n += 1
+
+
+def _fresh_anchor(after: Optional[str], used: Set[str]) -> str:
+    m = _ANCHOR_RE.match(after or '')
+    base = m.group(1) if m else '0'
+    for suffix in _suffixes():
+        candidate = f"¶{base}{suffix}"
+        if candidate not in used:
+            return candidate
+
+
+def _similarity(a: str, b: str) -> float:
+    sm = SequenceMatcher(None, a, b, autojunk=False)
+    if sm.real_quick_ratio() < FUZZY_MIN or sm.quick_ratio() < FUZZY_MIN:
+        return 0.0
+    return sm.ratio()
+
+
+def _coverage(old_text: str, new_text: str) -> float:
+    """Fraction of ``old_text`` found verbatim (in blocks) inside ``new_text``."""
+    if not old_text:
+        return 0.0
+    sm = SequenceMatcher(None, old_text, new_text, autojunk=False)
+    return sum(b.size for b in sm.get_matching_blocks()) / len(old_text)
+
+
+def _match_gap(old: Sequence, new: Sequence, i1: int, i2: int, j1: int, j2: int) -> Dict[int, tuple]:
+    """Order-preserving fuzzy pairing inside one gap; returns {new_idx: (old_idx, ratio)}."""
+    pairs = []
+    if (i2 - i1) * (j2 - j1) <= MAX_GAP_PAIRS:
+        for i in range(i1, i2):
+            for j in range(j1, j2):
+                r = _similarity(old[i]['text'], new[j]['text'])
+                if r >= FUZZY_MIN:
+                    pairs.append((r, i, j))
+    else:
+        # Only compare along the diagonal band of the gap
+        for i in range(i1, i2):
+            center = j1 + (i - i1) * (j2 - j1) // max(i2 - i1, 1)
+            for j in range(max(j1, center - 3), min(j2, center + 4)):
+                r = _similarity(old[i]['text'], new[j]['text'])
+                if r >= FUZZY_MIN:
+                    pairs.append((r, i, j))
+    pairs.sort(key=lambda p: (-p[0], p[1], p[2]))
+    accepted: Dict[int, tuple] = {}
+    used_old: Set[int] = set()
+    for r, i, j in pairs:
+        if j in accepted or i in used_old:
+            continue
+        # Keep pairs monotonic so anchors stay in reading order
+        if any((oi < i) != (nj < j) for nj, (oi, _) in accepted.items()):
+            continue
+        accepted[j] = (i, r)
+        used_old.add(i)
+    return accepted
+
+
+def align_sections(old: Sequence, new: Sequence, reserved: Iterable[str] = ()) -> Dict:
+    """Map ``new`` sections onto the anchors of ``old``.
+
+    Returns ``{'anchors': [anchor per new section], 'kinds': [...],
+    'redirects': {old_anchor: {...}}, 'counts': {...}}``. ``kinds`` is
+    "same", "edited" or "added" for each new section. Anchors in ``reserved``
+    (earlier redirect sources) are never handed out again.
+    """
+    anchors: List[Optional[str]] = [None] * len(new)
+    kinds: List[str] = ['added'] * len(new)
+    similarity: List[float] = [0.0] * len(new)
+    matched_old: Set[int] = set()
+    gaps = []
+
+    sm = SequenceMatcher(None, [s['section_checksum'] for s in old],
+                         [s['section_checksum'] for s in new], autojunk=False)
+    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+        if tag == 'equal':
+            for k in range(i2 - i1):
+                anchors[j1 + k] = old[i1 + k]['anchor']
+                kinds[j1 + k] = 'same'
+                similarity[j1 + k] = 1.0
+                matched_old.add(i1 + k)
+            continue
+        gaps.append((i1, i2, j1, j2))
+        for j, (i, r) in _match_gap(old, new, i1, i2, j1, j2).items():
+            anchors[j] = old[i]['anchor']
+            kinds[j] = 'edited'
+            similarity[j] = r
+            matched_old.add(i)
+
+    used = {s['anchor'] for s in old} | set(reserved)
+    prev = None
+    for j in range(len(new)):
+        if anchors[j] is None:
+            anchors[j] = _fresh_anchor(prev, used)
+            used.add(anchors[j])
+        prev = anchors[j]
+
+    redirects: Dict[str, Dict] = {}
+    for i1, i2, j1, j2 in gaps:
+        for i in range(i1, i2):
+            if i in matched_old:
+                continue
+            best_j, best_cov = None, 0.0
+            for j in range(j1, j2):
+                cov = _coverage(old[i]['text'], new[j]['text'])
+                if cov > best_cov:
+                    best_j, best_cov = j, cov
+            if best_j is not None and best_cov >= MERGE_COVERAGE:
+                redirects[old[i]['anchor']] = {'to': anchors[best_j], 'kind': 'merged',
+                                               'similarity': round(best_cov, 3)}
+                continue
+            # Point at the next surviving section (or the last one if at the end)
+            target = anchors[j2] if j2 < len(new) else (anchors[j2 - 1] if j2 else None)
+            redirects[old[i]['anchor']] = {'to': target, 'kind': 'removed', 'similarity': 0.0}
+
+    counts = {k: kinds.count(k) for k in ('same', 'edited', 'added')}
+    counts['merged'] = sum(1 for r in redirects.values() if r['kind'] == 'merged')
+    counts['removed'] = sum(1 for r in redirects.values() if r['kind'] == 'removed')
+    return {'anchors': anchors, 'kinds': kinds, 'similarity': similarity,
+            'redirects': redirects, 'counts': counts}
+
+
+def load_redirects(out_dir: str, year: int) -> Dict:
+    path = redirects_path(out_dir, year)
+    if not os.path.exists(path):
+        return {'year': year, 'redirects': {}, 'history': []}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def resolve_anchor(redirects: Dict, anchor: str) -> Optional[str]:
+    """Follow the redirect table from ``anchor``; ``None`` if it was never redirected."""
+    seen = set()
+    target = None
+    while anchor in redirects and anchor not in seen:
+        seen.add(anchor)
+        anchor = redirects[anchor].get('to')
+        target = anchor
+        if anchor is None:
+            break
+    return target
+
+
+def save_redirects(out_dir: str, year: int, table: Dict):
+    """Persist a redirect table from ``align_year``; call only after the year's data file is written."""
+    path = redirects_path(out_dir, year)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(table, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def align_year(out_dir: str, year: int, sections: List[Dict], tagged: bool = False) -> Optional[Dict]:
+    """Re-anchor freshly parsed ``sections`` against the year already on disk.
+
+    Rewrites ``anchor``/``id`` on the new sections in place and returns
+    ``{'changed': ids to (re)index, 'removed': ids to delete, 'topics': topic
+    ids touched by those, 'counts': ..., 'redirects': merged table or None}``. Nothing is written here: the
+    caller passes a non-None ``redirects`` to ``save_redirects`` once the year's
+    data file is in place, so a failed write never leaves redirects pointing at
+    anchors that do not exist yet. Returns ``None`` (sections untouched) when
+    the year has no prior data.
+
+    With ``tagged`` (sections already carry fresh ``topics``), an unchanged
+    section whose tags differ still counts as changed; otherwise unchanged
+    sections inherit the old tags.
+    """
+    if year not in list_years(out_dir):
+        return None
+    old = list(iter_sections(out_dir, year))
+    table = load_redirects(out_dir, year)
+    redirects = table['redirects']
+    result = align_sections(old, sections, reserved=redirects)
+    old_by_id = {s['id']: s['section_checksum'] for s in old}
+    old_topics = {s['anchor']: s['topics'] for s in old if 'topics' in s}
+
+    changed = set()
+    for s, anchor, kind in zip(sections, result['anchors'], result['kinds']):
+        s['anchor'] = anchor
+        s['id'] = f"{year}-{anchor}"
+        if old_by_id.get(s['id']) != s['section_checksum']:
+            changed.add(s['id'])
+        elif tagged:
+            if s.get('topics') != old_topics.get(anchor):
+                changed.add(s['id'])
+        elif anchor in old_topics:
+            s['topics'] = old_topics[anchor]
+    new_ids = {s['id'] for s in sections}
+    removed = [sid for sid in old_by_id if sid not in new_ids]
+    # Topics whose pages change: old and new tags of changed sections, old tags of removed ones
+    old_tags = {f"{year}-{a}": {t['topic_id'] for t in tags} for a, tags in old_topics.items()}
+    topics = set()
+    for s in sections:
+        if s['id'] in changed:
+            topics |= old_tags.get(s['id'], set()) | {t['topic_id'] for t in s.get('topics') or []}
+    for sid in removed:
+        topics |= old_tags.get(sid, set())
+
+    if result['redirects']:
+        parser_version = sections[0].get('parser_version') if sections else None
+        for anchor, entry in result['redirects'].items():
+            redirects[anchor] = dict(entry, parser_version=parser_version)
+        # Collapse chains: older redirects that pointed at a now-retired anchor follow it
+        for anchor, entry in redirects.items():
+            if entry.get('to') in result['redirects'] and anchor not in result['redirects']:
+                entry['to'] = resolve_anchor(redirects, entry['to'])
+    updated = None
+    if result['redirects'] or result['counts']['added'] or result['counts']['edited']:
+        table['history'].append({
+            'at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'from_parser_version': old[0].get('parser_version') if old else None,
+            'to_parser_version': sections[0].get('parser_version') if sections else None,
+            **result['counts'],
+        })
+        updated = table
+    return {'changed': changed, 'removed': removed, 'topics': topics, 'counts': result['counts'],
+            'redirects': updated}
+
+
+def _load_jsonl(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dry-run anchor alignment between two section files')
+    parser.add_argument('old', help='Current JSONL for a year')
+    parser.add_argument('new', help='Re-parsed JSONL for the same year')
+    parser.add_argument('--show', type=int, default=20, help='Redirects/edits to print')
+    args = parser.parse_args()
+
+    old, new = _load_jsonl(args.old), _load_jsonl(args.new)
+    t0 = time.perf_counter()
+    result = align_sections(old, new)
+    print(f"[align] {len(old)} → {len(new)} sections in {time.perf_counter() - t0:.2f}s: {result['counts']}")
+    for anchor, entry in list(result['redirects'].items())[:args.show]:
+        print(f"  {anchor} → {entry['to']} ({entry['kind']}, {entry['similarity']})")
+    edits = [(s['anchor'], a, r) for s, a, k, r in zip(new, result['anchors'], result['kinds'], result['similarity'])
+             if k != 'same']
+    for was, now, r in edits[:args.show]:
+        print(f"  new {was} keeps {now} (similarity {r:.2f})")
+
+
+if __name__ == '__main__':
+    main()
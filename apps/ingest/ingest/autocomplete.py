@@ -0,0 +1,242 @@
+"""Search-as-you-type suggestions over corpus vocabulary, phrases and topics.
+
+The builder scans the normalized sections once and collects:
+- single terms (3+ letters, not stopwords),
+- frequent 2–3 word phrases ("mr. market", "intrinsic value"),
+- topic names and keywords from ``topics.json`` (boosted),
+each with a frequency weight.
+
+The artifact is a sorted key array with parallel display/weight arrays — a
+flattened trie: every completion of a prefix is one contiguous ``bisect``
+range. Typo correction uses a deletion-neighbourhood index (symmetric delete)
+built at load time, which finds every key within edit distance 1 with a
+handful of dict lookups.
+
+Build:  python -m ingest.autocomplete build --data ../../data/normalized
+Query:  python -m ingest.autocomplete query "mr mar"
+"""
+
+import argparse
+import heapq
+import json
+import os
+import re
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from .shards import iter_sections, list_years
+
+ARTIFACT_VERSION = 1
+MAX_PHRASE_WORDS = 3
+MIN_PHRASE_COUNT = 5
+MIN_TERM_COUNT = 2
+TOPIC_BOOST = 1000
+# Keys longer than this are not given typo-correction entries
+MAX_CORRECTION_LEN = 24
+PREFIX_MEMO_LEN = 3
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have having
+he her here hers herself him himself his how i if in into is it its itself just me more most my myself no
+nor not now of off on once only or other our ours ourselves out over own same she should so some such than
+that the their theirs them themselves then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+# A trailing '.' is captured so _words can tell "Mr." and "U.S." from sentence ends
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z'’.-]*[A-Za-z.]|[A-Za-z]\.?")
+_ABBREV_RE = re.compile(r"(?:Mr|Mrs|Ms|Dr|St|Jr|Inc|Co)\.|(?:[A-Za-z]\.){2,}")
+
+
+def normalize(s: str) -> str:
+    # Keys drop periods so "mr mar" completes to "Mr. Market"
+    return ' '.join(s.lower().replace('’', "'").replace('.', '').split())
+
+
+def _words(text: str) -> List[str]:
+    # Strip sentence punctuation but keep "Mr." style abbreviations intact
+    out = []
+    for w in _WORD_RE.findall(text):
+        if w.endswith('.') and not _ABBREV_RE.fullmatch(w):
+            w = w.rstrip('.')
+        out.append(w)
+    return out
+
+
+def build(data_dir: str, topics_path: Optional[str] = None) -> Dict:
+    """Collect weighted terms/phrases from the corpus and topics into an artifact dict."""
+    weights: Counter = Counter()
+    surface: Dict[str, Counter] = defaultdict(Counter)
+    sections = 0
+    for year in list_years(data_dir):
+        for s in iter_sections(data_dir, year):
+            sections += 1
+            words = _words(s.get('text', ''))
+            lowered = [normalize(w) for w in words]
+            for i, w in enumerate(lowered):
+                if len(w) >= 3 and w not in STOPWORDS:
+                    weights[w] += 1
+                    surface[w][words[i]] += 1
+                for n in range(2, MAX_PHRASE_WORDS + 1):
+                    gram = lowered[i:i + n]
+                    if len(gram) < n or gram[0] in STOPWORDS or gram[-1] in STOPWORDS:
+                        continue
+                    key = ' '.join(gram)
+                    weights[key] += 1
+                    surface[key][' '.join(words[i:i + n])] += 1
+
+    entries: Dict[str, Tuple[str, int]] = {}
+    for key, count in weights.items():
+        is_phrase = ' ' in key
+        if count < (MIN_PHRASE_COUNT if is_phrase else MIN_TERM_COUNT):
+            continue
+        entries[key] = (surface[key].most_common(1)[0][0], count)
+
+    if topics_path and os.path.exists(topics_path):
+        with open(topics_path, 'r', encoding='utf-8') as f:
+            topics = json.load(f).get('topics', [])
+        for t in topics:
+            boost = TOPIC_BOOST * t.get('priority', 3)
+            for phrase in [t.get('name', '')] + list(t.get('keywords', [])):
+                key = normalize(phrase)
+                if not key:
+                    continue
+                # The curated keyword is the display form, whatever the corpus spelled
+                entries[key] = (phrase, entries.get(key, (phrase, 0))[1] + boost)
+
+    keys = sorted(entries)
+    return {
+        'version': ARTIFACT_VERSION,
+        'sections': sections,
+        'built_at': time.time(),
+        'keys': keys,
+        # Empty display means "same as key" to keep the artifact small
+        'display': ['' if entries[k][0] == k else entries[k][0] for k in keys],
+        'weights': [entries[k][1] for k in keys],
+    }
+
+
+def write_artifact(artifact: Dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(artifact, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def _deletes(key: str) -> List[str]:
+    return [key[:i] + key[i + 1:] for i in range(len(key))]
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diffs = [i for i in range(la) if a[i] != b[i]]
+        # One substitution, or one adjacent transposition
+        return len(diffs) == 1 or (len(diffs) == 2 and diffs[1] == diffs[0] + 1
+                                   and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]])
+    if la > lb:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class Autocomplete:
+    def __init__(self, artifact: Dict):
+        self.keys: List[str] = artifact['keys']
+        self.display: List[str] = [d or k for k, d in zip(artifact['keys'], artifact['display'])]
+        self.weights: List[int] = artifact['weights']
+        self._deletes: Dict[str, List[int]] = defaultdict(list)
+        for idx, key in enumerate(self.keys):
+            if len(key) <= MAX_CORRECTION_LEN:
+                self._deletes[key].append(idx)
+                for d in _deletes(key):
+                    self._deletes[d].append(idx)
+        self._deletes = dict(self._deletes)
+        self._memo: Dict[Tuple[str, int], List[Dict]] = {}
+
+    @classmethod
+    def load(cls, path: str) -> 'Autocomplete':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _entry(self, idx: int) -> Dict:
+        return {'text': self.display[idx], 'weight': self.weights[idx]}
+
+    def complete(self, prefix: str, k: int = 10) -> List[Dict]:
+        """Top-k completions of ``prefix`` by weight."""
+        p = normalize(prefix)
+        if not p:
+            return []
+        memo_key = (p, k)
+        if len(p) <= PREFIX_MEMO_LEN and memo_key in self._memo:
+            return self._memo[memo_key]
+        lo = bisect_left(self.keys, p)
+        hi = bisect_left(self.keys, p + '\uffff', lo)
+        best = heapq.nlargest(k, range(lo, hi), key=self.weights.__getitem__)
+        out = [self._entry(i) for i in best]
+        if len(p) <= PREFIX_MEMO_LEN:
+            # Short prefixes have the widest ranges; remember their answers
+            self._memo[memo_key] = out
+        return out
+
+    def correct(self, word: str, k: int = 5) -> List[Dict]:
+        """Keys within edit distance 1 of ``word`` (excluding exact matches), by weight."""
+        w = normalize(word)
+        if not w or len(w) > MAX_CORRECTION_LEN + 1:
+            return []
+        candidates = set()
+        for probe in [w] + _deletes(w):
+            candidates.update(self._deletes.get(probe, ()))
+        hits = [i for i in candidates if self.keys[i] != w and _within_one_edit(self.keys[i], w)]
+        best = heapq.nlargest(k, hits, key=self.weights.__getitem__)
+        return [self._entry(i) for i in best]
+
+    def suggest(self, q: str, k: int = 10) -> Dict:
+        """Completions for the whole input, plus corrections when it is a near-miss."""
+        completions = self.complete(q, k)
+        corrections = self.correct(q, k=3) if len(completions) < k else []
+        return {'q': q, 'completions': completions, 'corrections': corrections}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the autocomplete index')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    b = sub.add_parser('build', help='Build the autocomplete artifact')
+    b.add_argument('--data', default=os.path.join(os.getcwd(), 'data', 'normalized'), help='Normalized JSONL dir')
+    b.add_argument('--topics', help='Topics JSON (default: <data>/../topics.json)')
+    b.add_argument('--out', help='Artifact path (default: <data>/../autocomplete.json)')
+    qp = sub.add_parser('query', help='Query an existing artifact')
+    qp.add_argument('q')
+    qp.add_argument('--index', default=os.path.join(os.getcwd(), 'data', 'autocomplete.json'))
+    qp.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.cmd == 'build':
+        topics = args.topics or os.path.join(args.data, '..', 'topics.json')
+        out = args.out or os.path.join(args.data, '..', 'autocomplete.json')
+        t0 = time.perf_counter()
+        artifact = build(args.data, topics)
+        write_artifact(artifact, out)
+        print(f"[autocomplete] {len(artifact['keys'])} entries from {artifact['sections']} sections "
+              f"in {time.perf_counter() - t0:.2f}s → {out} ({os.path.getsize(out) / 1024:.0f} KiB)")
+    else:
+        ac = Autocomplete.load(args.index)
+        t0 = time.perf_counter()
+        result = ac.suggest(args.q, args.k)
+        elapsed = (time.perf_counter() - t0) * 1e6
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        print(f"[autocomplete] {elapsed:.0f} µs")
+
+
+if __name__ == '__main__':
+    main()
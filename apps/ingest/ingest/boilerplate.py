@@ -0,0 +1,134 @@
+"""Strip page artifacts (running headers/footers, page numbers, repeated table headers).
+
+Extracted PDF pages carry lines that repeat on every page. ``normalize_text``
+would otherwise fold them into the prose, so they turn into noise sections or
+get glued into real paragraphs, and are then hashed, tagged and indexed. They
+are removed per page, before pages are joined and segmented.
+
+A line is a candidate only in a page's edge zone: the first or last
+``EDGE_LINES`` non-empty lines. A line is boilerplate when:
+
+- it is in the same zone on at least ``MIN_REPEATS`` pages and at least
+  ``MIN_SHARE`` of all pages (running headers, footers and page numbers).
+  Short lines are compared with digit runs folded to ``#``, so "Page 7" and
+  "Page 8" match. Longer lines must match exactly, so table rows that differ
+  only in their figures do not.
+- it contains letters and appears verbatim at the head of two consecutive
+  pages (a table header repeated on a continuation page).
+
+Only edge-zone occurrences are removed; the same text in the body is kept.
+
+Dry run:  python -m ingest.boilerplate letter.pdf [--backend pdfplumber]
+"""
+
+import argparse
+import math
+import re
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+EDGE_LINES = 4
+MIN_REPEATS = 3
+MIN_SHARE = 0.4
+# Lines up to this many words are matched with their digits folded
+MAX_FOLDED_WORDS = 8
+
+_DIGITS_RE = re.compile(r'\d+')
+_SPACE_RE = re.compile(r'\s+')
+_LETTER_RE = re.compile(r'[a-z]')
+
+
+def _exact_key(line: str) -> str:
+    return _SPACE_RE.sub(' ', line.lower()).strip()
+
+
+def line_key(line: str) -> str:
+    key = _exact_key(line)
+    if len(key.split()) <= MAX_FOLDED_WORDS:
+        key = _DIGITS_RE.sub('#', key)
+    return key
+
+
+def _keys(line: str, zone: str) -> List[Tuple[str, str]]:
+    keys = [(zone, line_key(line))]
+    if zone == 'head':
+        keys.append(('table', _exact_key(line)))
+    return keys
+
+
+def _edge_lines(lines: List[str]) -> List[Tuple[int, str]]:
+    """``(line index, zone)`` for the edge-zone lines of one page."""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    edges = [(i, 'head') for i in filled[:EDGE_LINES]]
+    head = {i for i, _ in edges}
+    edges += [(i, 'foot') for i in filled[-EDGE_LINES:] if i not in head]
+    return edges
+
+
+def find_boilerplate(pages: List[str]) -> Set[Tuple[str, str]]:
+    """``(zone, key)`` pairs that are page artifacts in this document.
+
+    ``zone`` is "head" or "foot" for running lines, "table" for repeated
+    table headers.
+    """
+    if len(pages) < MIN_REPEATS:
+        return set()
+    seen: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+    for p, page in enumerate(pages):
+        lines = page.split('\n')
+        for i, zone in _edge_lines(lines):
+            for k in _keys(lines[i], zone):
+                seen[k].add(p)
+
+    needed = max(MIN_REPEATS, math.ceil(MIN_SHARE * len(pages)))
+    found = set()
+    for (zone, key), where in seen.items():
+        if zone == 'table':
+            if _LETTER_RE.search(key) and any(p + 1 in where for p in where):
+                found.add((zone, key))
+        elif len(where) >= needed:
+            found.add((zone, key))
+    return found
+
+
+def strip_boilerplate(pages: List[str]) -> Tuple[List[str], Dict]:
+    """Remove page artifacts; returns the cleaned pages and removal stats."""
+    found = find_boilerplate(pages)
+    removed = 0
+    samples: Dict[Tuple[str, str], str] = {}
+    out = []
+    for page in pages:
+        lines = page.split('\n')
+        drop = set()
+        for i, zone in _edge_lines(lines):
+            for k in _keys(lines[i], zone):
+                if k in found:
+                    drop.add(i)
+                    samples.setdefault(k, lines[i].strip())
+                    break
+        removed += len(drop)
+        out.append('\n'.join(line for i, line in enumerate(lines) if i not in drop))
+    return out, {'lines_removed': removed, 'patterns': sorted(samples.values())}
+
+
+def main():
+    from .pdf_backends import extract_pdf_text
+    parser = argparse.ArgumentParser(description='Show the page artifacts that would be stripped from a PDF')
+    parser.add_argument('pdf', help='PDF file')
+    parser.add_argument('--backend', choices=['pypdf', 'pdfminer', 'pdfplumber'], help='Force a PDF backend')
+    args = parser.parse_args()
+
+    with open(args.pdf, 'rb') as f:
+        data = f.read()
+    pages, backend, _ = extract_pdf_text(data, backends=[args.backend] if args.backend else None)
+    cleaned, stats = strip_boilerplate(pages)
+    before = sum(len(p) for p in pages)
+    after = sum(len(p) for p in cleaned)
+    print(f"[boilerplate] {len(pages)} pages ({backend}): {stats['lines_removed']} lines removed, "
+          f"{before - after} of {before} chars")
+    for line in stats['patterns']:
+        print(f"  {line!r}")
+
+
+if __name__ == '__main__':
+    main()
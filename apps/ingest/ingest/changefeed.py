@@ -0,0 +1,177 @@
+"""Corpus generation counter and change feed.
+
+Every producer that rewrites corpus data (ingest, the scheduler, the tagger)
+calls ``publish``. It bumps a monotonic generation number and appends one
+line to the feed describing what changed in that generation:
+
+    <data>/corpus_generation.json  {"generation": 42, "updated_at": ..., "producer": "ingest", ...}
+    <data>/changes.jsonl           {"generation": 42, "producer": "ingest", "years": [1990],
+                                    "sections": {"1990": {"changed": [...], "removed": [...]}},
+                                    "topics": ["moats"], "at": ...}
+
+``"changed": "*"`` means every section of that year should be treated as
+changed. Consumers stat the small generation file and, when the number
+moves, read only the feed lines after the generation they last saw. If they
+have fallen behind the retained feed, they reload everything.
+
+Validation does not change data, so it does not bump the generation. It
+records ``validated_generation`` and its result in the generation file.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer assumption
+    fcntl = None
+
+GENERATION_FILE = 'corpus_generation.json'
+FEED_FILE = 'changes.jsonl'
+# Feed lines kept after compaction; older consumers fall back to a full reload
+MAX_FEED_ENTRIES = 1000
+# Above this many ids in a year, the entry just says "*"
+MAX_IDS_PER_YEAR = 5000
+
+
+def generation_path(data_dir: str) -> str:
+    return os.path.join(data_dir, GENERATION_FILE)
+
+
+def feed_path(data_dir: str) -> str:
+    return os.path.join(data_dir, FEED_FILE)
+
+
+@contextmanager
+def _locked(data_dir: str):
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, '.changefeed.lock'), 'w') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def read_state(data_dir: str) -> Dict:
+    try:
+        with open(generation_path(data_dir), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'generation': 0}
+
+
+def read_generation(data_dir: str) -> int:
+    return int(read_state(data_dir).get('generation', 0))
+
+
+def _write_state(data_dir: str, state: Dict):
+    path = generation_path(data_dir)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _section_entry(changed, removed) -> Dict:
+    if changed == '*' or changed is None:
+        ids = '*'
+    else:
+        ids = sorted(changed)
+        if len(ids) > MAX_IDS_PER_YEAR:
+            ids = '*'
+    return {'changed': ids, 'removed': sorted(removed or [])}
+
+
+def publish(data_dir: str, producer: str, years: Iterable[int],
+            sections: Optional[Dict[int, Dict]] = None, topics: Iterable[str] = ()) -> int:
+    """Record a change and return the new generation.
+
+    ``sections`` maps year → ``{'changed': ids or '*', 'removed': ids}``; years
+    without an entry are published as fully changed.
+    """
+    years = sorted({int(y) for y in years})
+    topics = sorted(set(topics))
+    if not years and not topics:
+        return read_generation(data_dir)
+    sections = sections or {}
+    with _locked(data_dir):
+        state = read_state(data_dir)
+        generation = int(state.get('generation', 0)) + 1
+        at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        entry = {
+            'generation': generation,
+            'at': at,
+            'producer': producer,
+            'years': years,
+            'sections': {str(y): _section_entry(sections.get(y, {}).get('changed', '*'),
+                                                sections.get(y, {}).get('removed'))
+                         for y in years},
+            'topics': topics,
+        }
+        with open(feed_path(data_dir), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        _compact(data_dir)
+        state.update({'generation': generation, 'updated_at': at, 'producer': producer,
+                      'years': years, 'topics': topics})
+        # Written last: consumers never see a generation whose feed line is missing
+        _write_state(data_dir, state)
+    return generation
+
+
+def mark_validated(data_dir: str, ok: bool, errors: int = 0) -> int:
+    """Record that the current generation passed (or failed) validation.
+
+    A no-op until some producer has published a generation.
+    """
+    if not os.path.exists(generation_path(data_dir)):
+        return 0
+    with _locked(data_dir):
+        state = read_state(data_dir)
+        state.update({'validated_generation': int(state.get('generation', 0)), 'validation_ok': ok,
+                      'validation_errors': errors,
+                      'validated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())})
+        _write_state(data_dir, state)
+        return state['validated_generation']
+
+
+def _compact(data_dir: str):
+    path = feed_path(data_dir)
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    if len(lines) <= MAX_FEED_ENTRIES * 2:
+        return
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.writelines(lines[-MAX_FEED_ENTRIES:])
+    os.replace(tmp, path)
+
+
+def changes_since(data_dir: str, generation: int) -> Optional[List[Dict]]:
+    """Feed entries after ``generation``, oldest first.
+
+    Returns ``None`` when the feed no longer reaches back that far (the caller
+    should reload everything).
+    """
+    current = read_generation(data_dir)
+    if generation >= current:
+        return []
+    entries = []
+    try:
+        with open(feed_path(data_dir), 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry['generation'] > generation:
+                        entries.append(entry)
+    except OSError:
+        return None
+    if not entries or entries[0]['generation'] != generation + 1:
+        return None
+    return entries
+
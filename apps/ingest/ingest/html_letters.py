@@ -1,7 +1,11 @@
+import codecs
 import hashlib
-from typing import Dict, List
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
 import requests
-from bs4 import BeautifulSoup
+
+from .sections import build_sections
 
 try:
     import brotli
@@ -10,7 +14,10 @@ except ImportError:
     HAS_BROTLI = False
 
 
-PARSER_VERSION = "letters-html-v0.1.0"
+# v0.2.0: one charset detection for fetched and cached bytes (decode_html)
+PARSER_VERSION = "letters-html-v0.2.0"
+
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE)
 
 
 def sha256_bytes(b: bytes) -> str:
@@ -19,19 +26,11 @@ def sha256_bytes(b: bytes) -> str:
     return h.hexdigest()
 
 
-def clean_html(html: str) -> str:
-    soup = BeautifulSoup(html, 'html.parser')
-    for tag in soup(['script', 'style', 'noscript', 'header', 'footer', 'nav']):
-        tag.decompose()
-    # Prefer <pre> blocks if present (older BH letters often use them)
-    pre_blocks = soup.find_all('pre')
-    if pre_blocks:
-        texts = [pre.get_text("\n") for pre in pre_blocks]
-        text = "\n\n".join(texts)
-    else:
-        body = soup.body or soup
-        text = body.get_text("\n")
-    
+SKIP_TAGS = ('script', 'style', 'noscript', 'header', 'footer', 'nav')
+
+
+def group_paragraphs(text: str) -> str:
+    """Join non-empty lines into paragraphs separated by blank lines."""
     # Fix the core issue: properly handle paragraph breaks
     lines = [ln.strip() for ln in text.split('\n')]
     
@@ -59,30 +58,228 @@ def clean_html(html: str) -> str:
     return "\n\n".join(paragraphs)
 
 
+def clean_html(html: str) -> str:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(SKIP_TAGS):
+        tag.decompose()
+    # Prefer <pre> blocks if present (older BH letters often use them)
+    pre_blocks = soup.find_all('pre')
+    if pre_blocks:
+        texts = [pre.get_text("\n") for pre in pre_blocks]
+        text = "\n\n".join(texts)
+    else:
+        body = soup.body or soup
+        text = body.get_text("\n")
+    return group_paragraphs(text)
+
+
+class OddMarkup(Exception):
+    """Raised by the streaming extractor when only a real tree builder will do."""
+
+
+class _StreamingTextExtractor(HTMLParser):
+    """Single-pass tokenizer that mirrors ``clean_html`` without building a tree.
+
+    Collects text chunks inside ``<pre>`` blocks and inside ``<body>`` (skipping
+    script/style/nav/...), and counts non-printable/control characters of the
+    raw input as it is fed.
+
+    ``HTMLParser`` also emits a data event at the end of every fed piece, so
+    data is buffered until the next tag: one chunk per text node, as in
+    ``clean_html``, however the input was split.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.skip_depth = 0
+        self.pre_depth = 0
+        self.body_seen = 0
+        self.in_body = False
+        self.pre_blocks: List[List[str]] = []
+        self.body_chunks: List[str] = []
+        self.all_chunks: List[str] = []
+        self.pending: List[str] = []
+        self.total_chars = 0
+        self.nonprintable = 0
+        self.control = 0
+
+    def feed_counted(self, chunk: str):
+        self.total_chars += len(chunk)
+        self.nonprintable += len(_nonprintable_re().findall(chunk))
+        self.control += len(_CONTROL_RE.findall(chunk))
+        self.feed(chunk)
+
+    def handle_starttag(self, tag, attrs):
+        self.flush_text()
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif self.skip_depth:
+            return
+        elif tag == 'pre':
+            if self.pre_depth:
+                raise OddMarkup('nested <pre>')
+            self.pre_depth = 1
+            self.pre_blocks.append([])
+        elif tag == 'body':
+            self.body_seen += 1
+            if self.body_seen > 1:
+                raise OddMarkup('multiple <body>')
+            self.in_body = True
+
+    def handle_endtag(self, tag):
+        self.flush_text()
+        if tag in SKIP_TAGS:
+            if not self.skip_depth:
+                raise OddMarkup(f'stray </{tag}>')
+            self.skip_depth -= 1
+        elif self.skip_depth:
+            return
+        elif tag == 'pre':
+            if not self.pre_depth:
+                raise OddMarkup('stray </pre>')
+            self.pre_depth = 0
+        elif tag == 'body':
+            self.in_body = False
+
+    def handle_comment(self, data):
+        self.flush_text()
+
+    def handle_decl(self, decl):
+        self.flush_text()
+
+    def handle_pi(self, data):
+        self.flush_text()
+
+    def handle_data(self, data):
+        self.pending.append(data)
+
+    def close(self):
+        super().close()
+        self.flush_text()
+
+    def flush_text(self):
+        """Record the buffered text node under the current tag state."""
+        if not self.pending:
+            return
+        data = "".join(self.pending)
+        self.pending = []
+        if self.skip_depth:
+            return
+        if self.pre_depth:
+            self.pre_blocks[-1].append(data)
+        if self.in_body:
+            self.body_chunks.append(data)
+        self.all_chunks.append(data)
+
+
+def fast_extract_html(html: str, chunk_size: int = 1 << 16) -> Optional[Tuple[str, bool]]:
+    """Extract letter text and corruption flag in one streaming pass.
+
+    Returns ``None`` when the markup is unusual enough (unbalanced skip tags,
+    nested ``<pre>``, repeated ``<body>``) that ``clean_html`` should be used.
+    """
+    parser = _StreamingTextExtractor()
+    try:
+        for i in range(0, len(html), chunk_size):
+            parser.feed_counted(html[i:i + chunk_size])
+        parser.close()
+    except OddMarkup:
+        return None
+    if parser.skip_depth or parser.pre_depth:
+        return None
+    corrupted = _is_corrupted_counts(parser.total_chars, parser.nonprintable, parser.control)
+    if parser.pre_blocks:
+        text = "\n\n".join("\n".join(chunks) for chunks in parser.pre_blocks)
+    else:
+        text = "\n".join(parser.body_chunks if parser.body_seen else parser.all_chunks)
+    return group_paragraphs(text), corrupted
+
+
 def segment_paragraphs(text: str) -> List[str]:
     paras = [p.strip() for p in text.split('\n\n') if p.strip()]
     return paras
 
 
+_CONTROL_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_NONPRINTABLE_RE = None
+
+
+def _nonprintable_re():
+    """Character class for chars that are neither printable nor whitespace (BMP)."""
+    global _NONPRINTABLE_RE
+    if _NONPRINTABLE_RE is None:
+        ranges = []
+        start = None
+        for cp in range(0x10000):
+            c = chr(cp)
+            bad = not (c.isprintable() or c.isspace())
+            if bad and start is None:
+                start = cp
+            elif not bad and start is not None:
+                ranges.append((start, cp - 1))
+                start = None
+        if start is not None:
+            ranges.append((start, 0xFFFF))
+        cls = ''.join(f'\\u{a:04x}' if a == b else f'\\u{a:04x}-\\u{b:04x}' for a, b in ranges)
+        _NONPRINTABLE_RE = re.compile(f'[{cls}]')
+    return _NONPRINTABLE_RE
+
+
+def _is_corrupted_counts(total: int, nonprintable: int, control: int) -> bool:
+    if total > 100 and (total - nonprintable) / total < 0.7:
+        return True
+    if total > 100 and control / total > 0.1:
+        return True
+    return False
+
+
 def is_text_corrupted(text: str) -> bool:
     """Detect if text contains binary/corrupted data"""
     if not text:
         return True
     
-    # Check for high ratio of non-printable characters
-    printable_chars = sum(1 for c in text if c.isprintable() or c.isspace())
-    if len(text) > 100 and printable_chars / len(text) < 0.7:
-        return True
-    
-    # Check for excessive binary-like sequences
-    binary_pattern_count = len([c for c in text if ord(c) < 32 and c not in '\n\r\t'])
-    if len(text) > 100 and binary_pattern_count / len(text) > 0.1:
-        return True
-        
-    return False
+    # High ratio of non-printable characters, or excessive binary-like control
+    # characters. Counted with compiled character classes rather than Python loops.
+    return _is_corrupted_counts(len(text), len(_nonprintable_re().findall(text)), len(_CONTROL_RE.findall(text)))
 
 
-def parse_letter_html(url: str, year: int, title: str) -> Dict:
+def _charset_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    for part in (content_type or '').split(';')[1:]:
+        name, _, value = part.partition('=')
+        if name.strip().lower() == 'charset' and value.strip():
+            return value.strip().strip('"\'')
+    return None
+
+
+def decode_html(data: bytes, content_type: Optional[str] = None) -> str:
+    """Decode letter bytes: header charset, then ``<meta charset>``, then UTF-8, then a guess.
+
+    Fresh fetches and the scheduler's cached raw bytes both go through here, so
+    the same bytes always yield the same text.
+    """
+    meta = _META_CHARSET_RE.search(data[:4096])
+    declared = [_charset_from_content_type(content_type), meta.group(1).decode('ascii') if meta else None]
+    for encoding in declared:
+        if encoding:
+            try:
+                return data.decode(encoding, errors='replace')
+            except LookupError:
+                continue
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        pass
+    guess = requests.compat.chardet.detect(data).get('encoding') or 'windows-1252'
+    try:
+        codecs.lookup(guess)
+    except LookupError:
+        guess = 'windows-1252'
+    return data.decode(guess, errors='replace')
+
+
+def fetch_html_bytes(url: str) -> Tuple[bytes, Optional[str]]:
+    """Download an HTML letter; returns the decompressed body and its Content-Type."""
     # Use browser-like headers to avoid 403 blocking
     headers = {
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -95,23 +292,42 @@ def parse_letter_html(url: str, year: int, title: str) -> Dict:
     resp = requests.get(url, headers=headers, timeout=60)
     resp.raise_for_status()
     data = resp.content
-    digest = sha256_bytes(data)
     
     # Handle Brotli compression if present
-    text_content = resp.text
     if resp.headers.get('content-encoding') == 'br' and HAS_BROTLI:
         try:
-            # Decompress Brotli content
-            decompressed = brotli.decompress(data)
-            text_content = decompressed.decode('utf-8')
+            data = brotli.decompress(data)
         except Exception as e:
-            print(f"[warn] Brotli decompression failed for {year}: {e}, using raw content")
-            text_content = resp.text
+            print(f"[warn] Brotli decompression failed for {url}: {e}, using raw content")
     elif resp.headers.get('content-encoding') == 'br' and not HAS_BROTLI:
-        print(f"[warn] Brotli content detected for {year} but brotli library not available")
+        print(f"[warn] Brotli content detected for {url} but brotli library not available")
+    return data, resp.headers.get('content-type')
+
+
+def fetch_html(url: str) -> Tuple[bytes, str]:
+    """Download an HTML letter; returns raw bytes and decoded text."""
+    data, content_type = fetch_html_bytes(url)
+    return data, decode_html(data, content_type)
+
+
+def parse_letter_html(url: str, year: int, title: str, data: Optional[bytes] = None,
+                      content_type: Optional[str] = None) -> Dict:
+    if data is None:
+        data, content_type = fetch_html_bytes(url)
+    text_content = decode_html(data, content_type)
+    digest = sha256_bytes(data)
     
+    # Streaming extraction computes the corruption check in the same pass;
+    # odd markup falls back to the BeautifulSoup path
+    fast = fast_extract_html(text_content) if text_content else None
+    if fast is None:
+        corrupted = is_text_corrupted(text_content)
+        text = None
+    else:
+        text, corrupted = fast
+
     # Check if HTML is corrupted - if so, try PDF fallback
-    if is_text_corrupted(text_content):
+    if corrupted:
         # Try PDF version as fallback
         pdf_url = url.replace('.html', '.pdf')
         if pdf_url != url:  # Only if we actually changed the URL
@@ -125,33 +341,12 @@ def parse_letter_html(url: str, year: int, title: str) -> Dict:
         # If no PDF fallback works, raise error about corrupted HTML
         raise ValueError(f"HTML content corrupted for {year} and no PDF fallback available")
     
-    text = clean_html(text_content)
+    if text is None:
+        text = clean_html(text_content)
     paras = segment_paragraphs(text)
 
-    sections = []
-    cursor = 0
-    for i, p in enumerate(paras, start=1):
-        start = text.find(p, cursor)
-        if start == -1:
-            start = cursor
-        end = start + len(p)
-        sec_checksum = sha256_bytes(p.encode('utf-8'))
-        sections.append({
-            'id': f"{year}-¶{i}",
-            'document_id': year,
-            'title': title,
-            'year': year,
-            'source': 'letters',
-            'anchor': f"¶{i}",
-            'page_no': None,
-            'text': p,
-            'char_start': start,
-            'char_end': end,
-            'doc_sha256': digest,
-            'section_checksum': sec_checksum,
-            'parser_version': PARSER_VERSION
-        })
-        cursor = end
+    # Sections are yielded lazily; callers stream them to disk/index
+    sections = build_sections(text, paras, year, title, digest, PARSER_VERSION)
 
     return {
         'sha256': digest,
@@ -1,10 +1,68 @@
-from typing import List
+"""Typesense indexing for sections.
+
+Topic tags are indexed as flat, faceted fields (``topics``, ``topic_top``,
+``topic_top_score``, ``topic_confidence``; see ``tagging.index_fields``) so
+topic filters and facet counts run inside Typesense.
+
+Collections created before those fields existed are altered in place by
+``ensure_sections_collection``. The documents already in them get their topic
+fields from the normalized corpus with:
+
+    python -m ingest.index_typesense migrate --data ../../data/normalized
+"""
+
+import argparse
+from typing import Dict, List
 import typesense
 import json
 import os
 
+from .tagging import index_fields
 
 SECTIONS_COLLECTION = "sections"
+SECTIONS_SCHEMA = {
+    "name": SECTIONS_COLLECTION,
+    "fields": [
+        {"name": "id", "type": "string"},
+        {"name": "document_id", "type": "int32", "facet": True},
+        {"name": "title", "type": "string"},
+        {"name": "year", "type": "int32", "facet": True},
+        {"name": "source", "type": "string", "facet": True},
+        {"name": "anchor", "type": "string"},
+        {"name": "page_no", "type": "int32", "optional": True},
+        {"name": "text", "type": "string"},
+        {"name": "doc_sha256", "type": "string", "optional": True},
+        {"name": "section_checksum", "type": "string", "optional": True},
+        {"name": "parser_version", "type": "string", "optional": True},
+        {"name": "topics", "type": "string[]", "facet": True, "optional": True},
+        {"name": "topic_top", "type": "string", "facet": True, "optional": True},
+        {"name": "topic_top_score", "type": "float", "facet": True, "optional": True},
+        {"name": "topic_confidence", "type": "string", "facet": True, "optional": True}
+    ],
+    "default_sorting_field": "year"
+}
+TOPIC_FIELDS = ('topics', 'topic_top', 'topic_top_score', 'topic_confidence')
+BATCH_SIZE = 500
+
+
+def schema_changes(existing: List[Dict], wanted: List[Dict] = SECTIONS_SCHEMA['fields']) -> List[Dict]:
+    """Field operations that bring an existing collection schema up to ``wanted``.
+
+    Missing fields are added; fields whose type or facet flag differ are
+    dropped and re-added in the same update.
+    """
+    current = {f['name']: f for f in existing}
+    changes = []
+    for field in wanted:
+        if field['name'] == 'id':
+            continue
+        have = current.get(field['name'])
+        if have is None:
+            changes.append(field)
+        elif have.get('type') != field['type'] or bool(have.get('facet')) != bool(field.get('facet')):
+            changes.append({'name': field['name'], 'drop': True})
+            changes.append(field)
+    return changes
 
 
 class TypesenseIndexer:
@@ -15,28 +73,20 @@ class TypesenseIndexer:
             'connection_timeout_seconds': 5
         })
 
-    def ensure_sections_collection(self):
-        schema = {
-            "name": SECTIONS_COLLECTION,
-            "fields": [
-                {"name": "id", "type": "string"},
-                {"name": "document_id", "type": "int32", "facet": True},
-                {"name": "title", "type": "string"},
-                {"name": "year", "type": "int32", "facet": True},
-                {"name": "source", "type": "string", "facet": True},
-                {"name": "anchor", "type": "string"},
-                {"name": "page_no", "type": "int32", "optional": True},
-                {"name": "text", "type": "string"},
-                {"name": "doc_sha256", "type": "string", "optional": True},
-                {"name": "section_checksum", "type": "string", "optional": True},
-                {"name": "parser_version", "type": "string", "optional": True}
-            ],
-            "default_sorting_field": "year"
-        }
+    def ensure_sections_collection(self) -> List[str]:
+        """Create the collection, or alter an older one in place; returns the fields changed."""
         try:
-            self.client.collections[SECTIONS_COLLECTION].retrieve()
+            existing = self.client.collections[SECTIONS_COLLECTION].retrieve()
         except Exception:
-            self.client.collections.create(schema)
+            self.client.collections.create(SECTIONS_SCHEMA)
+            return []
+        changes = schema_changes(existing.get('fields', []))
+        if changes:
+            self.client.collections[SECTIONS_COLLECTION].update({'fields': changes})
+            names = sorted({f['name'] for f in changes})
+            print(f"[ingest] Migrated Typesense '{SECTIONS_COLLECTION}' schema: {', '.join(names)}")
+            return names
+        return []
 
     def index_sections(self, sections: List[dict]):
         if not sections:
@@ -52,7 +102,71 @@ class TypesenseIndexer:
             'text': s['text'],
             'doc_sha256': s.get('doc_sha256'),
             'section_checksum': s.get('section_checksum'),
-            'parser_version': s.get('parser_version')
+            'parser_version': s.get('parser_version'),
+            **index_fields(s.get('topics'))
         } for s in sections]
 
         self.client.collections[SECTIONS_COLLECTION].documents.import_(docs, {'action': 'upsert'})
+
+    def update_topics(self, sections: List[dict]) -> int:
+        """Rewrite only the topic fields of already-indexed sections; returns failures.
+
+        Fields of a section that lost its tags are sent as ``None`` to clear them.
+        """
+        if not sections:
+            return 0
+        docs = [{'id': s['id'], **dict.fromkeys(TOPIC_FIELDS[1:]), **index_fields(s.get('topics'))}
+                for s in sections]
+        results = self.client.collections[SECTIONS_COLLECTION].documents.import_(docs, {'action': 'update'})
+        return sum(1 for r in results if not r.get('success', True))
+
+    def delete_sections(self, ids: List[str]):
+        documents = self.client.collections[SECTIONS_COLLECTION].documents
+        for doc_id in ids:
+            try:
+                documents[doc_id].delete()
+            except Exception as e:
+                print(f"[warn] Failed to delete {doc_id} from Typesense: {e}")
+
+
+def indexer_from_env() -> TypesenseIndexer:
+    return TypesenseIndexer(
+        host=os.getenv('TYPESENSE_HOST', 'localhost'),
+        port=int(os.getenv('TYPESENSE_PORT', '8108')),
+        protocol=os.getenv('TYPESENSE_PROTOCOL', 'http'),
+        api_key=os.getenv('TYPESENSE_API_KEY', 'xyz'),
+    )
+
+
+def main():
+    from .shards import iter_sections, list_years
+    parser = argparse.ArgumentParser(description='Migrate the Typesense sections collection')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    m = sub.add_parser('migrate', help='Add missing schema fields and backfill topic fields')
+    m.add_argument('--data', default=os.path.join(os.getcwd(), 'data', 'normalized'), help='Normalized JSONL dir')
+    m.add_argument('--schema-only', action='store_true', help='Alter the schema without backfilling documents')
+    args = parser.parse_args()
+
+    indexer = indexer_from_env()
+    changed = indexer.ensure_sections_collection()
+    if not changed:
+        print(f"[ingest] Typesense '{SECTIONS_COLLECTION}' schema is current")
+    if args.schema_only:
+        return
+    updated = failed = 0
+    for year in list_years(args.data):
+        batch = []
+        for s in iter_sections(args.data, year):
+            batch.append(s)
+            if len(batch) >= BATCH_SIZE:
+                failed += indexer.update_topics(batch)
+                updated += len(batch)
+                batch = []
+        failed += indexer.update_topics(batch)
+        updated += len(batch)
+    # Failures are usually sections that were never indexed; a full ingest run indexes them
+    print(f"[ingest] Backfilled topic fields for {updated - failed} sections ({failed} not in the index)")
+
+
+if __name__ == '__main__':
+    main()
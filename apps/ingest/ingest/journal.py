@@ -0,0 +1,165 @@
+"""Durable progress journal for ``ingest.main`` runs.
+
+Each run appends to ``<out>/ingest_journal.jsonl``, one fsync'd line per event:
+
+    {"event": "run", "run_id": ..., "work": [[1990, "https://..."], ...]}
+    {"event": "aligned", "year": 1990, "url": ..., "change": {...}, "topics": [...], "redirects": {...}}
+    {"event": "written", "year": 1990, "url": ..., "digest": ..., "change": {...}, "manifest": {...}}
+    {"event": "done", "year": 1990, "url": ...}
+    {"event": "failed", "year": 1991, "url": ..., "error": "..."}
+    {"event": "published", "generation": 12, "items": [[1990, "https://..."], ...]}
+    {"event": "finished", "done": 46, "failed": 1}
+
+"aligned" is recorded before the year file is replaced. It holds what
+alignment against the old file found: changed/removed ids, touched topics and
+the redirect table. A resumed attempt re-aligns against a file that may
+already be replaced and would see no change, so it merges this record in.
+"written" means the year file is on disk and its added/edited sections are
+indexed. "done" means the ids that disappeared have also been deleted from
+the index. With ``--resume``, ``ingest.main`` keeps the journal of the last
+run and skips items that are done. For items that were written but not
+done, it only redoes the deletes. Everything else is processed again.
+Letters already published to the change feed by an earlier attempt are not
+published again.
+
+A run without ``--resume`` starts a fresh journal.
+"""
+
+import json
+import os
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+JOURNAL_FILE = 'ingest_journal.jsonl'
+
+
+def item_key(year: int, url: str) -> Tuple[int, str]:
+    return int(year), url
+
+
+def dedupe_work(discovered: Iterable[Dict], seed: Iterable[Dict]) -> Tuple[List[Dict], int]:
+    """One work item per year, seed entries taking precedence over discovered ones.
+
+    Returns ``(items sorted by year, number of duplicates dropped)``.
+    """
+    by_year: Dict[int, Dict] = {}
+    dropped = 0
+    # Seed first so it wins; within a list, the first entry for a year wins
+    for item in list(seed) + list(discovered):
+        year = int(item['year'])
+        if year in by_year:
+            dropped += 1
+            continue
+        by_year[year] = item
+    return [by_year[y] for y in sorted(by_year)], dropped
+
+
+class RunJournal:
+    """Append-only, fsync'd checkpoint log for one ingest run."""
+
+    def __init__(self, out_dir: str):
+        self.path = os.path.join(out_dir, JOURNAL_FILE)
+        self.run_id: Optional[str] = None
+        self.aligned: Dict[Tuple[int, str], Dict] = {}
+        self.written: Dict[Tuple[int, str], Dict] = {}
+        self.done: Set[Tuple[int, str]] = set()
+        self.failed: Dict[Tuple[int, str], str] = {}
+        self.published: Set[Tuple[int, str]] = set()
+        self._f = None
+
+    def _load(self) -> bool:
+        """Read the last run's state from disk; ``False`` if there is none."""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from a kill mid-write
+                    continue
+                event = entry.get('event')
+                if event == 'run':
+                    self.run_id = entry['run_id']
+                    self.aligned, self.written, self.done, self.failed, self.published = {}, {}, set(), {}, set()
+                    continue
+                if event == 'published':
+                    self.published.update(item_key(y, u) for y, u in entry.get('items', []))
+                    continue
+                if 'year' not in entry:
+                    continue
+                key = item_key(entry['year'], entry['url'])
+                if event == 'aligned':
+                    self.aligned[key] = entry
+                elif event == 'written':
+                    self.written[key] = entry
+                elif event == 'done':
+                    self.done.add(key)
+                    self.failed.pop(key, None)
+                elif event == 'failed':
+                    self.failed[key] = entry.get('error', '')
+        return self.run_id is not None
+
+    def start(self, work: List[Dict], resume: bool = False) -> bool:
+        """Open the journal for this run; returns ``True`` when resuming a previous one."""
+        resumed = resume and self._load()
+        if not resumed:
+            self.run_id = uuid.uuid4().hex[:12]
+            self.aligned, self.written, self.done, self.failed, self.published = {}, {}, set(), {}, set()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._f = open(self.path, 'a' if resumed else 'w', encoding='utf-8')
+        self._append({'event': 'resume' if resumed else 'run', 'run_id': self.run_id,
+                      'work': [[int(w['year']), w['url']] for w in work]})
+        return resumed
+
+    def _append(self, entry: Dict):
+        entry.setdefault('at', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
+        self._f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def is_done(self, year: int, url: str) -> bool:
+        return item_key(year, url) in self.done
+
+    def written_entry(self, year: int, url: str) -> Optional[Dict]:
+        """The "written" record of an item that still needs its deletes, if any."""
+        key = item_key(year, url)
+        return None if key in self.done else self.written.get(key)
+
+    def aligned_entry(self, year: int, url: str) -> Optional[Dict]:
+        """The "aligned" record of an earlier attempt that never reached "written", if any."""
+        key = item_key(year, url)
+        return None if key in self.written else self.aligned.get(key)
+
+    def record(self, event: str, year: int, url: str, **fields):
+        key = item_key(year, url)
+        entry = {'event': event, 'year': int(year), 'url': url, **fields}
+        self._append(entry)
+        if event == 'aligned':
+            self.aligned[key] = entry
+        elif event == 'written':
+            self.written[key] = entry
+        elif event == 'done':
+            self.done.add(key)
+            self.failed.pop(key, None)
+        elif event == 'failed':
+            self.failed[key] = fields.get('error', '')
+
+    def completed(self, unpublished: bool = False) -> List[Dict]:
+        """The "written" records of every done item, for rebuilding run-wide outputs.
+
+        With ``unpublished``, only items not yet sent to the change feed.
+        """
+        return [self.written[k] for k in sorted(self.done)
+                if k in self.written and not (unpublished and k in self.published)]
+
+    def record_published(self, entries: List[Dict], generation: int):
+        items = [[e['year'], e['url']] for e in entries]
+        self._append({'event': 'published', 'generation': generation, 'items': items})
+        self.published.update(item_key(y, u) for y, u in items)
+
+    def finish(self):
+        self._append({'event': 'finished', 'done': len(self.done), 'failed': len(self.failed)})
+        self._f.close()
+        self._f = None
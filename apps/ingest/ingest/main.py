@@ -1,16 +1,18 @@
 import argparse
+import hashlib
 import os
 import sys
-import json
 import time
 import yaml
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 
-from .pdf_letters import parse_letter_pdf
-from .html_letters import parse_letter_html
-from .discover_letters import discover as discover_letters
-from .index_typesense import TypesenseIndexer
+from .journal import RunJournal, dedupe_work
+from .parsers import get_parser, kind_for
 from .provenance_manifest import write_manifest
+from .shards import list_years, write_year
+
+# Sections per Typesense import call while streaming
+INDEX_BATCH = 100
 
 
 def load_seed(path: str) -> List[Dict]:
@@ -19,76 +21,214 @@ def load_seed(path: str) -> List[Dict]:
     return data.get('letters', [])
 
 
+def tap_sections(sections: Iterable[Dict], indexer, stats: Dict, only_ids: Optional[Set[str]] = None) -> Iterator[Dict]:
+    """Pass sections through unchanged, indexing in batches and updating running stats.
+
+    With ``only_ids``, only those sections are sent to the indexer.
+    """
+    batch: List[Dict] = []
+    for s in sections:
+        stats['sections'] += 1
+        stats['digest'].update(s['section_checksum'].encode('ascii'))
+        if indexer and (only_ids is None or s['id'] in only_ids):
+            batch.append(s)
+            if len(batch) >= INDEX_BATCH:
+                indexer.index_sections(batch)
+                batch = []
+        yield s
+    if indexer and batch:
+        indexer.index_sections(batch)
+
+
+def refresh_metrics(out_dir: str):
+    """Rebuild the metrics store for a newly published generation; never fails the run."""
+    try:
+        from .metrics import refresh
+        refresh(out_dir)
+    except ImportError as e:
+        print(f"[warn] Skipping metrics store (needs numpy): {e}")
+    except Exception as e:
+        print(f"[warn] Failed to build metrics store: {e}")
+
+
 def main():
     parser = argparse.ArgumentParser(description='Ingest Berkshire letters into sections index')
     parser.add_argument('--seed', help='Path to letters seed YAML')
     parser.add_argument('--index', help='Berkshire letters index URL (auto-discover)')
     parser.add_argument('--out', default=os.path.join(os.getcwd(), 'data', 'normalized'), help='Output dir for normalized JSONL')
+    parser.add_argument('--compress', action='store_true', help='Write gzip shards + anchor index (letters_{year}.jsonl.gz/.idx.json) instead of plain JSONL')
+    parser.add_argument('--pdf-backend', choices=['auto', 'pypdf', 'pdfminer', 'pdfplumber'], default='auto', help='PDF text backend (auto: fastest first, escalate on low quality)')
+    parser.add_argument('--pdf-workers', type=int, default=1, help='Processes per PDF; pages are split into ranges and extracted in parallel')
+    parser.add_argument('--keep-page-artifacts', action='store_true', help='Do not strip repeated PDF headers/footers/page numbers before segmentation')
+    parser.add_argument('--no-index', action='store_true', help='Skip Typesense entirely (files only)')
+    parser.add_argument('--topics', help='Tag sections in-process with this topics.json before writing/indexing')
+    parser.add_argument('--resume', action='store_true', help='Continue the last run from its journal, skipping letters it already finished')
+    parser.add_argument('--no-align', action='store_true', help='Renumber anchors instead of aligning with the existing year file')
     args = parser.parse_args()
 
     os.makedirs(args.out, exist_ok=True)
 
-    typesense_host = os.getenv('TYPESENSE_HOST', 'localhost')
-    typesense_port = int(os.getenv('TYPESENSE_PORT', '8108'))
-    typesense_protocol = os.getenv('TYPESENSE_PROTOCOL', 'http')
-    typesense_api_key = os.getenv('TYPESENSE_API_KEY', 'xyz')
-
-    indexer = None
-    try:
-        idx = TypesenseIndexer(host=typesense_host, port=typesense_port, protocol=typesense_protocol, api_key=typesense_api_key)
-        idx.ensure_sections_collection()
-        indexer = idx
-        print("[ingest] Typesense available — indexing enabled")
-    except Exception as e:
-        print(f"[warn] Typesense unavailable: {e}\n[warn] Proceeding without indexing (files only)")
-
-    seed = []
+    # One compiled topic model for the whole run
+    topic_model = None
+    if args.topics:
+        from .tagging import TopicModel
+        topic_model = TopicModel.load(args.topics)
+        print(f"[ingest] Tagging with {len(topic_model.topics)} topics from {args.topics}")
+
+    # The Typesense client is imported and connected on first use only
+    indexer_state = {'indexer': None, 'tried': args.no_index}
+
+    def get_indexer():
+        if not indexer_state['tried']:
+            indexer_state['tried'] = True
+            try:
+                from .index_typesense import indexer_from_env
+                idx = indexer_from_env()
+                idx.ensure_sections_collection()
+                indexer_state['indexer'] = idx
+                print("[ingest] Typesense available — indexing enabled")
+            except Exception as e:
+                print(f"[warn] Typesense unavailable: {e}\n[warn] Proceeding without indexing (files only)")
+        return indexer_state['indexer']
+
+    discovered, seeded = [], []
     if args.index:
+        from .discover_letters import discover as discover_letters
         print(f"[ingest] Discovering letters from {args.index}")
         discovered = discover_letters(args.index)
-        seed.extend(discovered)
-        print(f"[ingest] Discovered {len(seed)} letters")
+        print(f"[ingest] Discovered {len(discovered)} letters")
     if args.seed:
-        seed.extend(load_seed(args.seed))
-    if not seed:
+        seeded = load_seed(args.seed)
+    # One item per year (seed entries win), so nothing is processed twice
+    work, dropped = dedupe_work(discovered, seeded)
+    if dropped:
+        print(f"[ingest] Dropped {dropped} duplicate seed/discovered entries")
+    if not work:
         print("[error] No seed or index provided")
         sys.exit(1)
-    docs_for_manifest = []
-    for item in seed:
+
+    journal = RunJournal(args.out)
+    if journal.start(work, resume=args.resume):
+        print(f"[ingest] Resuming run {journal.run_id}: {len(journal.done)} letters already done")
+    elif args.resume:
+        print("[ingest] No journal to resume; starting a fresh run")
+
+    for item in work:
         url = item['url']
         year = item['year']
         title = item.get('title', f"Berkshire Hathaway Shareholder Letter {year}")
+        if journal.is_done(year, url):
+            print(f"[ingest] Skipping {year}: done in an earlier attempt of this run")
+            continue
+        pending = journal.written_entry(year, url)
+        if pending:
+            # Written and indexed before the interruption; only the deletes remain
+            indexer = get_indexer()
+            if indexer and pending['change'].get('removed'):
+                indexer.delete_sections(pending['change']['removed'])
+            journal.record('done', year, url)
+            print(f"[ingest] Finished {year} from the journal")
+            continue
         print(f"[ingest] Processing {year}: {url}")
+        kind = kind_for(url)
+        opts = {}
+        if kind == 'letters-pdf':
+            opts['workers'] = args.pdf_workers
+            opts['strip_pages'] = not args.keep_page_artifacts
+            if args.pdf_backend != 'auto':
+                opts['backends'] = [args.pdf_backend]
         try:
-            if url.lower().endswith('.pdf'):
-                doc = parse_letter_pdf(url=url, year=year, title=title)
-            else:
-                doc = parse_letter_html(url=url, year=year, title=title)
+            doc = get_parser(kind)(url=url, year=year, title=title, **opts)
         except Exception as e:
             print(f"[error] Failed to parse {year}: {e}")
+            journal.record('failed', year, url, error=str(e))
             continue
 
-        # Save normalized sections as JSONL for provenance/caching
-        out_path = os.path.join(args.out, f"letters_{year}.jsonl")
-        with open(out_path, 'w') as f:
-            for s in doc['sections']:
-                f.write(json.dumps(s, ensure_ascii=False) + "\n")
-        print(f"[ingest] Saved {out_path}")
-
-        # Index into Typesense
+        sections = doc['sections']
+        tag_stats = None
+        if topic_model:
+            from .tagging import new_stats, tag_sections
+            tag_stats = new_stats()
+            sections = tag_sections(sections, topic_model, tag_stats)
+
+        # Re-parsing a year keeps its anchors stable; only changed sections are reindexed
+        aligned = None
+        if not args.no_align and year in list_years(args.out):
+            from .alignment import align_year
+            sections = list(sections)
+            aligned = align_year(args.out, year, sections, tagged=topic_model is not None)
+            if aligned:
+                print(f"[ingest] Aligned {year} with existing sections: {aligned['counts']}")
+
+        change = {'changed': sorted(aligned['changed']), 'removed': aligned['removed']} if aligned else {'changed': '*'}
+        # Freshly parsed rows carry no previous tags, so only alignment knows which topics really changed
+        changed_topics = set(aligned['topics']) if aligned else set()
+        redirects = aligned['redirects'] if aligned else None
+        prior = journal.aligned_entry(year, url)
+        if prior:
+            # An earlier attempt died after aligning, perhaps after replacing the year
+            # file; re-aligning against that file misses what it changed, so merge it in
+            if prior['change']['changed'] == '*' or change['changed'] == '*':
+                change = {'changed': '*'}
+            else:
+                change = {'changed': sorted(set(change['changed']) | set(prior['change']['changed'])),
+                          'removed': sorted(set(change['removed']) | set(prior['change']['removed']))}
+            changed_topics |= set(prior.get('topics', []))
+            redirects = redirects or prior.get('redirects')
+        # Journaled before the year file is replaced, so a resumed attempt can replay it
+        journal.record('aligned', year, url, change=change, topics=sorted(changed_topics), redirects=redirects)
+
+        # Stream sections: write → index in batches, keeping only counters and a digest
+        stats = {'sections': 0, 'digest': hashlib.sha256()}
+        indexer = get_indexer()
+        only_ids = None if change['changed'] == '*' else set(change['changed'])
+        out_path = write_year(args.out, year, tap_sections(sections, indexer, stats, only_ids), compress=args.compress)
+        if redirects:
+            from .alignment import save_redirects
+            save_redirects(args.out, year, redirects)
+        print(f"[ingest] Saved {out_path} ({stats['sections']} sections"
+              + (f", {tag_stats['tagged_sections']} tagged)" if tag_stats else ")"))
+        if change['changed'] == '*' and tag_stats:
+            # A whole new year: every tag it carries is new (known once the stream is written)
+            changed_topics |= tag_stats['changed_topics']
+        journal.record('written', year, url, digest=doc['sha256'], change=change,
+                       topics=sorted(changed_topics),
+                       manifest={
+                           'year': year,
+                           'title': title,
+                           'sha256': doc['sha256'],
+                           'backend': doc.get('backend'),
+                           'boilerplate_lines': doc.get('boilerplate_lines'),
+                           'sections': stats['sections'],
+                           'sections_digest': stats['digest'].hexdigest(),
+                       })
+        if indexer and change.get('removed'):
+            indexer.delete_sections(change['removed'])
+        journal.record('done', year, url)
         if indexer:
-            indexer.index_sections(doc['sections'])
             time.sleep(0.2)
 
-        docs_for_manifest.append({'year': year, 'title': title, 'sha256': doc['sha256'], 'sections': doc['sections']})
-
-    # Write provenance manifest
+    # Run-wide outputs cover letters finished in earlier attempts of a resumed run too
+    docs_for_manifest = [entry['manifest'] for entry in journal.completed()]
     try:
         write_manifest(args.out, docs_for_manifest)
         print(f"[ingest] Wrote manifest to {args.out}")
     except Exception as e:
         print(f"[warn] Failed to write manifest: {e}")
 
+    unpublished = journal.completed(unpublished=True)
+    if unpublished:
+        from .changefeed import publish
+        changes: Dict[int, Dict] = {entry['year']: entry['change'] for entry in unpublished}
+        changed_topics = {t for entry in unpublished for t in entry.get('topics', [])}
+        generation = publish(args.out, 'ingest', changes.keys(), changes, changed_topics)
+        journal.record_published(unpublished, generation)
+        print(f"[ingest] Published corpus generation {generation}")
+        refresh_metrics(args.out)
+
+    if journal.failed:
+        print(f"[warn] {len(journal.failed)} letters failed; re-run with --resume to retry only those")
+    journal.finish()
     print("[ingest] Done")
 
 
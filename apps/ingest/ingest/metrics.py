@@ -0,0 +1,296 @@
+"""Recurring figures extracted from letter text into a columnar metrics store.
+
+Extracted metrics:
+
+- ``bvps_change``: change in book value per share (%)
+- ``sp500_return``: S&P 500 total return (%)
+- ``relative_result``: book value change minus S&P 500 return (%, table only)
+- ``float``: insurance float (USD)
+- ``operating_earnings``: operating earnings (USD)
+
+Two extractors run over every section:
+
+- prose patterns ("book value per share increased 21.4% in 1990"). The
+  figure belongs to a year named in the same sentence, otherwise to the
+  letter's year.
+- the per-share book value vs. S&P 500 comparison table. Flattened rows
+  "1990 7.4 (3.1) 10.5" count only when the third column equals the first
+  minus the second, which keeps random number runs out.
+
+Every fact keeps the ``section_id``, ``anchor`` and ``char_start``/``char_end``
+of its match within that section's ``text``, so each figure links back to
+its source.
+
+The store is one ``.npy`` file per column, sorted by (metric, year), plus
+``strings.json`` for the metric names and section ids. Each column is
+memory-mapped, and a (metric, year range) lookup is two ``searchsorted``
+calls:
+
+    <data>/../metrics/<version>/{year,metric,value,source_year,section,char_start,char_end,method}.npy
+    <data>/../metrics/<version>/strings.json        <data>/../metrics/latest.json
+
+``ingest.main`` and the scheduler's index stage call ``refresh`` after every
+published generation, so the store follows ingest; the CLI build is for
+backfills and ``--force`` rebuilds.
+
+Build:  python -m ingest.metrics build --data ../../data/normalized
+Query:  python -m ingest.metrics series bvps_change --from 1980 --to 1999
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .sections import sentence_spans
+from .shards import corpus_version, iter_sections, list_years, publish_versioned_dir
+
+METRICS = {
+    'bvps_change': 'pct',
+    'sp500_return': 'pct',
+    'relative_result': 'pct',
+    'float': 'usd',
+    'operating_earnings': 'usd',
+}
+METHODS = ('prose', 'table')
+# Table columns must satisfy relative ≈ book value − S&P within this tolerance
+TABLE_TOLERANCE = 0.15
+
+_COLUMNS = {
+    'year': np.int16, 'metric': np.int8, 'value': np.float64, 'source_year': np.int16,
+    'section': np.int32, 'char_start': np.int32, 'char_end': np.int32, 'method': np.int8,
+}
+
+_PCT = r'(?P<value>\(?[-−]?\d{1,3}(?:\.\d+)?\)?)\s?(?:%|percent)'
+_USD = r'\$\s?(?P<value>\d[\d,]*(?:\.\d+)?)\s*(?P<scale>billion|million|thousand)?'
+_ABOUT = r'(?:about|approximately|roughly|some|nearly|almost|more than)?\s*'
+_DOWN = re.compile(r'decreas|declin|fell|down|los|drop', re.I)
+
+_PROSE = [
+    ('bvps_change', re.compile(
+        r'(?:per-share book value|book value per share|book value of our shares)[^.%]{0,80}?'
+        r'(?P<verb>increased|rose|grew|gained|was up|decreased|declined|fell|was down)\s+(?:by\s+)?' + _PCT, re.I)),
+    ('bvps_change', re.compile(
+        r'(?P<verb>gain|loss|increase|decrease) in (?:our )?(?:per-share book value|book value per share)'
+        r'[^.%]{0,60}?(?:was|of)\s+' + _PCT, re.I)),
+    ('sp500_return', re.compile(
+        r'S&P 500[^.%]{0,60}?(?P<verb>returned|rose|gained|fell|declined|was down|was up|'
+        r'(?:had a )?total return of)\s+(?:of\s+)?' + _PCT, re.I)),
+    ('float', re.compile(r'\bfloat\b[^.$]{0,60}?(?:was|totaled|reached|grew to|grown to|rose to|amounted to|'
+                         r'stood at|of|now)\s+' + _ABOUT + _USD, re.I)),
+    ('operating_earnings', re.compile(r'operating earnings[^.$]{0,60}?(?:were|was|totaled|of|came to|'
+                                      r'amounted to|reached)\s+' + _ABOUT + _USD, re.I)),
+]
+_YEAR_IN_RE = re.compile(r'\b(?:in|during|for)\s+((?:19|20)\d{2})\b', re.I)
+_NUM = r'(\(?[-−]?\d{1,3}\.\d\)?)'
+_TABLE_ROW_RE = re.compile(r'\b((?:19[6-9]|20[0-9])\d)\s+' + r'\s+'.join([_NUM] * 3) + r'(?=\s|$)')
+_SCALES = {'billion': 1e9, 'million': 1e6, 'thousand': 1e3}
+
+
+def _number(s: str) -> float:
+    s = s.replace('−', '-').replace(',', '')
+    if s.startswith('(') and s.endswith(')'):
+        return -float(s[1:-1])
+    return float(s.strip('()'))
+
+
+def _fact(metric: str, year: int, value: float, section: Dict, start: int, end: int, method: str) -> Dict:
+    return {'metric': metric, 'year': year, 'value': value, 'unit': METRICS[metric],
+            'source_year': int(section['year']), 'section_id': section['id'], 'anchor': section['anchor'],
+            'char_start': start, 'char_end': end, 'method': method}
+
+
+def extract_facts(section: Dict) -> Iterator[Dict]:
+    """Numeric facts in one section, with offsets into its ``text``."""
+    text = section.get('text', '')
+    letter_year = int(section['year'])
+    spans = sentence_spans(text)
+    for metric, pattern in _PROSE:
+        for m in pattern.finditer(text):
+            raw = m.group('value')
+            value = _number(raw)
+            if METRICS[metric] == 'usd':
+                value *= _SCALES.get((m.group('scale') or '').lower(), 1.0)
+            elif not raw.startswith(('(', '-', '−')) and 'verb' in m.groupdict() and _DOWN.search(m.group('verb')):
+                value = -value
+            sentence = next((text[a:b] for a, b in spans if a <= m.start() < b), text)
+            named = _YEAR_IN_RE.search(sentence)
+            year = int(named.group(1)) if named else letter_year
+            yield _fact(metric, year, value, section, m.start(), m.end(), 'prose')
+    for m in _TABLE_ROW_RE.finditer(text):
+        bv, sp, rel = (_number(m.group(i)) for i in (2, 3, 4))
+        if abs((bv - sp) - rel) > TABLE_TOLERANCE:
+            continue
+        year = int(m.group(1))
+        for metric, value in (('bvps_change', bv), ('sp500_return', sp), ('relative_result', rel)):
+            yield _fact(metric, year, value, section, m.start(), m.end(), 'table')
+
+
+def _preference(fact: Dict) -> tuple:
+    # The letter for that year first, then the comparison table, then the newest letter
+    return (fact['source_year'] != fact['year'], fact['method'] != 'table', -fact['source_year'])
+
+
+def build_store(data_dir: str) -> Dict[str, np.ndarray]:
+    """All facts as columns sorted by (metric, year, preference), plus the string table."""
+    facts = [f for year in list_years(data_dir) for s in iter_sections(data_dir, year) for f in extract_facts(s)]
+    metric_ids = {m: i for i, m in enumerate(METRICS)}
+    facts.sort(key=lambda f: (metric_ids[f['metric']], f['year']) + _preference(f))
+    sections: Dict[str, int] = {}
+    section_rows: List[List[str]] = []
+    for f in facts:
+        if f['section_id'] not in sections:
+            sections[f['section_id']] = len(section_rows)
+            section_rows.append([f['section_id'], f['anchor']])
+    columns = {
+        'year': [f['year'] for f in facts],
+        'metric': [metric_ids[f['metric']] for f in facts],
+        'value': [f['value'] for f in facts],
+        'source_year': [f['source_year'] for f in facts],
+        'section': [sections[f['section_id']] for f in facts],
+        'char_start': [f['char_start'] for f in facts],
+        'char_end': [f['char_end'] for f in facts],
+        'method': [METHODS.index(f['method']) for f in facts],
+    }
+    out = {name: np.array(values, dtype=_COLUMNS[name]) for name, values in columns.items()}
+    out['strings'] = {'metrics': list(METRICS), 'units': METRICS, 'methods': list(METHODS),
+                      'sections': section_rows}
+    return out
+
+
+def build_artifacts(data_dir: str, out_root: str, force: bool = False) -> tuple:
+    """Build the store for the current corpus version; returns (version, rebuilt, facts)."""
+    version = corpus_version(data_dir)
+    vdir = os.path.join(out_root, version)
+    if os.path.exists(os.path.join(vdir, 'strings.json')) and not force:
+        return version, False, None
+    store = build_store(data_dir)
+    strings = store.pop('strings')
+    strings['version'] = version
+
+    facts = int(len(store['year']))
+
+    def write(tmp_dir: str):
+        for name, column in store.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), column)
+        with open(os.path.join(tmp_dir, 'strings.json'), 'w', encoding='utf-8') as f:
+            json.dump(strings, f, ensure_ascii=False)
+
+    publish_versioned_dir(out_root, version, write, {'facts': facts})
+    return version, True, facts
+
+
+def refresh(data_dir: str) -> str:
+    """Ingest hook: build the store for the current corpus version if it is missing."""
+    out_root = os.path.join(data_dir, '..', 'metrics')
+    os.makedirs(out_root, exist_ok=True)
+    version, rebuilt, n = build_artifacts(data_dir, out_root)
+    if rebuilt:
+        print(f"[metrics] {n} facts for version {version} → {out_root}")
+    return version
+
+
+class MetricsStore:
+    """Memory-mapped columns of one built version."""
+
+    def __init__(self, vdir: str):
+        with open(os.path.join(vdir, 'strings.json'), 'r', encoding='utf-8') as f:
+            self.strings = json.load(f)
+        self.version = self.strings.get('version')
+        self.metrics: List[str] = self.strings['metrics']
+        self.c = {name: np.load(os.path.join(vdir, f"{name}.npy"), mmap_mode='r') for name in _COLUMNS}
+        # Rows are sorted by (metric, year): one combined key makes every lookup a searchsorted
+        self._key = np.asarray(self.c['metric'], dtype=np.int64) * 10000 + np.asarray(self.c['year'])
+
+    @classmethod
+    def load(cls, out_root: str) -> 'MetricsStore':
+        with open(os.path.join(out_root, 'latest.json'), 'r', encoding='utf-8') as f:
+            return cls(os.path.join(out_root, json.load(f)['version']))
+
+    def _row(self, i: int) -> Dict:
+        section_id, anchor = self.strings['sections'][int(self.c['section'][i])]
+        metric = self.metrics[int(self.c['metric'][i])]
+        return {
+            'metric': metric,
+            'year': int(self.c['year'][i]),
+            'value': float(self.c['value'][i]),
+            'unit': self.strings['units'][metric],
+            'source_year': int(self.c['source_year'][i]),
+            'section_id': section_id,
+            'anchor': anchor,
+            'char_start': int(self.c['char_start'][i]),
+            'char_end': int(self.c['char_end'][i]),
+            'method': self.strings['methods'][int(self.c['method'][i])],
+        }
+
+    def _range(self, metric: str, start: Optional[int], end: Optional[int]) -> range:
+        if metric not in self.metrics:
+            return range(0)
+        m = self.metrics.index(metric) * 10000
+        lo = np.searchsorted(self._key, m + (start if start is not None else 0), side='left')
+        hi = np.searchsorted(self._key, m + (end if end is not None else 9999), side='right')
+        return range(int(lo), int(hi))
+
+    def series(self, metric: str, start: Optional[int] = None, end: Optional[int] = None,
+               all_sources: bool = False) -> List[Dict]:
+        """Facts for ``metric`` in ``[start, end]``; one preferred fact per year unless ``all_sources``."""
+        rows = self._range(metric, start, end)
+        if all_sources:
+            return [self._row(i) for i in rows]
+        out = []
+        last_year = None
+        for i in rows:
+            # Within a year, rows are already in preference order
+            year = int(self.c['year'][i])
+            if year != last_year:
+                fact = self._row(i)
+                fact['sources'] = int(np.searchsorted(self._key, self._key[i], side='right')) - i
+                out.append(fact)
+                last_year = year
+        return out
+
+    def get(self, year: int, metric: str) -> Optional[Dict]:
+        facts = self.series(metric, year, year)
+        return facts[0] if facts else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the numeric metrics store')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    b = sub.add_parser('build', help='Extract figures for the current corpus version')
+    b.add_argument('--data', default=os.path.join(os.getcwd(), 'data', 'normalized'), help='Normalized JSONL dir')
+    b.add_argument('--out', help='Store root (default: <data>/../metrics)')
+    b.add_argument('--force', action='store_true', help='Rebuild even if this corpus version exists')
+    q = sub.add_parser('series', help='Print one metric over a year range')
+    q.add_argument('metric', choices=list(METRICS))
+    q.add_argument('--from', dest='start', type=int)
+    q.add_argument('--to', dest='end', type=int)
+    q.add_argument('--all', action='store_true', help='Every source, not just the preferred fact per year')
+    q.add_argument('--out', default=os.path.join(os.getcwd(), 'data', 'metrics'), help='Store root')
+    args = parser.parse_args()
+
+    if args.cmd == 'build':
+        out_root = args.out or os.path.join(args.data, '..', 'metrics')
+        os.makedirs(out_root, exist_ok=True)
+        t0 = time.perf_counter()
+        version, rebuilt, n = build_artifacts(args.data, out_root, args.force)
+        if rebuilt:
+            print(f"[metrics] {n} facts for version {version} in {time.perf_counter() - t0:.2f}s → {out_root}")
+        else:
+            print(f"[metrics] version {version} is up to date ({out_root})")
+        return
+
+    store = MetricsStore.load(args.out)
+    t0 = time.perf_counter()
+    facts = store.series(args.metric, args.start, args.end, args.all)
+    elapsed = (time.perf_counter() - t0) * 1000
+    print(json.dumps(facts, ensure_ascii=False, indent=2))
+    print(f"[metrics] {len(facts)} facts in {elapsed:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Source-parser registry keyed by source kind and MIME type.
+
+Parser modules pull in heavy dependencies (pdfplumber/pdfminer, BeautifulSoup,
+PyPDF2), so the registry only stores dotted import paths and imports a parser
+the first time it is asked for. A run that never touches a PDF never imports
+pdfplumber.
+"""
+
+import importlib
+import mimetypes
+from typing import Callable, Dict, Optional, Tuple
+
+# kind -> (module, attribute, mime types, url suffixes)
+_REGISTRY: Dict[str, Tuple[str, str, Tuple[str, ...], Tuple[str, ...]]] = {}
+_LOADED: Dict[str, Callable] = {}
+
+
+def register_parser(kind: str, module: str, attr: str, mime_types: Tuple[str, ...] = (), suffixes: Tuple[str, ...] = ()):
+    """Register a parser without importing it. ``module`` may be relative to this package."""
+    _REGISTRY[kind] = (module, attr, tuple(mime_types), tuple(s.lower() for s in suffixes))
+    _LOADED.pop(kind, None)
+
+
+def registered_kinds():
+    return sorted(_REGISTRY.keys())
+
+
+def get_parser(kind: str) -> Callable:
+    fn = _LOADED.get(kind)
+    if fn is None:
+        if kind not in _REGISTRY:
+            raise KeyError(f"No parser registered for kind '{kind}'")
+        module, attr, _, _ = _REGISTRY[kind]
+        fn = getattr(importlib.import_module(module, package=__package__), attr)
+        _LOADED[kind] = fn
+    return fn
+
+
+def parser_version(kind: str) -> str:
+    """``PARSER_VERSION`` of a kind's parser module (imports it, like ``get_parser``)."""
+    if kind not in _REGISTRY:
+        raise KeyError(f"No parser registered for kind '{kind}'")
+    module = importlib.import_module(_REGISTRY[kind][0], package=__package__)
+    return getattr(module, 'PARSER_VERSION', 'unversioned')
+
+
+def kind_for(url: str, mime: Optional[str] = None) -> str:
+    """Resolve the source kind from an explicit MIME type, else from the URL suffix."""
+    if mime is None:
+        mime, _ = mimetypes.guess_type(url.split('?', 1)[0])
+    if mime:
+        mime = mime.split(';', 1)[0].strip().lower()
+        for kind, (_, _, mime_types, _) in _REGISTRY.items():
+            if mime in mime_types:
+                return kind
+    path = url.split('?', 1)[0].lower()
+    for kind, (_, _, _, suffixes) in _REGISTRY.items():
+        if suffixes and path.endswith(suffixes):
+            return kind
+    # Letter pages without an extension are served as HTML
+    return 'letters-html'
+
+
+def parser_for(url: str, mime: Optional[str] = None) -> Callable:
+    return get_parser(kind_for(url, mime))
+
+
+register_parser('letters-pdf', '.pdf_letters', 'parse_letter_pdf',
+                mime_types=('application/pdf',), suffixes=('.pdf',))
+register_parser('letters-html', '.html_letters', 'parse_letter_html',
+                mime_types=('text/html', 'application/xhtml+xml'), suffixes=('.html', '.htm'))
+# Meeting transcripts (Sprint 03) register here as 'transcripts' once the parser lands.
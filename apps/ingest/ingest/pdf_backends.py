@@ -0,0 +1,178 @@
+"""Pluggable PDF text-extraction backends with quality-scored escalation.
+
+Backends are tried fastest-first. Each result is scored with a cheap
+text-quality heuristic; if the score clears ``MIN_QUALITY`` the text is used,
+otherwise the next (slower, more layout-aware) backend is tried. The best
+result seen is returned if nothing clears the bar.
+"""
+
+import hashlib
+import io
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+MIN_QUALITY = 0.80
+# Below this many pages per worker, process start-up costs more than it saves
+MIN_PAGES_PER_WORKER = 4
+
+_WORD_RE = re.compile(r"[A-Za-z]+(?:['’-][A-Za-z]+)*")
+_TOKEN_RE = re.compile(r"\S+")
+_LETTER_RE = re.compile(r"[A-Za-z]")
+_CONTROL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f�]")
+
+
+def _open_pypdf(data: bytes):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        from PyPDF2 import PdfReader
+    return PdfReader(io.BytesIO(data))
+
+
+def extract_pypdf(data: bytes, pages: Optional[range] = None) -> List[str]:
+    reader = _open_pypdf(data)
+    pages = pages if pages is not None else range(len(reader.pages))
+    return [reader.pages[i].extract_text() or '' for i in pages]
+
+
+def extract_pdfminer(data: bytes, pages: Optional[range] = None) -> List[str]:
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LAParams, LTTextContainer
+    out = []
+    page_numbers = set(pages) if pages is not None else None
+    for layout in extract_pages(io.BytesIO(data), page_numbers=page_numbers, laparams=LAParams()):
+        out.append(''.join(el.get_text() for el in layout if isinstance(el, LTTextContainer)))
+    return out
+
+
+def extract_pdfplumber(data: bytes, pages: Optional[range] = None) -> List[str]:
+    import pdfplumber
+    # pdfplumber page numbers are 1-based
+    page_numbers = [i + 1 for i in pages] if pages is not None else None
+    with pdfplumber.open(io.BytesIO(data), pages=page_numbers) as pdf:
+        return [page.extract_text(x_tolerance=2, y_tolerance=2) or '' for page in pdf.pages]
+
+
+def count_pages(data: bytes) -> int:
+    try:
+        return len(_open_pypdf(data).pages)
+    except ImportError:
+        from pdfminer.pdfpage import PDFPage
+        return sum(1 for _ in PDFPage.get_pages(io.BytesIO(data)))
+
+
+# Ordered fastest → slowest; auto-selection walks this list.
+BACKENDS: Dict[str, Callable[..., List[str]]] = {
+    'pypdf': extract_pypdf,
+    'pdfminer': extract_pdfminer,
+    'pdfplumber': extract_pdfplumber,
+}
+DEFAULT_ORDER = list(BACKENDS.keys())
+
+
+def score_text_quality(text: str) -> float:
+    """Score extracted text in [0, 1]; low scores mean garbled or mis-spaced output.
+
+    Combines: share of tokens that look like words, share of letters among
+    non-space characters, absence of control/replacement characters, and
+    penalties for runs of single letters ("t h e") or glued words
+    ("thecompanyearned") that broken spacing produces.
+    """
+    if not text or not text.strip():
+        return 0.0
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return 0.0
+    n = len(tokens)
+    words = _WORD_RE.findall(text)
+    wordlike = min(len(words) / n, 1.0)
+
+    non_space = sum(len(t) for t in tokens)
+    letters = len(_LETTER_RE.findall(text))
+    letter_ratio = letters / non_space if non_space else 0.0
+    # Financial tables are digit-heavy; anything above ~60% letters is healthy prose
+    letter_score = min(letter_ratio / 0.6, 1.0)
+
+    control_penalty = min(len(_CONTROL_RE.findall(text)) / max(len(text), 1) * 20, 1.0)
+    single = sum(1 for w in words if len(w) == 1 and w not in ('a', 'A', 'I')) / max(len(words), 1)
+    glued = sum(1 for w in words if len(w) > 20) / max(len(words), 1)
+    spacing_penalty = min(single * 3 + glued * 5, 1.0)
+
+    score = (0.5 * wordlike + 0.5 * letter_score) * (1.0 - spacing_penalty) * (1.0 - control_penalty)
+    return round(max(0.0, min(score, 1.0)), 4)
+
+
+def _extract_range(name: str, data: bytes, start: int, stop: int) -> List[str]:
+    return BACKENDS[name](data, range(start, stop))
+
+
+def page_ranges(n_pages: int, workers: int) -> List[Tuple[int, int]]:
+    """Split ``n_pages`` into at most ``workers`` contiguous, near-equal ranges."""
+    workers = max(1, min(workers, n_pages // MIN_PAGES_PER_WORKER or 1))
+    step, extra = divmod(n_pages, workers)
+    ranges = []
+    start = 0
+    for w in range(workers):
+        stop = start + step + (1 if w < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def extract_with_backend(name: str, data: bytes, workers: int = 1) -> List[str]:
+    """Run one backend, optionally splitting the document's pages across processes.
+
+    Pages are extracted independently and concatenated in page order, so the
+    result is identical to a serial run.
+    """
+    if workers <= 1:
+        return BACKENDS[name](data)
+    ranges = page_ranges(count_pages(data), workers)
+    if len(ranges) <= 1:
+        return BACKENDS[name](data)
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [pool.submit(_extract_range, name, data, start, stop) for start, stop in ranges]
+        pages: List[str] = []
+        for fut in futures:
+            pages.extend(fut.result())
+    return pages
+
+
+def extract_pdf_text(data: bytes, backends: Optional[List[str]] = None,
+                     min_quality: float = MIN_QUALITY, workers: int = 1) -> Tuple[List[str], str, float]:
+    """Return ``(pages, backend_name, quality)`` using the first backend that passes."""
+    order = backends or DEFAULT_ORDER
+    best: Optional[Tuple[List[str], str, float]] = None
+    errors = []
+    for name in order:
+        try:
+            pages = extract_with_backend(name, data, workers)
+        except Exception as e:
+            errors.append(f"{name}={e}")
+            continue
+        quality = score_text_quality('\n\n'.join(pages))
+        if best is None or quality > best[2]:
+            best = (pages, name, quality)
+        if quality >= min_quality:
+            return pages, name, quality
+        print(f"[info] {name} quality {quality:.2f} < {min_quality:.2f}, escalating")
+    if best is None:
+        raise RuntimeError(f"All PDF backends failed: {', '.join(errors)}")
+    return best
+
+
+def benchmark_backend(name: str, data: bytes, workers: int = 1) -> Dict:
+    t0 = time.perf_counter()
+    pages = extract_with_backend(name, data, workers)
+    elapsed = time.perf_counter() - t0
+    text = '\n\n'.join(pages)
+    return {
+        'backend': name,
+        'seconds': elapsed,
+        'pages': len(pages),
+        'chars': len(text),
+        'quality': score_text_quality(text),
+        'text_sha256': hashlib.sha256(text.encode('utf-8')).hexdigest(),
+    }
@@ -1,16 +1,14 @@
-import io
 import hashlib
 import requests
-import pdfplumber
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-try:
-    import PyPDF2
-    HAS_PYPDF2 = True
-except ImportError:
-    HAS_PYPDF2 = False
+from .boilerplate import strip_boilerplate
+from .pdf_backends import extract_pdf_text
+from .sections import build_sections
 
-PARSER_VERSION = "letters-v0.1.0"
+# Bumped when default extraction changed from pdfplumber to the pypdf-first
+# escalation chain; sections also carry the backend that produced their text
+PARSER_VERSION = "letters-v0.3.0"
 
 
 def sha256_bytes(b: bytes) -> str:
@@ -102,25 +100,7 @@ def segment_paragraphs(text: str) -> List[str]:
     return chunks
 
 
-def extract_text_with_pypdf2(pdf_bytes: bytes) -> str:
-    """Fallback PDF parsing using PyPDF2"""
-    if not HAS_PYPDF2:
-        raise ImportError("PyPDF2 not available")
-        
-    pdf_file = io.BytesIO(pdf_bytes)
-    pdf_reader = PyPDF2.PdfReader(pdf_file)
-    
-    pages_text = []
-    for page_num in range(len(pdf_reader.pages)):
-        page = pdf_reader.pages[page_num]
-        text = page.extract_text()
-        if text:
-            pages_text.append(text)
-    
-    return '\n\n'.join(pages_text)
-
-
-def parse_letter_pdf(url: str, year: int, title: str) -> Dict:
+def fetch_pdf(url: str) -> bytes:
     # Use browser-like headers to avoid 403 blocking
     headers = {
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -132,56 +112,42 @@ def parse_letter_pdf(url: str, year: int, title: str) -> Dict:
     }
     resp = requests.get(url, headers=headers, timeout=60)
     resp.raise_for_status()
-    data = resp.content
+    return resp.content
+
+
+def parse_letter_pdf(url: str, year: int, title: str, data: Optional[bytes] = None,
+                     backends: Optional[List[str]] = None, workers: int = 1,
+                     strip_pages: bool = True) -> Dict:
+    if data is None:
+        data = fetch_pdf(url)
     digest = sha256_bytes(data)
 
-    # Try pdfplumber first, then fall back to PyPDF2
-    raw_text = ""
+    # Fastest backend first; escalate to slower ones only if the text scores poorly
     try:
-        with pdfplumber.open(io.BytesIO(data)) as pdf:
-            pages_text = []
-            for page in pdf.pages:
-                pages_text.append(page.extract_text(x_tolerance=2, y_tolerance=2) or '')
-        raw_text = '\n\n'.join(pages_text)
+        pages, backend, quality = extract_pdf_text(data, backends=backends, workers=workers)
     except Exception as e:
-        print(f"[warn] pdfplumber failed for {year}: {e}, trying PyPDF2 fallback")
-        try:
-            raw_text = extract_text_with_pypdf2(data)
-            print(f"[info] PyPDF2 fallback succeeded for {year}")
-        except Exception as e2:
-            print(f"[error] Both PDF parsers failed for {year}: pdfplumber={e}, PyPDF2={e2}")
-            raise e2
+        print(f"[error] All PDF backends failed for {year}: {e}")
+        raise
+    print(f"[info] {year}: extracted with {backend} (quality {quality:.2f})")
+    # Running headers/footers and page numbers go before pages are flattened
+    boilerplate = {'lines_removed': 0, 'patterns': []}
+    if strip_pages:
+        pages, boilerplate = strip_boilerplate(pages)
+        if boilerplate['lines_removed']:
+            print(f"[info] {year}: stripped {boilerplate['lines_removed']} page-artifact lines "
+                  f"({len(boilerplate['patterns'])} patterns)")
+    raw_text = '\n\n'.join(pages)
     norm = normalize_text(raw_text)
     paras = segment_paragraphs(norm)
 
-    sections = []
-    cursor = 0
-    for i, p in enumerate(paras, start=1):
-        start = norm.find(p, cursor)
-        if start == -1:
-            start = cursor
-        end = start + len(p)
-        sec_checksum = sha256_bytes(p.encode('utf-8'))
-        sections.append({
-            'id': f"{year}-¶{i}",
-            'document_id': year,  # temporary stand-in id by year
-            'title': title,
-            'year': year,
-            'source': 'letters',
-            'anchor': f"¶{i}",
-            'page_no': None,
-            'text': p,
-            'char_start': start,
-            'char_end': end,
-            'doc_sha256': digest,
-            'section_checksum': sec_checksum,
-            'parser_version': PARSER_VERSION
-        })
-        cursor = end
+    # Sections are yielded lazily; callers stream them to disk/index
+    sections = build_sections(norm, paras, year, title, digest, f"{PARSER_VERSION}+{backend}")
 
     return {
         'sha256': digest,
         'title': title,
         'year': year,
+        'backend': backend,
+        'boilerplate_lines': boilerplate['lines_removed'],
         'sections': sections
     }
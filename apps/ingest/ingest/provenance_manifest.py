@@ -6,12 +6,19 @@ from typing import List, Dict
 def write_manifest(out_dir: str, docs: List[Dict]):
     os.makedirs(out_dir, exist_ok=True)
     manifest_path = os.path.join(out_dir, 'letters_manifest.json')
-    items = [{
-        'year': d['year'],
-        'title': d['title'],
-        'sha256': d['sha256'],
-        'sections': len(d['sections'])
-    } for d in docs]
+    items = []
+    for d in docs:
+        item = {
+            'year': d['year'],
+            'title': d['title'],
+            'sha256': d['sha256'],
+            # Streaming callers pass a running count instead of the section list
+            'sections': d['sections'] if isinstance(d['sections'], int) else len(d['sections'])
+        }
+        for key in ('backend', 'boilerplate_lines', 'sections_digest'):
+            if d.get(key):
+                item[key] = d[key]
+        items.append(item)
     with open(manifest_path, 'w') as f:
         json.dump({'documents': items}, f, ensure_ascii=False, indent=2)
 
@@ -0,0 +1,415 @@
+"""Long-running ingest scheduler backed by a persisted SQLite job queue.
+
+Each refresh cycle enqueues a ``discover`` job; every stage's successors are
+enqueued in the same transaction that marks it done:
+
+    discover → fetch → parse (+ tag) → validate → index
+
+Topic tagging runs in memory inside ``parse``, before the single write.
+
+Jobs are keyed by ``(stage, key)`` and inserted with ``INSERT OR IGNORE``, so a
+letter whose bytes (sha256) and parser version have not changed never re-runs
+parse/validate/index. Failed jobs are retried with exponential backoff up to
+``--max-attempts`` and then parked as ``failed``; a ``PermanentJobError`` (such
+as a validation failure, which would fail the same way again) is parked at once.
+A ``running`` job is treated as abandoned, and claimed again, only once its
+lease (``--lease-timeout``) has expired, so concurrent daemons do not steal
+each other's in-flight work.
+
+Run:
+    python -m ingest.scheduler --seed ingest/seed/letters.seed.yaml --out ../../data/normalized
+    python -m ingest.scheduler --out ../../data/normalized --status
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+STAGES = ['discover', 'fetch', 'parse', 'validate', 'index']
+NEXT_STAGE = {
+    'parse': 'validate',
+    'validate': 'index',
+}
+
+# Seconds a claimed job may stay 'running' before another worker may reclaim it
+LEASE_TIMEOUT = 2 * 3600
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'scripts'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stage TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    UNIQUE(stage, key)
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs(status, not_before);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs(finished_at);
+"""
+
+
+class PermanentJobError(Exception):
+    """A failure that retrying cannot fix; the job is parked as failed immediately."""
+
+
+class JobQueue:
+    def __init__(self, path: str, lease_timeout: float = LEASE_TIMEOUT):
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, stage: str, key: str, payload: Dict) -> bool:
+        cur = self._conn().execute(
+            "INSERT OR IGNORE INTO jobs (stage, key, payload, created_at) VALUES (?, ?, ?, ?)",
+            (stage, key, json.dumps(payload, ensure_ascii=False), time.time()),
+        )
+        return cur.rowcount > 0
+
+    def claim(self) -> Optional[Dict]:
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Pending jobs, plus 'running' ones whose lease expired (their worker died)
+            row = conn.execute(
+                "SELECT id, stage, key, payload, attempts FROM jobs "
+                "WHERE (status = 'pending' AND not_before <= ?) OR (status = 'running' AND started_at < ?) "
+                "ORDER BY id LIMIT 1",
+                (now, now - self.lease_timeout),
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (now, row[0]))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return {'id': row[0], 'stage': row[1], 'key': row[2], 'payload': json.loads(row[3]), 'attempts': row[4]}
+
+    def complete(self, job_id: int, next_jobs: Iterable[tuple] = ()):
+        """Mark a job done and, in the same transaction, enqueue its ``(stage, key, payload)`` successors.
+
+        A single transaction means the queue never looks drained between the two,
+        and a crash cannot leave successors queued for a job that will run again.
+        """
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ?, last_error = NULL WHERE id = ?",
+                (time.time(), job_id),
+            )
+            for next_job in next_jobs:
+                self.enqueue(*next_job)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def fail(self, job: Dict, error: str, max_attempts: int, backoff: float, permanent: bool = False):
+        attempts = job['attempts'] + 1
+        if permanent or attempts >= max_attempts:
+            self._conn().execute(
+                "UPDATE jobs SET status = 'failed', attempts = ?, last_error = ?, finished_at = ? WHERE id = ?",
+                (attempts, error, time.time(), job['id']),
+            )
+        else:
+            self._conn().execute(
+                "UPDATE jobs SET status = 'pending', attempts = ?, last_error = ?, not_before = ? WHERE id = ?",
+                (attempts, error, time.time() + backoff * (2 ** (attempts - 1)), job['id']),
+            )
+
+    def metrics(self, window: float = 300.0) -> Dict:
+        conn = self._conn()
+        depth: Dict[str, Dict[str, int]] = {stage: {} for stage in STAGES}
+        for stage, status, n in conn.execute("SELECT stage, status, COUNT(*) FROM jobs GROUP BY stage, status"):
+            depth.setdefault(stage, {})[status] = n
+        since = time.time() - window
+        done = dict(conn.execute(
+            "SELECT stage, COUNT(*) FROM jobs WHERE status = 'done' AND finished_at >= ? GROUP BY stage",
+            (since,),
+        ).fetchall())
+        pending = sum(d.get('pending', 0) + d.get('running', 0) for d in depth.values())
+        return {
+            'queue_depth': pending,
+            'by_stage': depth,
+            'throughput_per_min': {stage: round(done.get(stage, 0) * 60.0 / window, 2) for stage in STAGES},
+            'window_sec': window,
+            'at': time.time(),
+        }
+
+
+def _load_script(name: str):
+    # scripts/ uses hyphenated filenames, so load them by path
+    path = os.path.join(SCRIPTS_DIR, name)
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_').replace('.py', ''), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Scheduler:
+    def __init__(self, args):
+        self.args = args
+        self.queue = JobQueue(args.db or os.path.join(args.out, 'scheduler.sqlite'), lease_timeout=args.lease_timeout)
+        self.raw_dir = os.path.join(args.out, 'raw')
+        self._tagger = None
+        self._validator = None
+        self._indexer = None
+        # Guards the lazily created tagger/validator/indexer shared by the worker threads
+        self._lazy_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # ---- stages -------------------------------------------------------
+    # Stages return the jobs to enqueue after them; ``None`` means the NEXT_STAGE
+    # successor with the same key and payload. Either way ``JobQueue.complete``
+    # enqueues them in the transaction that marks the job done.
+
+    def run_discover(self, payload: Dict) -> List[tuple]:
+        from .main import load_seed
+        items: List[Dict] = []
+        if self.args.index:
+            from .discover_letters import discover
+            items.extend(discover(self.args.index))
+        if self.args.seed:
+            items.extend(load_seed(self.args.seed))
+        cycle = payload['cycle']
+        # Fetch is re-run every cycle so changed upstream bytes are noticed
+        return [('fetch', f"{cycle}:{item['year']}:{item['url']}", {
+            'year': item['year'],
+            'url': item['url'],
+            'title': item.get('title', f"Berkshire Hathaway Shareholder Letter {item['year']}"),
+        }) for item in items]
+
+    def run_fetch(self, payload: Dict) -> List[tuple]:
+        from .parsers import kind_for, parser_version
+        url = payload['url']
+        kind = kind_for(url)
+        extra = {}
+        if kind == 'letters-pdf':
+            from .pdf_letters import fetch_pdf
+            data = fetch_pdf(url)
+            ext = 'pdf'
+        else:
+            from .html_letters import fetch_html_bytes
+            data, content_type = fetch_html_bytes(url)
+            ext = 'html'
+            # parse decodes the cached bytes with the same charset rules as a fresh fetch
+            if content_type:
+                extra['content_type'] = content_type
+        digest = hashlib.sha256(data).hexdigest()
+        os.makedirs(self.raw_dir, exist_ok=True)
+        raw_path = os.path.join(self.raw_dir, f"{digest}.{ext}")
+        if not os.path.exists(raw_path):
+            with open(raw_path, 'wb') as f:
+                f.write(data)
+        # Same bytes and parser version → same key → already-finished downstream work is skipped
+        key = f"{payload['year']}:{digest}:{parser_version(kind)}"
+        return [('parse', key, dict(payload, sha256=digest, raw=raw_path, **extra))]
+
+    def run_parse(self, payload: Dict):
+        from .alignment import align_year, save_redirects
+        from .changefeed import publish
+        from .shards import list_years, write_year
+        from .tagging import new_stats, tag_sections
+        from .parsers import parser_for
+        with open(payload['raw'], 'rb') as f:
+            data = f.read()
+        opts = {'content_type': payload['content_type']} if payload.get('content_type') else {}
+        doc = parser_for(payload['url'])(url=payload['url'], year=payload['year'], title=payload['title'],
+                                         data=data, **opts)
+        sections = doc['sections']
+        model = self._topic_model()
+        tag_stats = new_stats()
+        if model:
+            sections = tag_sections(sections, model, tag_stats)
+        change = {'changed': '*'}
+        aligned = None
+        if payload['year'] in list_years(self.args.out):
+            sections = list(sections)
+            aligned = align_year(self.args.out, payload['year'], sections, tagged=model is not None)
+            # Carried to the index stage so it only touches what changed
+            payload['changed'] = sorted(aligned['changed'])
+            payload['removed'] = aligned['removed']
+            change = {'changed': aligned['changed'], 'removed': aligned['removed']}
+        # Freshly parsed rows carry no previous tags; alignment knows which topics really changed
+        changed_topics = aligned['topics'] if aligned else tag_stats['changed_topics']
+        write_year(self.args.out, payload['year'], sections, compress=self.args.compress)
+        if aligned and aligned['redirects']:
+            save_redirects(self.args.out, payload['year'], aligned['redirects'])
+        publish(self.args.out, 'scheduler', [payload['year']], {payload['year']: change}, changed_topics)
+
+    def _topic_model(self):
+        with self._lazy_lock:
+            if self._tagger is None:
+                from .tagging import TopicModel
+                topics_file = self.args.topics or os.path.join(self.args.out, '..', 'topics.json')
+                self._tagger = TopicModel.load(topics_file) if os.path.exists(topics_file) else False
+        return self._tagger or None
+
+    def run_validate(self, payload: Dict):
+        from pathlib import Path
+        from .shards import year_path
+        with self._lazy_lock:
+            if self._validator is None:
+                self._validator = _load_script('validate-data.py')
+        path = Path(year_path(self.args.out, payload['year']))
+        if not path.exists():
+            print(f"[scheduler] Skipping validate for {payload['year']}: no letters_{payload['year']} file found")
+            return
+        result = self._validator.validate_letter_file(path)
+        if result['errors']:
+            # The same file fails the same way on every retry
+            raise PermanentJobError(f"{len(result['errors'])} validation errors, first: {result['errors'][0]}")
+
+    def run_index(self, payload: Dict):
+        from .main import refresh_metrics, tap_sections
+        from .shards import iter_sections
+        # Parse published a generation; one worker at a time builds its metrics store
+        with self._metrics_lock:
+            refresh_metrics(self.args.out)
+        if self.args.no_index or not self._get_indexer():
+            return
+        stats = {'sections': 0, 'digest': hashlib.sha256()}
+        only_ids = set(payload['changed']) if 'changed' in payload else None
+        for _ in tap_sections(iter_sections(self.args.out, payload['year']), self._indexer, stats, only_ids):
+            pass
+        if payload.get('removed'):
+            self._indexer.delete_sections(payload['removed'])
+
+    def _get_indexer(self):
+        """Connect to Typesense once; if it is down, finish index jobs files-only like ``ingest.main``."""
+        with self._lazy_lock:
+            if self._indexer is None:
+                try:
+                    from .index_typesense import indexer_from_env
+                    idx = indexer_from_env()
+                    idx.ensure_sections_collection()
+                    self._indexer = idx
+                    print("[scheduler] Typesense available — indexing enabled")
+                except Exception as e:
+                    self._indexer = False
+                    print(f"[warn] Typesense unavailable: {e}\n[warn] Proceeding without indexing (files only)")
+        return self._indexer or None
+
+    # ---- workers ------------------------------------------------------
+
+    def _run_job(self, job: Dict):
+        handler = getattr(self, f"run_{job['stage']}")
+        started = time.time()
+        try:
+            next_jobs = handler(job['payload'])
+        except Exception as e:
+            permanent = isinstance(e, PermanentJobError)
+            print(f"[scheduler] {job['stage']} {job['key']} failed (attempt {job['attempts'] + 1}"
+                  f"{', not retrying' if permanent else ''}): {e}")
+            self.queue.fail(job, str(e), self.args.max_attempts, self.args.retry_backoff, permanent=permanent)
+            return
+        if next_jobs is None:
+            nxt = NEXT_STAGE.get(job['stage'])
+            next_jobs = [(nxt, job['key'], job['payload'])] if nxt else []
+        self.queue.complete(job['id'], next_jobs)
+        print(f"[scheduler] {job['stage']} {job['key']} done in {time.time() - started:.2f}s")
+
+    def _worker(self):
+        while not self._stop.is_set():
+            job = self.queue.claim()
+            if job is None:
+                self._stop.wait(self.args.poll)
+                continue
+            self._run_job(job)
+
+    def _write_metrics(self):
+        metrics = self.queue.metrics()
+        path = os.path.join(self.args.out, 'scheduler_metrics.json')
+        with open(path, 'w') as f:
+            json.dump(metrics, f, indent=2)
+        return metrics
+
+    def serve(self):
+        workers = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.args.workers)]
+        for w in workers:
+            w.start()
+        print(f"[scheduler] Started {len(workers)} workers, refresh every {self.args.interval}s")
+        next_cycle = 0.0
+        try:
+            while True:
+                now = time.time()
+                if now >= next_cycle:
+                    cycle = int(now // self.args.interval)
+                    if self.queue.enqueue('discover', str(cycle), {'cycle': cycle}):
+                        print(f"[scheduler] Enqueued refresh cycle {cycle}")
+                    next_cycle = (cycle + 1) * self.args.interval
+                metrics = self._write_metrics()
+                print(f"[scheduler] queue_depth={metrics['queue_depth']} "
+                      f"throughput/min={json.dumps(metrics['throughput_per_min'])}")
+                if self.args.once and metrics['queue_depth'] == 0:
+                    break
+                time.sleep(self.args.metrics_interval)
+        except KeyboardInterrupt:
+            print("[scheduler] Stopping")
+        finally:
+            self._stop.set()
+            for w in workers:
+                w.join(timeout=5)
+            self._write_metrics()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scheduled ingest refresh daemon with a persisted job queue')
+    parser.add_argument('--seed', help='Path to letters seed YAML')
+    parser.add_argument('--index', help='Berkshire letters index URL (auto-discover)')
+    parser.add_argument('--out', default=os.path.join(os.getcwd(), 'data', 'normalized'), help='Output dir for normalized JSONL')
+    parser.add_argument('--db', help='Job queue SQLite path (default: <out>/scheduler.sqlite)')
+    parser.add_argument('--topics', help='Topics JSON for in-process tagging during parse (default: <out>/../topics.json)')
+    parser.add_argument('--compress', action='store_true', help='Write gzip shards instead of plain JSONL')
+    parser.add_argument('--no-index', action='store_true', help='Complete the index stage without pushing to Typesense')
+    parser.add_argument('--workers', type=int, default=4, help='Worker threads')
+    parser.add_argument('--interval', type=int, default=24 * 3600, help='Seconds between refresh cycles')
+    parser.add_argument('--max-attempts', type=int, default=5, help='Attempts before a job is marked failed')
+    parser.add_argument('--retry-backoff', type=float, default=30.0, help='Base retry delay in seconds (doubles per attempt)')
+    parser.add_argument('--lease-timeout', type=float, default=LEASE_TIMEOUT,
+                        help='Seconds before a running job whose worker vanished is claimed again')
+    parser.add_argument('--poll', type=float, default=1.0, help='Idle worker poll interval in seconds')
+    parser.add_argument('--metrics-interval', type=float, default=10.0, help='Seconds between metrics snapshots')
+    parser.add_argument('--once', action='store_true', help='Run a single refresh cycle and exit when the queue drains')
+    parser.add_argument('--status', action='store_true', help='Print queue metrics and exit')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    if args.status:
+        queue = JobQueue(args.db or os.path.join(args.out, 'scheduler.sqlite'))
+        print(json.dumps(queue.metrics(), indent=2))
+        return
+    if not args.seed and not args.index:
+        parser.error('--seed or --index is required')
+    Scheduler(args).serve()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,501 @@
+"""Warm local search service over the normalized corpus.
+
+Loads every year file (plain JSONL or gzip shard) and ``topics.json`` once,
+builds an in-memory token index, and answers over HTTP:
+
+    GET  /health
+    GET  /search?q=&year=&topic=&limit=20
+    GET  /sections/{year}/{anchor}                      (follows letters_{year}.redirects.json)
+    GET  /topics
+    GET  /topics/{slug}?year=&limit=50&offset=0&min_score=0.5
+    GET  /suggest?q=&k=10                                 (needs autocomplete.json)
+    GET  /trends/terms/{term}, /trends/topics/{id}        (needs ingest.trends build)
+    GET  /trends/rising?since=&until=&k=20, /trends/related/{term}?years=1990-1999&k=20
+    GET  /metrics, /metrics/{metric}?from=&to=&all=0      (needs ingest.metrics build)
+    GET|POST /collections/sections/documents/search   (Typesense-compatible subset)
+
+The last route accepts the same ``q``/``filter_by``/``facet_by``/``per_page``
+body the web API routes send to Typesense, including the ``topics`` and
+``topic_confidence`` filters and facets. Pointing ``NEXT_PUBLIC_TYPESENSE_PORT``
+at this service makes it a drop-in local stand-in.
+
+Results are cached in an LRU keyed by corpus version, not wall-clock TTL:
+entries stay valid until the files on disk change, and a background watcher
+reloads the corpus (and thereby retires old cache keys) when they do.
+
+Run:
+    python -m ingest.search_service --data ../../data/normalized --port 8108
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .alignment import load_redirects, resolve_anchor
+from .sections import Section
+from .shards import corpus_version, iter_sections, list_years
+from .snippets import best_snippet
+from .tagging import index_fields
+from .text import tokenize
+
+
+class Corpus:
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.version = corpus_version(data_dir)
+        self.sections: List[Section] = []
+        self.by_anchor: Dict[Tuple[int, str], Section] = {}
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        self.topics: List[Dict] = []
+        self.redirects: Dict[int, Dict] = {}
+        self._load()
+
+    def _load(self):
+        t0 = time.perf_counter()
+        # Newest first, matching the web fallback's default ordering
+        for year in reversed(list_years(self.data_dir)):
+            for row in iter_sections(self.data_dir, year):
+                s = Section.from_dict(row)
+                idx = len(self.sections)
+                self.sections.append(s)
+                self.by_anchor[(int(s['year']), s['anchor'])] = s
+                for tok in set(tokenize(s.get('text', ''))):
+                    self.postings[tok].append(idx)
+            table = load_redirects(self.data_dir, year)
+            if table['redirects']:
+                self.redirects[year] = table['redirects']
+        self.postings = dict(self.postings)
+        topics_path = os.path.join(self.data_dir, '..', 'topics.json')
+        if os.path.exists(topics_path):
+            with open(topics_path, 'r', encoding='utf-8') as f:
+                self.topics = json.load(f).get('topics', [])
+        print(f"[search] Loaded {len(self.sections)} sections, {len(self.postings)} terms "
+              f"(version {self.version}) in {time.perf_counter() - t0:.2f}s")
+
+    def _candidates(self, words: List[str]) -> Dict[int, int]:
+        found: Dict[int, int] = defaultdict(int)
+        for w in set(words):
+            for idx in self.postings.get(w, ()):
+                found[idx] += 1
+        return found
+
+    def search(self, q: str, year: Optional[int] = None, topic: Optional[str] = None,
+               source: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """Rank sections with the same heuristics as the web JSONL fallback."""
+        ranked, words = self.rank(q, year, topic, source)
+        return [self.document(idx, words) for idx in ranked[:limit]]
+
+    def rank(self, q: str, year: Optional[int] = None, topic: Optional[str] = None,
+             source: Optional[str] = None) -> Tuple[List[int], List[str]]:
+        """Indexes of every matching section in rank order, plus the query words."""
+        q = q.strip()
+        ql = q.lower()
+        words = tokenize(q)
+        if q in ('', '*'):
+            pool = ((i, 0) for i in range(len(self.sections)))
+        elif not words:
+            pool = ((i, 0) for i, s in enumerate(self.sections) if ql in s['text'].lower())
+        else:
+            # All words, or at least 70% of them for longer queries
+            need = -(-len(set(words)) * 7 // 10)
+            pool = ((i, n) for i, n in self._candidates(words).items() if n >= need)
+
+        results = []
+        for idx, found in pool:
+            s = self.sections[idx]
+            if year is not None and int(s['year']) != year:
+                continue
+            if source and s.get('source') != source:
+                continue
+            if topic and not self._has_topic(s, topic):
+                continue
+            score = self._score(s, ql, words, found)
+            results.append((score, int(s['year']), idx))
+        # Ties (and browse queries, where every score is 0) keep newest-year,
+        # document order: sections were loaded newest year first, in anchor order
+        results.sort(key=lambda r: (-r[0], -r[1], r[2]))
+        return [idx for _, _, idx in results], words
+
+    def document(self, idx: int, words: List[str]) -> Dict:
+        doc = self.sections[idx].to_dict()
+        if words:
+            # Sliced from the stored sentence offsets, no re-splitting per request
+            doc['snippet'] = best_snippet(self.sections[idx], words)
+        return doc
+
+    @staticmethod
+    def _has_topic(s: Section, topic: str) -> bool:
+        tl = topic.lower()
+        return any(t.get('topic_id') == topic or tl in t.get('topic_name', '').lower()
+                   for t in (s.get('topics') or []))
+
+    @staticmethod
+    def _score(s: Section, ql: str, words: List[str], found: int) -> float:
+        if not words:
+            return 0.0 if ql in ('', '*') else 10.0
+        text = s['text'].lower()
+        if found < len(set(words)):
+            return found * 2.0
+        score = found * 5.0
+        if ql in text:
+            score += 20
+        first = text.find(words[0])
+        if 0 <= first < 50:
+            score += 10
+        elif 0 <= first < 200:
+            score += 5
+        score += sum(text.count(w) for w in set(words))
+        if len(text) < 500:
+            score += 3
+        return score
+
+    def section(self, year: int, anchor: str) -> Optional[Dict]:
+        s = self.by_anchor.get((year, anchor))
+        if s is None and year in self.redirects:
+            # Anchor retired by a parser change: serve the section it now lives in
+            target = resolve_anchor(self.redirects[year], anchor)
+            s = self.by_anchor.get((year, target)) if target else None
+            if s is not None:
+                return dict(s.to_dict(), redirected_from=anchor)
+        return s.to_dict() if s else None
+
+    def topic_sections(self, slug: str, year: Optional[int] = None, min_score: float = 0.5,
+                       limit: int = 50, offset: int = 0) -> Optional[Dict]:
+        topic = next((t for t in self.topics if t.get('slug') == slug or t.get('id') == slug), None)
+        if topic is None:
+            return None
+        scored = []
+        for s in self.sections:
+            if year is not None and int(s['year']) != year:
+                continue
+            for t in s.get('topics') or []:
+                if t.get('topic_id') == topic['id'] and t.get('score', 0) >= min_score:
+                    scored.append((t['score'], int(s['year']), s))
+                    break
+        scored.sort(key=lambda r: (-r[0], -r[1]))
+        return {
+            'topic': topic,
+            'total': len(scored),
+            'sections': [s.to_dict() for _, _, s in scored[offset:offset + limit]],
+        }
+
+
+class LRUCache:
+    def __init__(self, capacity: int = 2048):
+        self.capacity = capacity
+        self.data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key in self.data:
+            self.data.move_to_end(key)
+            self.hits += 1
+            return self.data[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        while len(self.data) > self.capacity:
+            self.data.popitem(last=False)
+
+    def clear(self):
+        self.data.clear()
+
+
+def parse_filter_by(expr: str) -> Dict[str, str]:
+    """Parse the ``field:=value && field:value`` subset of Typesense filter_by."""
+    out = {}
+    for clause in (expr or '').split('&&'):
+        clause = clause.strip()
+        if not clause or ':' not in clause:
+            continue
+        field, value = clause.split(':', 1)
+        value = value.lstrip('=').strip().strip('[]').strip('`')
+        out[field.strip()] = value
+    return out
+
+
+def facet_counts(docs: List[Dict], fields: Tuple[str, ...]) -> List[Dict]:
+    """Typesense-style ``facet_counts`` for the indexed topic fields of ``docs``."""
+    counters = {f: Counter() for f in fields}
+    for d in docs:
+        indexed = index_fields(d.get('topics'))
+        for f, counter in counters.items():
+            value = indexed[f] if f in indexed else d.get(f)
+            counter.update(value if isinstance(value, list) else [] if value is None else [str(value)])
+    return [{'field_name': f, 'counts': [{'value': v, 'count': n} for v, n in c.most_common()]}
+            for f, c in counters.items()]
+
+
+class SearchService:
+    def __init__(self, data_dir: str, cache_size: int = 2048):
+        self.data_dir = data_dir
+        self.corpus = Corpus(data_dir)
+        self.autocomplete = self._load_autocomplete()
+        self.trends = self._load_trends()
+        self.metrics = self._load_metrics()
+        self.cache = LRUCache(cache_size)
+        self.started = time.time()
+        self.requests = 0
+
+    def _load_autocomplete(self):
+        from .autocomplete import Autocomplete
+        path = os.path.join(self.data_dir, '..', 'autocomplete.json')
+        if not os.path.exists(path):
+            return None
+        return Autocomplete.load(path)
+
+    def _load_trends(self):
+        root = os.path.join(self.data_dir, '..', 'trends')
+        if not os.path.exists(os.path.join(root, 'latest.json')):
+            return None
+        try:
+            from .trends import TrendIndex
+        except ImportError:  # numpy not installed
+            return None
+        return TrendIndex.load(root)
+
+    def _load_metrics(self):
+        root = os.path.join(self.data_dir, '..', 'metrics')
+        if not os.path.exists(os.path.join(root, 'latest.json')):
+            return None
+        try:
+            from .metrics import MetricsStore
+        except ImportError:  # numpy not installed
+            return None
+        return MetricsStore.load(root)
+
+    def cached(self, key: Tuple, compute):
+        # Corpus version is part of the key: a reload invalidates by construction
+        full_key = (self.corpus.version,) + key
+        value = self.cache.get(full_key)
+        if value is not None:
+            return value, True
+        value = compute()
+        self.cache.put(full_key, value)
+        return value, False
+
+    async def watch(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            version = corpus_version(self.data_dir)
+            if version != self.corpus.version:
+                print(f"[search] Corpus changed ({self.corpus.version} → {version}), reloading")
+                self.corpus = await asyncio.get_running_loop().run_in_executor(None, Corpus, self.data_dir)
+                self.autocomplete = self._load_autocomplete()
+                self.trends = self._load_trends()
+                self.metrics = self._load_metrics()
+                self.cache.clear()
+
+    # ---- routing ------------------------------------------------------
+
+    def route(self, method: str, path: str, query: Dict[str, str], body: bytes) -> Tuple[int, Dict, bool]:
+        c = self.corpus
+        parts = [unquote(p) for p in path.strip('/').split('/') if p]
+        if parts == ['health']:
+            return 200, {
+                'ok': True,
+                'version': c.version,
+                'sections': len(c.sections),
+                'uptime_sec': round(time.time() - self.started, 1),
+                'requests': self.requests,
+                'cache': {'size': len(self.cache.data), 'hits': self.cache.hits, 'misses': self.cache.misses},
+            }, False
+        if parts == ['search']:
+            year = int(query['year']) if query.get('year') else None
+            limit = int(query.get('limit', 20))
+            hits, hit = self.cached(('search', query.get('q', ''), year, query.get('topic'), limit),
+                                    lambda: c.search(query.get('q', ''), year, query.get('topic'), 'letters', limit))
+            return 200, {'hits': hits}, hit
+        if len(parts) == 3 and parts[0] == 'sections':
+            doc = c.section(int(parts[1]), parts[2])
+            if doc is None:
+                return 404, {'error': 'section_not_found'}, False
+            return 200, doc, False
+        if parts == ['suggest']:
+            if self.autocomplete is None:
+                return 404, {'error': 'autocomplete_index_missing'}, False
+            return 200, self.autocomplete.suggest(query.get('q', ''), int(query.get('k', 10))), False
+        if parts and parts[0] == 'trends':
+            return self._trends(parts[1:], query)
+        if parts and parts[0] == 'metrics':
+            return self._metrics(parts[1:], query)
+        if parts == ['topics']:
+            return 200, {'topics': c.topics}, False
+        if len(parts) == 2 and parts[0] == 'topics':
+            year = int(query['year']) if query.get('year') else None
+            args = (parts[1], year, float(query.get('min_score', 0.5)),
+                    int(query.get('limit', 50)), int(query.get('offset', 0)))
+            result, hit = self.cached(('topic',) + args, lambda: c.topic_sections(*args))
+            if result is None:
+                return 404, {'error': 'Topic not found'}, False
+            return 200, result, hit
+        if parts == ['collections', 'sections', 'documents', 'search']:
+            params = dict(query)
+            if method == 'POST' and body:
+                params.update(json.loads(body))
+            return self._typesense_search(params)
+        return 404, {'error': 'not_found'}, False
+
+    def _trends(self, parts: List[str], query: Dict[str, str]) -> Tuple[int, Dict, bool]:
+        from .trends import parse_year_range
+        t = self.trends
+        if t is None:
+            return 404, {'error': 'trends_index_missing'}, False
+        k = int(query.get('k', 20))
+        if len(parts) == 2 and parts[0] == 'terms':
+            result = t.term_series(parts[1])
+        elif len(parts) == 2 and parts[0] == 'topics':
+            result = t.topic_series(parts[1])
+        elif len(parts) == 2 and parts[0] == 'related':
+            result = t.related_terms(parts[1], k, parse_year_range(query.get('years')))
+            result = None if result is None else {'term': parts[1], 'related': result}
+        elif parts == ['rising'] and query.get('since'):
+            since = int(query['since'])
+            until = int(query.get('until') or t.years[-1])
+            result = {'since': since, 'until': until,
+                      'terms': t.rising_terms((t.years[0], since - 1), (since, until), k)}
+        else:
+            return 404, {'error': 'not_found'}, False
+        if result is None:
+            return 404, {'error': 'unknown_term_or_topic'}, False
+        result['version'] = t.version
+        return 200, result, False
+
+    def _metrics(self, parts: List[str], query: Dict[str, str]) -> Tuple[int, Dict, bool]:
+        m = self.metrics
+        if m is None:
+            return 404, {'error': 'metrics_store_missing'}, False
+        if not parts:
+            return 200, {'metrics': m.strings['units'], 'version': m.version}, False
+        if len(parts) != 1 or parts[0] not in m.metrics:
+            return 404, {'error': 'unknown_metric'}, False
+        start = int(query['from']) if query.get('from') else None
+        end = int(query['to']) if query.get('to') else None
+        facts = m.series(parts[0], start, end, query.get('all') in ('1', 'true'))
+        return 200, {'metric': parts[0], 'facts': facts, 'version': m.version}, False
+
+    def _typesense_search(self, params: Dict) -> Tuple[int, Dict, bool]:
+        t0 = time.perf_counter()
+        filters = parse_filter_by(params.get('filter_by', ''))
+        year = int(filters['year']) if filters.get('year') else None
+        per_page = int(params.get('per_page', 10))
+        page = max(int(params.get('page', 1)), 1)
+        q = params.get('q', '*')
+        topic = filters.get('topics')
+        confidence = filters.get('topic_confidence')
+        facet_by = tuple(f.strip() for f in params.get('facet_by', '').split(',') if f.strip())
+        key = ('ts', q, year, filters.get('source'), topic, confidence, facet_by, per_page, page)
+        limit = per_page * page
+
+        def compute():
+            c = self.corpus
+            ranked, words = c.rank(q, year, topic, filters.get('source'))
+            if confidence:
+                ranked = [i for i in ranked
+                          if index_fields(c.sections[i].get('topics')).get('topic_confidence') == confidence]
+            docs = [c.document(i, words) for i in ranked[per_page * (page - 1):limit]]
+            # Found and facets cover every match, not just this page
+            return docs, len(ranked), facet_counts([c.sections[i] for i in ranked], facet_by)
+
+        (docs, found, facets), hit = self.cached(key, compute)
+        result = {
+            'found': found,
+            'page': page,
+            'out_of': len(self.corpus.sections),
+            'search_time_ms': int((time.perf_counter() - t0) * 1000),
+            'hits': [{'document': d} for d in docs],
+        }
+        if facet_by:
+            result['facet_counts'] = facets
+        return 200, result, hit
+
+    # ---- HTTP ---------------------------------------------------------
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = b''
+                if headers.get('content-length'):
+                    body = await reader.readexactly(int(headers['content-length']))
+
+                self.requests += 1
+                url = urlsplit(target)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                try:
+                    status, payload, hit = self.route(method.upper(), url.path, query, body)
+                except (ValueError, KeyError) as e:
+                    status, payload, hit = 400, {'error': f'bad_request: {e}'}, False
+                except Exception as e:
+                    status, payload, hit = 500, {'error': str(e)}, False
+
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}[status]
+                writer.write(
+                    f"HTTP/1.1 {status} {reason}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"X-Cache: {'HIT' if hit else 'MISS'}\r\n"
+                    f"X-Corpus-Version: {self.corpus.version}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(args):
+    service = SearchService(args.data, cache_size=args.cache_size)
+    server = await asyncio.start_server(service.handle, args.host, args.port)
+    print(f"[search] Listening on http://{args.host}:{args.port}")
+    watcher = asyncio.create_task(service.watch(args.reload_interval))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm local search service over normalized sections')
+    parser.add_argument('--data', default=os.path.join(os.getcwd(), 'data', 'normalized'), help='Normalized JSONL dir')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8108, help='Default matches Typesense so the web app can use it as a stand-in')
+    parser.add_argument('--cache-size', type=int, default=2048, help='LRU result cache entries')
+    parser.add_argument('--reload-interval', type=float, default=5.0, help='Seconds between corpus change checks')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("[search] Stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+import gzip
+import hashlib
+import json
+import re
+import sys
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+def sha256_bytes(b: bytes) -> str:
+    h = hashlib.sha256()
+    h.update(b)
+    return h.hexdigest()
+
+
+def build_sections(text: str, paras: Iterable[str], year: int, title: str, digest: str,
+                   parser_version: str, source: str = 'letters') -> Iterator[Dict]:
+    """Yield section dicts for ``paras`` one at a time, locating each in ``text``.
+
+    Anchors are ordinal (``¶1``, ``¶2``...) and ``char_start``/``char_end`` are
+    offsets into the normalized document text. Sentence offsets and
+    quotability features come from ``snippets.sentence_fields``.
+    """
+    from .snippets import sentence_fields
+    cursor = 0
+    for i, p in enumerate(paras, start=1):
+        start = text.find(p, cursor)
+        if start == -1:
+            start = cursor
+        end = start + len(p)
+        yield {
+            'id': f"{year}-¶{i}",
+            'document_id': year,  # temporary stand-in id by year
+            'title': title,
+            'year': year,
+            'source': source,
+            'anchor': f"¶{i}",
+            'page_no': None,
+            'text': p,
+            'char_start': start,
+            'char_end': end,
+            'doc_sha256': digest,
+            'section_checksum': sha256_bytes(p.encode('utf-8')),
+            'parser_version': parser_version,
+            **sentence_fields(p),
+        }
+        cursor = end
+
+
+# Candidate sentence end: terminal punctuation (plus closing quotes/brackets),
+# whitespace, then something that can start a sentence
+_SENTENCE_END_RE = re.compile(r'[.!?]["\'”’)\]]*\s+(?=["“‘(\[]?[A-Z0-9$])')
+_ABBREVIATIONS = frozenset((
+    'mr', 'mrs', 'ms', 'dr', 'st', 'jr', 'sr', 'inc', 'co', 'corp', 'ltd', 'bros',
+    'vs', 'etc', 'no', 'e.g', 'i.e', 'u.s', 'u.k', 'jan', 'feb', 'mar', 'apr',
+    'aug', 'sept', 'oct', 'nov', 'dec',
+))
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """``(start, end)`` offsets of the sentences in ``text``.
+
+    ``text[start:end]`` is the sentence with surrounding whitespace trimmed.
+    Abbreviations ("Mr.", "U.S.", "Inc.") and single initials ("W. Buffett")
+    do not end a sentence.
+    """
+    spans = []
+    start = 0
+    for m in _SENTENCE_END_RE.finditer(text):
+        if text[m.start()] == '.':
+            tail = text[max(0, m.start() - 12):m.start()].split()
+            word = tail[-1].lstrip('("“‘[').lower() if tail else ''
+            if word in _ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+                continue
+        end = m.start() + len(m.group().rstrip())
+        spans.append((start, end))
+        start = m.end()
+    if text[start:].strip():
+        spans.append((start, len(text.rstrip())))
+    out = []
+    for a, b in spans:
+        # Trim leading whitespace so the span is exactly the sentence
+        while a < b and text[a].isspace():
+            a += 1
+        if a < b:
+            out.append((a, b))
+    return out
+
+
+# Canonical JSONL key order for a section row
+FIELDS = (
+    'id', 'document_id', 'title', 'year', 'source', 'anchor', 'page_no', 'text',
+    'char_start', 'char_end', 'doc_sha256', 'section_checksum', 'parser_version',
+    'sentences', 'quote_span', 'quote_score',
+)
+# Values repeated on every row of a document (or across the corpus) are interned
+_INTERNED = ('title', 'source', 'anchor', 'doc_sha256', 'parser_version')
+
+
+class Section:
+    """Compact section record that round-trips to the JSONL schema.
+
+    Uses ``__slots__`` instead of a per-row dict, and interns the strings that
+    repeat on every row (title, source, doc sha256, parser version), so a
+    whole-corpus load holds one copy of each. Fields absent from the source row
+    stay unset, and keys outside the schema (e.g. ``topics``) are kept in
+    ``extra`` so nothing is lost on write.
+
+    Supports the dict access the scripts rely on (``get``, ``[]``, ``in``).
+    """
+
+    __slots__ = FIELDS + ('extra',)
+
+    def __init__(self, **kwargs):
+        self.extra = None
+        for key, value in kwargs.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> 'Section':
+        return cls(**d)
+
+    def to_dict(self) -> Dict:
+        out = {}
+        for key in FIELDS:
+            try:
+                out[key] = getattr(self, key)
+            except AttributeError:
+                continue
+        if self.extra:
+            out.update(self.extra)
+        return out
+
+    def __getitem__(self, key: str):
+        if key in FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        if key in FIELDS:
+            if key in _INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        if key in FIELDS:
+            return hasattr(self, key)
+        return bool(self.extra) and key in self.extra
+
+    def pop(self, key: str, default=None):
+        value = self.get(key, default)
+        if key in FIELDS:
+            if hasattr(self, key):
+                delattr(self, key)
+        elif self.extra:
+            self.extra.pop(key, None)
+        return value
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self) -> str:
+        return f"Section({self.get('id')!r})"
+
+
+def load_sections(path: str) -> Iterator[Section]:
+    """Yield ``Section`` records from a JSONL (or gzip shard) file."""
+    opener = gzip.open(path, 'rt', encoding='utf-8') if path.endswith('.gz') else open(path, 'r', encoding='utf-8')
+    with opener as f:
+        for line in f:
+            if line.strip():
+                yield Section.from_dict(json.loads(line))
+
+
+def write_sections(path: str, sections: Iterable) -> int:
+    """Write ``Section`` records (or plain dicts) back to JSONL; returns the row count."""
+    n = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for s in sections:
+            row = s.to_dict() if isinstance(s, Section) else s
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            n += 1
+    return n
@@ -0,0 +1,255 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+# Sections per gzip member. Each member is an independently decodable block,
+# so a point lookup only inflates one small block instead of the whole year.
+BLOCK_SECTIONS = 16
+INDEX_VERSION = 2
+# Built versions kept by publish_versioned_dir (current plus one for readers mid-swap)
+KEEP_VERSIONS = 2
+
+_YEAR_FILE_RE = re.compile(r'^letters_(\d{4})\.jsonl(?:\.gz)?$')
+
+
+def jsonl_path(out_dir: str, year: int) -> str:
+    return os.path.join(out_dir, f"letters_{year}.jsonl")
+
+
+def shard_path(out_dir: str, year: int) -> str:
+    return os.path.join(out_dir, f"letters_{year}.jsonl.gz")
+
+
+def index_path(out_dir: str, year: int) -> str:
+    return os.path.join(out_dir, f"letters_{year}.idx.json")
+
+
+def redirects_path(out_dir: str, year: int) -> str:
+    return os.path.join(out_dir, f"letters_{year}.redirects.json")
+
+
+def list_years(out_dir: str) -> List[int]:
+    """Years with a data file on disk, in either layout."""
+    if not os.path.isdir(out_dir):
+        return []
+    years = set()
+    for name in os.listdir(out_dir):
+        m = _YEAR_FILE_RE.match(name)
+        if m:
+            years.add(int(m.group(1)))
+    return sorted(years)
+
+
+def corpus_version(data_dir: str) -> str:
+    """Fingerprint of the corpus: generation number (or year files) plus topics.json.
+
+    When producers publish a corpus generation (see ``changefeed``), the version
+    is derived from the generation number alone, not the file's stat: validation
+    rewrites that file without changing data and must not change the version.
+    Without a generation every year file is stat'ed.
+    """
+    from .changefeed import generation_path, read_generation
+    h = hashlib.sha256()
+    topics_path = os.path.join(data_dir, '..', 'topics.json')
+    paths = [topics_path]
+    if os.path.exists(generation_path(data_dir)):
+        h.update(f"generation:{read_generation(data_dir)};".encode())
+    elif os.path.isdir(data_dir):
+        paths = [os.path.join(data_dir, n) for n in sorted(os.listdir(data_dir)) if n.startswith('letters_')] + paths
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        h.update(f"{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()[:16]
+
+
+def _encode_block(lines: List[str]) -> bytes:
+    # mtime=0 keeps the output byte-identical across runs for the same input
+    return gzip.compress(''.join(lines).encode('utf-8'), mtime=0)
+
+
+def write_shard(out_dir: str, year: int, sections: Iterable[Dict]) -> Dict:
+    """Write sections as a multi-member gzip file plus an anchor/id → block index.
+
+    Concatenated gzip members form a valid gzip stream, so the shard can still be
+    read end-to-end with any gzip reader (``zcat``, ``gzip.open``, ``zlib.gunzipSync``).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    gz_path = shard_path(out_dir, year)
+    blocks: List[List[int]] = []
+    anchors: Dict[str, List[int]] = {}
+    ids: Dict[str, List[int]] = {}
+    pending: List[str] = []
+    count = 0
+
+    tmp_path = gz_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        def flush():
+            payload = _encode_block(pending)
+            blocks.append([f.tell(), len(payload)])
+            f.write(payload)
+            pending.clear()
+
+        for s in sections:
+            pos = [len(blocks), len(pending)]
+            anchors[s['anchor']] = pos
+            ids[s['id']] = pos
+            pending.append(json.dumps(s, ensure_ascii=False) + "\n")
+            count += 1
+            if len(pending) >= BLOCK_SECTIONS:
+                flush()
+        if pending:
+            flush()
+        size = f.tell()
+
+    index = {
+        'version': INDEX_VERSION,
+        'year': year,
+        'file': os.path.basename(gz_path),
+        'bytes': size,
+        'sections': count,
+        'blocks': blocks,
+        'anchors': anchors,
+        'ids': ids,
+    }
+    idx_path = index_path(out_dir, year)
+    with open(idx_path + '.tmp', 'w') as f:
+        json.dump(index, f, ensure_ascii=False)
+    # Both files are complete before either is swapped in; the index goes last,
+    # and readers check its byte count against the shard (see index_matches)
+    os.replace(tmp_path, gz_path)
+    os.replace(idx_path + '.tmp', idx_path)
+    return index
+
+
+def load_index(out_dir: str, year: int) -> Optional[Dict]:
+    path = index_path(out_dir, year)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def index_matches(out_dir: str, year: int, index: Dict) -> bool:
+    """False when the shard on disk is not the one ``index`` was built for."""
+    try:
+        return os.path.getsize(shard_path(out_dir, year)) == index.get('bytes', -1)
+    except OSError:
+        return False
+
+
+def read_block(out_dir: str, year: int, index: Dict, block_no: int) -> List[str]:
+    offset, length = index['blocks'][block_no]
+    with open(shard_path(out_dir, year), 'rb') as f:
+        f.seek(offset)
+        payload = f.read(length)
+    return gzip.decompress(payload).decode('utf-8').splitlines()
+
+
+def read_section(out_dir: str, year: int, key: str, index: Optional[Dict] = None) -> Optional[Dict]:
+    """Fetch one section by anchor (``¶12``) or id (``2023-¶12``) with a single seek."""
+    index = index or load_index(out_dir, year)
+    if index is not None and not index_matches(out_dir, year, index):
+        # Stale index (or one from before byte counts were recorded): reload it once
+        index = load_index(out_dir, year)
+        if index is not None and not index_matches(out_dir, year, index):
+            index = None
+    if index is None:
+        # Plain JSONL year file, or an index mid-swap: fall back to a linear scan
+        for s in iter_sections(out_dir, year):
+            if s.get('anchor') == key or s.get('id') == key:
+                return s
+        return None
+    pos = index['anchors'].get(key) or index['ids'].get(key)
+    if pos is None:
+        return None
+    block_no, line_no = pos
+    return json.loads(read_block(out_dir, year, index, block_no)[line_no])
+
+
+def write_year(out_dir: str, year: int, sections: Iterable[Dict], compress: bool = False) -> str:
+    """Write a year's sections in the requested layout and return the data file path."""
+    if compress:
+        index = write_shard(out_dir, year, sections)
+        out_path = os.path.join(out_dir, index['file'])
+    else:
+        os.makedirs(out_dir, exist_ok=True)
+        out_path = jsonl_path(out_dir, year)
+        # Sections may be a lazy stream; only swap the file in once it is complete
+        tmp_path = out_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            for s in sections:
+                f.write(json.dumps(s, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, out_path)
+    remove_stale(out_dir, year, compressed=compress)
+    return out_path
+
+
+def year_path(out_dir: str, year: int) -> str:
+    """The year's data file in whichever layout is on disk (plain JSONL wins)."""
+    path = jsonl_path(out_dir, year)
+    return path if os.path.exists(path) else shard_path(out_dir, year)
+
+
+def open_year(out_dir: str, year: int):
+    """Text-mode handle on the year's data file, inflating a gzip shard."""
+    path = year_path(out_dir, year)
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def iter_sections(out_dir: str, year: int) -> Iterator[Dict]:
+    """Yield all sections for a year from whichever file layout is on disk."""
+    with open_year(out_dir, year) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def remove_stale(out_dir: str, year: int, compressed: bool):
+    """Drop the other layout for a year so readers never see two versions."""
+    stale = [jsonl_path(out_dir, year)] if compressed else [shard_path(out_dir, year), index_path(out_dir, year)]
+    for path in stale:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def publish_versioned_dir(out_root: str, version: str, write_fn: Callable[[str], None],
+                          latest: Optional[Dict] = None, keep: int = KEEP_VERSIONS) -> str:
+    """Publish a derived artifact as ``<out_root>/<version>/`` and return that dir.
+
+    ``write_fn`` fills a scratch dir, which is then swapped in, so readers never
+    see a partial version. ``<out_root>/latest.json`` (``{"version": ...,
+    "built_at": ..., **latest}``) is replaced atomically afterwards, and all but
+    the newest ``keep`` versions are removed.
+    """
+    vdir = os.path.join(out_root, version)
+    tmp_dir = vdir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    write_fn(tmp_dir)
+    shutil.rmtree(vdir, ignore_errors=True)
+    os.replace(tmp_dir, vdir)
+    latest_path = os.path.join(out_root, 'latest.json')
+    with open(latest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'built_at': time.time(), **(latest or {})}, f, ensure_ascii=False, indent=2)
+    os.replace(latest_path + '.tmp', latest_path)
+    prune_versions(out_root, keep)
+    return vdir
+
+
+def prune_versions(out_root: str, keep: int = KEEP_VERSIONS):
+    """Remove all but the ``keep`` most recently built version dirs."""
+    dirs = [os.path.join(out_root, d) for d in os.listdir(out_root)
+            if os.path.isdir(os.path.join(out_root, d)) and not d.endswith('.tmp')]
+    dirs.sort(key=os.path.getmtime, reverse=True)
+    for d in dirs[keep:]:
+        shutil.rmtree(d, ignore_errors=True)
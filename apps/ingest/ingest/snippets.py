@@ -0,0 +1,167 @@
+"""Sentence offsets and quotability features, computed once at ingest.
+
+Every section row carries:
+
+    "sentences":   [[start, end, words, flags], ...]   offsets into ``text``
+    "quote_span":  [start, end]                          best quotable window
+    "quote_score": 0.0 .. 1.0
+
+``flags`` is a bit set of ``HAS_NUMBER``, ``FIRST_PERSON`` and ``COMPLETE``
+(ends in terminal punctuation). ``quote_span`` covers one sentence, or two
+adjacent sentences when together they read better and fit in
+``QUOTE_MAX_CHARS``.
+
+Search snippets, highlights and quote cards slice ``text`` with these offsets
+instead of re-splitting sentences per request.
+
+Backfill existing files:  python -m ingest.snippets --data ../../data/normalized
+"""
+
+import argparse
+import os
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .sections import sentence_spans
+
+HAS_NUMBER = 1
+FIRST_PERSON = 2
+COMPLETE = 4
+
+QUOTE_MIN_WORDS = 8
+QUOTE_MAX_WORDS = 45
+QUOTE_MAX_CHARS = 280
+
+_NUMBER_RE = re.compile(r'\d|%|\$')
+_FIRST_PERSON_RE = re.compile(r"\b(?:i|i'm|i've|i'd|me|my|we|we're|we've|our|us|charlie and i)\b", re.I)
+_WORD_RE = re.compile(r'\w+')
+
+
+def sentence_index(text: str) -> List[List[int]]:
+    """``[start, end, words, flags]`` for each sentence of ``text``."""
+    out = []
+    for start, end in sentence_spans(text):
+        sentence = text[start:end]
+        flags = 0
+        if _NUMBER_RE.search(sentence):
+            flags |= HAS_NUMBER
+        if _FIRST_PERSON_RE.search(sentence):
+            flags |= FIRST_PERSON
+        if sentence.rstrip('"\'”’)]').endswith(('.', '!', '?')):
+            flags |= COMPLETE
+        out.append([start, end, len(_WORD_RE.findall(sentence)), flags])
+    return out
+
+
+def quote_score(words: int, flags: int) -> float:
+    """Quotability of a sentence (or window) in [0, 1].
+
+    Short complete statements in the author's voice score high; figures and
+    fragments score low.
+    """
+    if words < QUOTE_MIN_WORDS:
+        length = words / QUOTE_MIN_WORDS * 0.5
+    elif words <= QUOTE_MAX_WORDS:
+        length = 1.0
+    else:
+        length = max(0.0, 1.0 - (words - QUOTE_MAX_WORDS) / QUOTE_MAX_WORDS)
+    score = 0.5 * length
+    if flags & COMPLETE:
+        score += 0.2
+    if flags & FIRST_PERSON:
+        score += 0.2
+    if not flags & HAS_NUMBER:
+        score += 0.1
+    return round(score, 3)
+
+
+def best_quote(sentences: Sequence[Sequence[int]]) -> Optional[List]:
+    """``[start, end, score]`` of the best one- or two-sentence window.
+
+    Windows longer than ``QUOTE_MAX_CHARS`` only win when nothing shorter exists.
+    """
+    windows = []
+    for i, (start, end, words, flags) in enumerate(sentences):
+        windows.append((start, end, quote_score(words, flags)))
+        if i + 1 < len(sentences):
+            _, end2, words2, flags2 = sentences[i + 1]
+            # Figures or first person in either sentence count; completeness comes from the second
+            pair_flags = (flags | flags2) & ~COMPLETE | (flags2 & COMPLETE)
+            windows.append((start, end2, quote_score(words + words2, pair_flags)))
+    if not windows:
+        return None
+    fitting = [w for w in windows if w[1] - w[0] <= QUOTE_MAX_CHARS] or windows
+    # max() keeps the earliest of equal scores
+    return list(max(fitting, key=lambda w: w[2]))
+
+
+def sentence_fields(text: str) -> Dict:
+    """The ``sentences``/``quote_span``/``quote_score`` fields for one section text."""
+    sentences = sentence_index(text)
+    quote = best_quote(sentences)
+    return {
+        'sentences': sentences,
+        'quote_span': quote[:2] if quote else None,
+        'quote_score': quote[2] if quote else 0.0,
+    }
+
+
+def annotate_sections(sections: Iterable) -> Iterator:
+    """Streaming stage that (re)computes the sentence fields from ``text``."""
+    for s in sections:
+        for key, value in sentence_fields(s.get('text', '')).items():
+            s[key] = value
+        yield s
+
+
+def best_snippet(section, words: Sequence[str]) -> Optional[Dict]:
+    """The sentence with the most query-word hits, as ``{'start', 'end', 'text'}``.
+
+    Falls back to the quote span when no sentence contains a query word, and
+    to splitting the text when the row predates the stored offsets.
+    """
+    text = section.get('text', '')
+    sentences = section.get('sentences')
+    if sentences is None:
+        sentences = sentence_index(text)
+    if not sentences:
+        return None
+    lower = [w.lower() for w in words]
+    best, best_hits = None, 0
+    for start, end, _, _ in sentences:
+        sentence = text[start:end].lower()
+        hits = sum(1 for w in lower if w in sentence)
+        if hits > best_hits:
+            best, best_hits = (start, end), hits
+    if best is None:
+        best = tuple(section.get('quote_span') or sentences[0][:2])
+    return {'start': best[0], 'end': best[1], 'text': text[best[0]:best[1]]}
+
+
+def main():
+    from .changefeed import publish
+    from .shards import iter_sections, jsonl_path, list_years, write_year
+    parser = argparse.ArgumentParser(description='Backfill sentence offsets and quotability features')
+    parser.add_argument('--data', default=os.path.join(os.getcwd(), 'data', 'normalized'), help='Normalized JSONL dir')
+    parser.add_argument('--force', action='store_true', help='Recompute years that already have offsets')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    years = []
+    for year in list_years(args.data):
+        sections = list(iter_sections(args.data, year))
+        if not args.force and all('sentences' in s for s in sections):
+            continue
+        compress = not os.path.exists(jsonl_path(args.data, year))
+        write_year(args.data, year, annotate_sections(sections), compress=compress)
+        years.append(year)
+        print(f"[snippets] {year}: {len(sections)} sections")
+    if years:
+        generation = publish(args.data, 'snippets', years)
+        print(f"[snippets] Published corpus generation {generation}")
+    print(f"[snippets] Done in {time.perf_counter() - t0:.2f}s ({len(years)} years updated)")
+
+
+if __name__ == '__main__':
+    main()
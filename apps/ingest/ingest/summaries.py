@@ -0,0 +1,262 @@
+"""Offline extractive summaries per (topic, year) and (topic, decade).
+
+Sentences are taken verbatim from topic-tagged sections and ranked with
+TextRank: a TF-IDF cosine-similarity graph between the candidate sentences,
+scored by power iteration. The random jump is biased toward sentences from
+sections with a high score for the topic. The top sentences are then picked
+greedily while skipping near-duplicates, and are returned in reading order.
+
+Every summary sentence carries its year, anchor and ``char_start``/``char_end``
+into that section's ``text``. ``section.text[char_start:char_end]`` is exactly
+the sentence, so every line of a summary can be checked against the source.
+
+Artifacts are keyed by corpus version:
+
+    <data>/../summaries/<version>/<topic_id>.json   {"periods": {"1990": {...}, "1990s": {...}}}
+    <data>/../summaries/latest.json                 {"version": ..., "topics": {topic_id: [periods]}}
+
+A rebuild is skipped when the current version already exists on disk.
+
+Build:  python -m ingest.summaries --data ../../data/normalized
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .sections import sentence_spans
+from .shards import corpus_version, iter_sections, list_years, publish_versioned_dir
+
+SUMMARY_SENTENCES = 5
+# Bounds the n×n similarity matrix for large (topic, decade) groups
+MAX_CANDIDATES = 1500
+MIN_SENTENCE_WORDS = 6
+MAX_SENTENCE_WORDS = 80
+DAMPING = 0.85
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+# Cosine similarity above which a candidate repeats an already-picked sentence
+REDUNDANCY = 0.5
+
+_TOKEN_RE = re.compile(r"[a-z][a-z']+")
+_STOPWORDS = frozenset("""
+about above after again against also among and any are because been before being below between both but
+can could did does doing down during each few for from further had has have having her here hers him his
+how into its itself just more most much not now off once only other our ours out over own same she should
+some such than that the their theirs them then there these they this those through too under until very
+was were what when where which while who whom why will with would you your yours
+""".split())
+
+
+class Candidate:
+    __slots__ = ('year', 'anchor', 'section_id', 'char_start', 'char_end', 'text', 'weight', 'order')
+
+    def __init__(self, year, anchor, section_id, char_start, char_end, text, weight, order):
+        self.year = year
+        self.anchor = anchor
+        self.section_id = section_id
+        self.char_start = char_start
+        self.char_end = char_end
+        self.text = text
+        self.weight = weight
+        self.order = order
+
+
+def decade_label(year: int) -> str:
+    return f"{year // 10 * 10}s"
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) >= 3 and t not in _STOPWORDS]
+
+
+def collect_candidates(data_dir: str, min_score: float = 0.0) -> Dict[Tuple[str, str], List[Candidate]]:
+    """Group candidate sentences of tagged sections by (topic_id, period)."""
+    groups: Dict[Tuple[str, str], List[Candidate]] = defaultdict(list)
+    order = 0
+    for year in list_years(data_dir):
+        for s in iter_sections(data_dir, year):
+            tags = [t for t in s.get('topics') or [] if t.get('score', 0) >= min_score]
+            if not tags:
+                continue
+            text = s['text']
+            sentences = []
+            for start, end in sentence_spans(text):
+                n_words = len(text[start:end].split())
+                if MIN_SENTENCE_WORDS <= n_words <= MAX_SENTENCE_WORDS:
+                    sentences.append((start, end))
+            for tag in tags:
+                for start, end in sentences:
+                    c = Candidate(year, s['anchor'], s['id'], start, end, text[start:end],
+                                  float(tag.get('score', 1.0)), order)
+                    order += 1
+                    groups[(tag['topic_id'], str(year))].append(c)
+                    groups[(tag['topic_id'], decade_label(year))].append(c)
+    return groups
+
+
+def sentence_matrix(texts: List[str]) -> np.ndarray:
+    """L2-normalized TF-IDF rows over the terms shared by at least two sentences.
+
+    Terms that occur in a single sentence cannot create an edge, so they only
+    count toward each row's norm and are left out of the matrix.
+    """
+    counts = [Counter(_tokens(t)) for t in texts]
+    df = Counter(term for c in counts for term in c)
+    n = len(texts)
+    shared = {term: i for i, term in enumerate(t for t, f in df.items() if f > 1)}
+    idf = {term: math.log((1 + n) / (1 + f)) + 1.0 for term, f in df.items()}
+    X = np.zeros((n, len(shared)), dtype=np.float32)
+    for row, c in enumerate(counts):
+        norm = 0.0
+        for term, tf in c.items():
+            w = (1.0 + math.log(tf)) * idf[term]
+            norm += w * w
+            col = shared.get(term)
+            if col is not None:
+                X[row, col] = w
+        if norm:
+            X[row] /= math.sqrt(norm)
+    return X
+
+
+def textrank(X: np.ndarray, prior: Optional[np.ndarray] = None) -> np.ndarray:
+    """Stationary scores of the similarity graph of the rows of ``X``."""
+    n = X.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    S = X @ X.T
+    np.fill_diagonal(S, 0.0)
+    row_sums = S.sum(axis=1, keepdims=True)
+    # Sentences with no neighbours jump uniformly instead of leaking mass
+    M = np.where(row_sums > 0, S / np.where(row_sums > 0, row_sums, 1.0), 1.0 / n)
+    p = np.full(n, 1.0 / n) if prior is None else prior / prior.sum()
+    r = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        nxt = (1.0 - DAMPING) * p + DAMPING * (M.T @ r)
+        if np.abs(nxt - r).sum() < TOLERANCE:
+            r = nxt
+            break
+        r = nxt
+    return r
+
+
+def summarize(candidates: List[Candidate], k: int = SUMMARY_SENTENCES) -> Tuple[List[Candidate], np.ndarray]:
+    """Pick ``k`` central, non-redundant candidates; returns them in reading order with scores."""
+    if len(candidates) > MAX_CANDIDATES:
+        # Keep the sentences from the sections most about the topic
+        candidates = sorted(candidates, key=lambda c: -c.weight)[:MAX_CANDIDATES]
+        candidates.sort(key=lambda c: c.order)
+    X = sentence_matrix([c.text for c in candidates])
+    prior = np.array([math.log1p(max(c.weight, 0.0)) + 1e-3 for c in candidates])
+    scores = textrank(X, prior)
+    picked: List[int] = []
+    for i in np.argsort(-scores, kind='stable'):
+        if len(picked) >= k:
+            break
+        if picked and X.shape[1] and float((X[picked] @ X[i]).max()) > REDUNDANCY:
+            continue
+        picked.append(int(i))
+    picked.sort(key=lambda i: candidates[i].order)
+    return [candidates[i] for i in picked], scores[picked]
+
+
+def build_summaries(data_dir: str, topics: Dict[str, str], k: int = SUMMARY_SENTENCES,
+                    min_score: float = 0.0) -> Dict[str, Dict]:
+    """Summaries for every (topic, year) and (topic, decade) group, keyed by topic id."""
+    out: Dict[str, Dict] = {}
+    for (topic_id, period), candidates in sorted(collect_candidates(data_dir, min_score).items()):
+        picked, scores = summarize(candidates, k)
+        entry = out.setdefault(topic_id, {'topic_id': topic_id, 'topic_name': topics.get(topic_id, topic_id),
+                                          'periods': {}})
+        entry['periods'][period] = {
+            'candidates': len(candidates),
+            'sections': len({c.section_id for c in candidates}),
+            'sentences': [{
+                'text': c.text,
+                'year': c.year,
+                'anchor': c.anchor,
+                'section_id': c.section_id,
+                'char_start': c.char_start,
+                'char_end': c.char_end,
+                'score': round(float(score), 6),
+            } for c, score in zip(picked, scores)],
+        }
+    return out
+
+
+def _write_json(path: str, obj):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def build_artifacts(data_dir: str, topics_path: str, out_root: str, force: bool = False,
+                    k: int = SUMMARY_SENTENCES, min_score: float = 0.0) -> Tuple[str, bool]:
+    """Build summaries for the current corpus version; returns (version, rebuilt)."""
+    version = corpus_version(data_dir)
+    vdir = os.path.join(out_root, version)
+    if os.path.exists(os.path.join(vdir, 'index.json')) and not force:
+        return version, False
+
+    topics: Dict[str, str] = {}
+    if os.path.exists(topics_path):
+        with open(topics_path, 'r', encoding='utf-8') as f:
+            topics = {t['id']: t.get('name', t['id']) for t in json.load(f).get('topics', [])}
+    summaries = build_summaries(data_dir, topics, k, min_score)
+
+    index = {'sentences_per_summary': k,
+             'topics': {tid: sorted(s['periods']) for tid, s in summaries.items()}}
+
+    def write(tmp_dir: str):
+        for topic_id, summary in summaries.items():
+            summary['corpus_version'] = version
+            _write_json(os.path.join(tmp_dir, f"{topic_id}.json"), summary)
+        _write_json(os.path.join(tmp_dir, 'index.json'), dict(index, version=version, built_at=time.time()))
+
+    publish_versioned_dir(out_root, version, write, index)
+    return version, True
+
+
+def load_summary(out_root: str, topic_id: str, period: str) -> Optional[Dict]:
+    """Read one cached summary for the latest built version, or ``None``."""
+    try:
+        with open(os.path.join(out_root, 'latest.json'), 'r', encoding='utf-8') as f:
+            version = json.load(f)['version']
+        with open(os.path.join(out_root, version, f"{topic_id}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)['periods'].get(period)
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build extractive topic summaries per year and decade')
+    parser.add_argument('--data', default=os.path.join(os.getcwd(), 'data', 'normalized'), help='Normalized JSONL dir')
+    parser.add_argument('--topics', help='Topics JSON (default: <data>/../topics.json)')
+    parser.add_argument('--out', help='Artifact root (default: <data>/../summaries)')
+    parser.add_argument('-k', type=int, default=SUMMARY_SENTENCES, help='Sentences per summary')
+    parser.add_argument('--min-score', type=float, default=0.0, help='Minimum section topic score')
+    parser.add_argument('--force', action='store_true', help='Rebuild even if this corpus version exists')
+    args = parser.parse_args()
+
+    topics = args.topics or os.path.join(args.data, '..', 'topics.json')
+    out_root = args.out or os.path.join(args.data, '..', 'summaries')
+    os.makedirs(out_root, exist_ok=True)
+    t0 = time.perf_counter()
+    version, rebuilt = build_artifacts(args.data, topics, out_root, args.force, args.k, args.min_score)
+    if rebuilt:
+        print(f"[summaries] built version {version} in {time.perf_counter() - t0:.2f}s → {out_root}")
+    else:
+        print(f"[summaries] version {version} is up to date ({out_root})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""Keyword topic tagging shared by ingest and ``scripts/tag-content.py``.
+
+``TopicModel`` compiles ``topics.json`` once per run:
+- keywords are cleaned up front,
+- keyword phrases and their words are deduplicated across topics into one
+  list of needles.
+
+Tagging a section then cleans its text once and tests each needle once.
+Scores are identical to the original per-topic scoring: phrase hits weigh
+``2 × words × priority``, partial word hits weigh ``share × priority``, and
+the total is normalized per 100 words.
+"""
+
+import json
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MIN_SCORE = 0.1
+HIGH_CONFIDENCE = 2.0
+MEDIUM_CONFIDENCE = 0.5
+
+_SPACE_RE = re.compile(r'\s+')
+_SPECIAL_RE = re.compile(r'[^\w\s\-\.]')
+
+
+def clean_text(text: str) -> str:
+    """Lowercase, collapse whitespace, and drop everything but word chars, ``-`` and ``.``."""
+    text = _SPACE_RE.sub(' ', text.lower())
+    return _SPECIAL_RE.sub(' ', text).strip()
+
+
+def confidence_for(score: float) -> str:
+    return 'high' if score > HIGH_CONFIDENCE else 'medium' if score > MEDIUM_CONFIDENCE else 'low'
+
+
+class TopicModel:
+    def __init__(self, topics: Dict):
+        self.topics = topics.get('topics', [])
+        needles: Dict[str, int] = {}
+
+        def needle(s: str) -> int:
+            if s not in needles:
+                needles[s] = len(needles)
+            return needles[s]
+
+        # Per topic: (topic, priority, [(keyword, phrase needle, [word needles])])
+        self._compiled: List[Tuple[Dict, float, List[Tuple[str, int, List[int]]]]] = []
+        for topic in self.topics:
+            priority = topic.get('priority', 3)
+            keywords = []
+            for keyword in topic.get('keywords', []):
+                cleaned = clean_text(keyword)
+                words = cleaned.split()
+                if not words:
+                    continue
+                keywords.append((keyword, needle(cleaned), [needle(w) for w in words]))
+            self._compiled.append((topic, priority, keywords))
+        self.needles: List[str] = list(needles)
+
+    @classmethod
+    def load(cls, path: str) -> 'TopicModel':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def score(self, text: str) -> List[Tuple[Dict, float, List[str]]]:
+        """``(topic, normalized score, matched keywords)`` for every topic."""
+        clean = clean_text(text)
+        present = [n in clean for n in self.needles]
+        n_words = max(len(clean.split()), 1)
+        out = []
+        for topic, priority, keywords in self._compiled:
+            score = 0.0
+            matches = []
+            for keyword, phrase, words in keywords:
+                if present[phrase]:
+                    matches.append(keyword)
+                    score += len(words) * priority * 2
+                hits = sum(1 for w in words if present[w])
+                if hits:
+                    score += (hits / len(words)) * priority
+            out.append((topic, score / n_words * 100, matches))
+        return out
+
+    def tag(self, text: str) -> List[Dict]:
+        """Topic tags above ``MIN_SCORE``, highest score first."""
+        results = []
+        for topic, score, matches in self.score(text):
+            if score > MIN_SCORE:
+                results.append({
+                    'topic_id': topic['id'],
+                    'topic_name': topic['name'],
+                    'score': round(score, 3),
+                    'matched_keywords': matches,
+                    'confidence': confidence_for(score),
+                })
+        results.sort(key=lambda x: x['score'], reverse=True)
+        return results
+
+
+def index_fields(tags: Optional[List[Dict]]) -> Dict:
+    """Flat topic fields for a search index document.
+
+    ``topics`` lists every tagged topic id; ``topic_top``, ``topic_top_score``
+    and ``topic_confidence`` describe the highest-scoring tag and are left out
+    for untagged sections.
+    """
+    tags = tags or []
+    fields: Dict = {'topics': [t['topic_id'] for t in tags]}
+    if tags:
+        top = max(tags, key=lambda t: t.get('score', 0))
+        fields['topic_top'] = top['topic_id']
+        fields['topic_top_score'] = float(top.get('score', 0))
+        fields['topic_confidence'] = top.get('confidence') or confidence_for(top.get('score', 0))
+    return fields
+
+
+def new_stats() -> Dict:
+    return {'processed_sections': 0, 'tagged_sections': 0, 'topic_distribution': defaultdict(int),
+            'changed_ids': [], 'changed_topics': set()}
+
+
+def tag_sections(sections: Iterable, model: TopicModel, stats: Optional[Dict] = None) -> Iterator:
+    """Set ``topics`` on each section as it streams past (and clear stale tags).
+
+    ``stats`` also collects the ids whose tags changed and the topics involved,
+    for the change feed.
+    """
+    for s in sections:
+        tags = model.tag(s.get('text', ''))
+        if stats is not None:
+            stats['processed_sections'] += 1
+            previous = s.get('topics') or []
+            if previous != tags:
+                stats['changed_ids'].append(s.get('id'))
+                stats['changed_topics'].update(t['topic_id'] for t in previous + tags)
+        if tags:
+            s['topics'] = tags
+            if stats is not None:
+                stats['tagged_sections'] += 1
+                for tag in tags:
+                    stats['topic_distribution'][tag['topic_id']] += 1
+        else:
+            s.pop('topics', None)
+        yield s
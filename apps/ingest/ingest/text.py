@@ -0,0 +1,11 @@
+"""Word tokenizer shared by the search service and the offline trend builder."""
+
+import re
+from typing import List
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+MIN_TOKEN_LEN = 3
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) >= MIN_TOKEN_LEN]
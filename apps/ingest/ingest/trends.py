@@ -0,0 +1,320 @@
+"""Year × term and year × topic matrices for timeline and trend queries.
+
+One offline pass over the corpus writes NumPy arrays that are memory-mapped
+at query time:
+
+    years.npy                      the corpus years (row order)
+    year_term.{indptr,indices,data}.npy   sparse CSR counts, years × terms
+    term_year.{indptr,indices,data}.npy   the same matrix transposed (per-term series)
+    section_term.{indptr,indices}.npy     which terms occur in each section (co-occurrence)
+    term_section.{indptr,indices}.npy     the sections each term occurs in
+    section_year.npy               row of ``years`` for each section
+    year_tokens.npy / year_sections.npy   per-year totals for normalization
+    year_topic.npy                 dense float32, years × topics, summed topic scores
+    year_topic_sections.npy        dense int32, years × topics, tagged section counts
+    vocab.json                     {"terms": [...], "topics": [...]}
+
+Terms use the search tokenizer minus stopwords and pure numbers, and must
+occur at least ``MIN_TERM_COUNT`` times. Artifacts are keyed by corpus
+version like the topic summaries:
+
+    <data>/../trends/<version>/...   <data>/../trends/latest.json
+
+Build:  python -m ingest.trends build --data ../../data/normalized
+Query:  python -m ingest.trends term float
+        python -m ingest.trends rising --since 2000
+        python -m ingest.trends related float --years 1990-1999
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .autocomplete import STOPWORDS
+from .text import tokenize
+from .shards import corpus_version, iter_sections, list_years, publish_versioned_dir
+
+MIN_TERM_COUNT = 3
+# Add-k smoothing for rising-term log ratios, in occurrences per period
+SMOOTHING = 5.0
+
+_ARRAYS = (
+    'years', 'year_term.indptr', 'year_term.indices', 'year_term.data',
+    'term_year.indptr', 'term_year.indices', 'term_year.data',
+    'section_term.indptr', 'section_term.indices', 'term_section.indptr', 'term_section.indices',
+    'section_year', 'year_tokens', 'year_sections', 'year_topic', 'year_topic_sections',
+)
+
+
+def terms_of(text: str) -> List[str]:
+    return [t for t in tokenize(text) if t not in STOPWORDS and not t.isdigit()]
+
+
+def _gather(indptr: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Positions in ``indices``/``data`` of every entry of the given CSR rows."""
+    starts = np.asarray(indptr[rows], dtype=np.int64)
+    lengths = np.asarray(indptr[rows + 1], dtype=np.int64) - starts
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return offsets + np.arange(int(lengths.sum()), dtype=np.int64)
+
+
+def _csr(rows: Sequence[Dict[int, int]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CSR arrays for a list of ``{column: value}`` rows, columns sorted."""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    for i, row in enumerate(rows):
+        indptr[i + 1] = indptr[i] + len(row)
+    indices = np.empty(indptr[-1], dtype=np.int32)
+    data = np.empty(indptr[-1], dtype=np.int32)
+    for i, row in enumerate(rows):
+        cols = sorted(row)
+        indices[indptr[i]:indptr[i + 1]] = cols
+        data[indptr[i]:indptr[i + 1]] = [row[c] for c in cols]
+    return indptr, indices, data
+
+
+def _transpose(indptr: np.ndarray, indices: np.ndarray, data: np.ndarray,
+               n_cols: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr))
+    order = np.argsort(indices, kind='stable')
+    t_indptr = np.zeros(n_cols + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=n_cols), out=t_indptr[1:])
+    return t_indptr, rows[order], data[order]
+
+
+def build_matrices(data_dir: str, topic_ids: Sequence[str]) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """One pass over the corpus; returns ``(arrays, vocab)``."""
+    years = list_years(data_dir)
+    topic_col = {t: i for i, t in enumerate(topic_ids)}
+    section_terms: List[Counter] = []
+    section_year: List[int] = []
+    totals = Counter()
+    year_topic = np.zeros((len(years), len(topic_ids)), dtype=np.float32)
+    year_topic_sections = np.zeros((len(years), len(topic_ids)), dtype=np.int32)
+    year_sections = np.zeros(len(years), dtype=np.int32)
+    # Includes terms below MIN_TERM_COUNT, so rates are per real token
+    year_tokens = np.zeros(len(years), dtype=np.int64)
+    for row, year in enumerate(years):
+        for s in iter_sections(data_dir, year):
+            counts = Counter(terms_of(s.get('text', '')))
+            section_terms.append(counts)
+            section_year.append(row)
+            totals.update(counts)
+            year_sections[row] += 1
+            year_tokens[row] += sum(counts.values())
+            for tag in s.get('topics') or []:
+                col = topic_col.get(tag.get('topic_id'))
+                if col is not None:
+                    year_topic[row, col] += float(tag.get('score', 0.0))
+                    year_topic_sections[row, col] += 1
+
+    terms = sorted(t for t, n in totals.items() if n >= MIN_TERM_COUNT)
+    col = {t: i for i, t in enumerate(terms)}
+    per_section = [{col[t]: n for t, n in c.items() if t in col} for c in section_terms]
+    per_year: List[Counter] = [Counter() for _ in years]
+    for counts, row in zip(per_section, section_year):
+        per_year[row].update(counts)
+
+    yt = _csr(per_year)
+    ty = _transpose(*yt, n_cols=len(terms))
+    st_indptr, st_indices, st_data = _csr(per_section)
+    ts_indptr, ts_indices, _ = _transpose(st_indptr, st_indices, st_data, n_cols=len(terms))
+    arrays = {
+        'years': np.array(years, dtype=np.int32),
+        'year_term.indptr': yt[0], 'year_term.indices': yt[1], 'year_term.data': yt[2],
+        'term_year.indptr': ty[0], 'term_year.indices': ty[1], 'term_year.data': ty[2],
+        'section_term.indptr': st_indptr, 'section_term.indices': st_indices,
+        'term_section.indptr': ts_indptr, 'term_section.indices': ts_indices,
+        'section_year': np.array(section_year, dtype=np.int32),
+        'year_tokens': year_tokens,
+        'year_sections': year_sections,
+        'year_topic': year_topic,
+        'year_topic_sections': year_topic_sections,
+    }
+    return arrays, {'terms': terms, 'topics': list(topic_ids)}
+
+
+def build_artifacts(data_dir: str, topics_path: str, out_root: str, force: bool = False) -> Tuple[str, bool]:
+    """Build the matrices for the current corpus version; returns (version, rebuilt)."""
+    version = corpus_version(data_dir)
+    vdir = os.path.join(out_root, version)
+    if os.path.exists(os.path.join(vdir, 'vocab.json')) and not force:
+        return version, False
+    topic_ids: List[str] = []
+    if os.path.exists(topics_path):
+        with open(topics_path, 'r', encoding='utf-8') as f:
+            topic_ids = [t['id'] for t in json.load(f).get('topics', [])]
+    arrays, vocab = build_matrices(data_dir, topic_ids)
+
+    vocab['version'] = version
+
+    def write(tmp_dir: str):
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), arr)
+        with open(os.path.join(tmp_dir, 'vocab.json'), 'w', encoding='utf-8') as f:
+            json.dump(vocab, f, ensure_ascii=False)
+
+    publish_versioned_dir(out_root, version, write,
+                          {'terms': len(vocab['terms']), 'years': arrays['years'].tolist()})
+    return version, True
+
+
+class TrendIndex:
+    """Read-only, memory-mapped view of one built version."""
+
+    def __init__(self, vdir: str):
+        with open(os.path.join(vdir, 'vocab.json'), 'r', encoding='utf-8') as f:
+            vocab = json.load(f)
+        self.version = vocab.get('version')
+        self.terms: List[str] = vocab['terms']
+        self.topics: List[str] = vocab['topics']
+        self.term_col = {t: i for i, t in enumerate(self.terms)}
+        self.topic_col = {t: i for i, t in enumerate(self.topics)}
+        self.a = {name: np.load(os.path.join(vdir, f"{name}.npy"), mmap_mode='r') for name in _ARRAYS}
+        self.years: List[int] = [int(y) for y in self.a['years']]
+
+    @classmethod
+    def load(cls, out_root: str) -> 'TrendIndex':
+        with open(os.path.join(out_root, 'latest.json'), 'r', encoding='utf-8') as f:
+            return cls(os.path.join(out_root, json.load(f)['version']))
+
+    def _rows(self, years: Optional[Tuple[int, int]]) -> np.ndarray:
+        y = np.asarray(self.a['years'])
+        if years is None:
+            return np.ones(len(y), dtype=bool)
+        return (y >= years[0]) & (y <= years[1])
+
+    def _term_counts(self, rows: np.ndarray) -> np.ndarray:
+        """Dense per-term counts summed over the selected year rows."""
+        indptr = self.a['year_term.indptr']
+        idx = _gather(indptr, np.flatnonzero(rows))
+        return np.bincount(self.a['year_term.indices'][idx], weights=self.a['year_term.data'][idx],
+                           minlength=len(self.terms))
+
+    def term_series(self, term: str) -> Optional[Dict]:
+        """Counts and rate per 10k tokens for every year, or ``None`` for unknown terms."""
+        col = self.term_col.get(term.lower())
+        if col is None:
+            return None
+        start, end = self.a['term_year.indptr'][col], self.a['term_year.indptr'][col + 1]
+        counts = np.zeros(len(self.years), dtype=np.int64)
+        counts[self.a['term_year.indices'][start:end]] = self.a['term_year.data'][start:end]
+        tokens = np.maximum(np.asarray(self.a['year_tokens']), 1)
+        rate = counts / tokens * 10000
+        return {'term': self.terms[col], 'years': self.years, 'counts': counts.tolist(),
+                'per_10k': np.round(rate, 3).tolist()}
+
+    def topic_series(self, topic_id: str) -> Optional[Dict]:
+        """Summed and per-section mean topic score, and tagged-section share, per year."""
+        col = self.topic_col.get(topic_id)
+        if col is None:
+            return None
+        scores = np.asarray(self.a['year_topic'][:, col], dtype=np.float64)
+        tagged = np.asarray(self.a['year_topic_sections'][:, col])
+        sections = np.maximum(np.asarray(self.a['year_sections']), 1)
+        return {'topic_id': topic_id, 'years': self.years, 'score': np.round(scores, 3).tolist(),
+                'mean_score': np.round(scores / sections, 4).tolist(),
+                'section_share': np.round(tagged / sections, 4).tolist()}
+
+    def rising_terms(self, before: Tuple[int, int], after: Tuple[int, int], k: int = 20,
+                     min_count: int = 5) -> List[Dict]:
+        """Terms whose rate grew most from ``before`` to ``after`` (smoothed log ratio)."""
+        tokens = np.asarray(self.a['year_tokens'])
+        rows_a, rows_b = self._rows(before), self._rows(after)
+        a, b = self._term_counts(rows_a), self._term_counts(rows_b)
+        ta, tb = max(int(tokens[rows_a].sum()), 1), max(int(tokens[rows_b].sum()), 1)
+        ratio = np.log((b + SMOOTHING) / tb) - np.log((a + SMOOTHING) / ta)
+        ratio[b < min_count] = -np.inf
+        top = np.argsort(-ratio, kind='stable')[:k]
+        return [{'term': self.terms[i], 'before': int(a[i]), 'after': int(b[i]),
+                 'log_ratio': round(float(ratio[i]), 4)} for i in top if np.isfinite(ratio[i])]
+
+    def related_terms(self, term: str, k: int = 20, years: Optional[Tuple[int, int]] = None) -> Optional[List[Dict]]:
+        """Terms that share sections with ``term`` (optionally within a year range), by PMI-weighted count."""
+        col = self.term_col.get(term.lower())
+        if col is None:
+            return None
+        ts_ptr, ts_idx = self.a['term_section.indptr'], self.a['term_section.indices']
+        sections = np.asarray(ts_idx[ts_ptr[col]:ts_ptr[col + 1]])
+        section_year = np.asarray(self.a['section_year'])
+        if years is not None:
+            sections = sections[self._rows(years)[section_year[sections]]]
+        if not len(sections):
+            return []
+        st_ptr, st_idx = self.a['section_term.indptr'], self.a['section_term.indices']
+        idx = _gather(st_ptr, sections)
+        together = np.bincount(st_idx[idx], minlength=len(self.terms)).astype(np.float64)
+        together[col] = 0
+        df = np.diff(np.asarray(ts_ptr)).astype(np.float64)
+        n = len(section_year)
+        # Co-occurrence count weighted by how much more often than chance the pair appears
+        pmi = np.log(np.maximum(together, 1) * n / (len(sections) * np.maximum(df, 1)))
+        weight = np.where(together >= 2, together * np.maximum(pmi, 0), 0)
+        top = np.argsort(-weight, kind='stable')[:k]
+        return [{'term': self.terms[i], 'sections': int(together[i]), 'pmi': round(float(pmi[i]), 4)}
+                for i in top if weight[i] > 0]
+
+
+def parse_year_range(s: Optional[str]) -> Optional[Tuple[int, int]]:
+    if not s:
+        return None
+    lo, _, hi = s.partition('-')
+    return int(lo), int(hi or lo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query year × term / year × topic matrices')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    b = sub.add_parser('build', help='Build the matrices for the current corpus version')
+    b.add_argument('--data', default=os.path.join(os.getcwd(), 'data', 'normalized'), help='Normalized JSONL dir')
+    b.add_argument('--topics', help='Topics JSON (default: <data>/../topics.json)')
+    b.add_argument('--force', action='store_true', help='Rebuild even if this corpus version exists')
+    for name, help_text in (('term', 'Frequency of a term per year'), ('topic', 'Topic score per year'),
+                            ('related', 'Terms co-occurring with a term')):
+        q = sub.add_parser(name, help=help_text)
+        q.add_argument('key')
+    rising = sub.add_parser('rising', help='Terms rising between two periods')
+    rising.add_argument('--since', type=int, required=True, help='First year of the later period')
+    rising.add_argument('--until', type=int, help='Last year of the later period (default: latest)')
+    for q in sub.choices.values():
+        if q is not b:
+            q.add_argument('--out', default=os.path.join(os.getcwd(), 'data', 'trends'), help='Artifact root')
+            q.add_argument('-k', type=int, default=20)
+            q.add_argument('--years', help='Restrict to a year range, e.g. 1990-1999 (related)')
+    b.add_argument('--out', help='Artifact root (default: <data>/../trends)')
+    args = parser.parse_args()
+
+    if args.cmd == 'build':
+        topics = args.topics or os.path.join(args.data, '..', 'topics.json')
+        out_root = args.out or os.path.join(args.data, '..', 'trends')
+        os.makedirs(out_root, exist_ok=True)
+        t0 = time.perf_counter()
+        version, rebuilt = build_artifacts(args.data, topics, out_root, args.force)
+        if rebuilt:
+            print(f"[trends] built version {version} in {time.perf_counter() - t0:.2f}s → {out_root}")
+        else:
+            print(f"[trends] version {version} is up to date ({out_root})")
+        return
+
+    index = TrendIndex.load(args.out)
+    t0 = time.perf_counter()
+    if args.cmd == 'term':
+        result = index.term_series(args.key)
+    elif args.cmd == 'topic':
+        result = index.topic_series(args.key)
+    elif args.cmd == 'related':
+        result = index.related_terms(args.key, args.k, parse_year_range(args.years))
+    else:
+        until = args.until or index.years[-1]
+        result = index.rising_terms((index.years[0], args.since - 1), (args.since, until), args.k)
+    elapsed = (time.perf_counter() - t0) * 1000
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    print(f"[trends] {elapsed:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark the streaming HTML extractor against the BeautifulSoup path.
+
+Usage: python scripts/bench_html_extract.py [HTML_OR_DIR ...] [--repeat N]
+
+With no paths, uses the raw HTML letters cached by the scheduler in
+../../data/normalized/raw/. Reports per-file timings and whether both paths
+produce identical text. A synthetic letter larger than the streaming chunk
+size is always checked first, so text split across fed chunks is caught.
+Exits non-zero on any mismatch.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from ingest.html_letters import clean_html, fast_extract_html, is_text_corrupted
+
+DEFAULT_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'normalized', 'raw')
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def synthetic_letters(chunk_size: int = 1 << 16):
+    """Documents several chunks long, with paragraphs that straddle chunk boundaries."""
+    words = "abcdefghij " * 40
+    pre = "\n\n".join(f"Paragraph {i}: {words}" for i in range(chunk_size // 300 * 3))
+    body = "\n".join(f"<p>Sentence {i}. {words}</p>" for i in range(chunk_size // 300 * 3))
+    return [
+        ('synthetic <pre>', f"<html><body><pre>{pre}</pre><!-- end --></body></html>"),
+        ('synthetic <p>', f"<html><head><title>t</title></head><body>{body}</body></html>"),
+    ]
+
+
+def check_chunk_boundaries() -> int:
+    mismatches = 0
+    for name, html in synthetic_letters():
+        ok = fast_extract_html(html) == (clean_html(html), is_text_corrupted(html))
+        mismatches += not ok
+        print(f"{name:<28} {len(html):>8} chars  {'identical' if ok else 'MISMATCH'}")
+    return mismatches
+
+
+def main(paths, repeat):
+    mismatches = check_chunk_boundaries()
+    files = []
+    for p in paths or [DEFAULT_DIR]:
+        if os.path.isdir(p):
+            files.extend(sorted(glob.glob(os.path.join(p, '*.htm*'))))
+        elif os.path.exists(p):
+            files.append(p)
+    if not files:
+        print(f"No HTML files found in {paths or [DEFAULT_DIR]}")
+        return 1 if mismatches or paths else 0
+    total_slow = total_fast = 0.0
+    for path in files:
+        with open(path, 'rb') as f:
+            html = f.read().decode('utf-8', errors='replace')
+        slow_t, slow = best_of(lambda: (clean_html(html), is_text_corrupted(html)), repeat)
+        fast_t, fast = best_of(lambda: fast_extract_html(html), repeat)
+        if fast is None:
+            status = 'fallback (odd markup)'
+        elif fast == (slow[0], slow[1]):
+            status = 'identical'
+        else:
+            status = 'MISMATCH'
+            mismatches += 1
+        total_slow += slow_t
+        total_fast += fast_t
+        print(f"{os.path.basename(path):<28} bs4 {slow_t * 1000:8.1f} ms  stream {fast_t * 1000:8.1f} ms  "
+              f"{slow_t / max(fast_t, 1e-9):5.1f}x  {status}")
+    print(f"\nTotal: bs4 {total_slow * 1000:.1f} ms, stream {total_fast * 1000:.1f} ms, "
+          f"speedup {total_slow / max(total_fast, 1e-9):.1f}x, mismatches {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Benchmark HTML letter extraction paths')
+    ap.add_argument('paths', nargs='*', help='HTML files or directories')
+    ap.add_argument('--repeat', type=int, default=3, help='Take the best of N runs')
+    args = ap.parse_args()
+    sys.exit(main(args.paths, args.repeat))
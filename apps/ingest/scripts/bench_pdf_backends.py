@@ -0,0 +1,79 @@
+"""Throughput and text-quality benchmark for each PDF extraction backend.
+
+Usage: python scripts/bench_pdf_backends.py [--workers N] [PDF_OR_DIR ...]
+
+With --workers N > 1, each backend is also run with page-range parallelism and
+the merged text is checked to be byte-identical to the serial run.
+
+With no arguments, benchmarks the raw PDFs cached by the scheduler in
+../../data/normalized/raw/.
+"""
+import argparse
+import glob
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from ingest.pdf_backends import BACKENDS, MIN_QUALITY, benchmark_backend, extract_pdf_text
+
+DEFAULT_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'normalized', 'raw')
+
+
+def collect(paths):
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files.extend(sorted(glob.glob(os.path.join(p, '*.pdf'))))
+        elif p.lower().endswith('.pdf'):
+            files.append(p)
+    return files
+
+
+def main(paths, workers=1):
+    files = collect(paths or [DEFAULT_DIR])
+    if not files:
+        print(f"No PDFs found in {paths or [DEFAULT_DIR]}")
+        return 1
+    totals = {name: {'seconds': 0.0, 'pages': 0, 'bytes': 0, 'quality': [], 'errors': 0} for name in BACKENDS}
+    for path in files:
+        with open(path, 'rb') as f:
+            data = f.read()
+        print(f"\n{os.path.basename(path)} ({len(data) / 1e6:.2f} MB)")
+        for name in BACKENDS:
+            try:
+                r = benchmark_backend(name, data)
+            except Exception as e:
+                totals[name]['errors'] += 1
+                print(f"  {name:<11} error: {e}")
+                continue
+            t = totals[name]
+            t['seconds'] += r['seconds']
+            t['pages'] += r['pages']
+            t['bytes'] += len(data)
+            t['quality'].append(r['quality'])
+            print(f"  {name:<11} {r['seconds']:7.2f}s  {r['pages'] / max(r['seconds'], 1e-9):7.1f} pages/s  quality {r['quality']:.3f}")
+            if workers > 1:
+                p = benchmark_backend(name, data, workers=workers)
+                same = 'identical' if p['text_sha256'] == r['text_sha256'] else 'MISMATCH'
+                print(f"  {name:<11} x{workers:<3} {p['seconds']:5.2f}s  speedup {r['seconds'] / max(p['seconds'], 1e-9):4.1f}x  text {same}")
+        _, chosen, quality = extract_pdf_text(data)
+        print(f"  auto -> {chosen} (quality {quality:.3f}, threshold {MIN_QUALITY:.2f})")
+
+    print("\nSummary")
+    for name, t in totals.items():
+        if not t['quality']:
+            print(f"  {name:<11} no successful runs ({t['errors']} errors)")
+            continue
+        secs = max(t['seconds'], 1e-9)
+        mean_q = sum(t['quality']) / len(t['quality'])
+        print(f"  {name:<11} {t['pages'] / secs:7.1f} pages/s  {t['bytes'] / secs / 1e6:6.2f} MB/s  "
+              f"mean quality {mean_q:.3f}  min {min(t['quality']):.3f}  errors {t['errors']}")
+    return 0
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Benchmark PDF extraction backends')
+    ap.add_argument('paths', nargs='*', help='PDF files or directories')
+    ap.add_argument('--workers', type=int, default=1, help='Also run page-range parallel extraction with N processes')
+    args = ap.parse_args()
+    sys.exit(main(args.paths, args.workers))
@@ -0,0 +1,53 @@
+"""Cold-start import benchmark for the ingest CLI.
+
+Compares a fresh interpreter importing `ingest.main` (lazy registry) against
+one that eagerly imports every parser and the Typesense client, which is what
+`ingest.main` used to do at module load.
+
+Usage: python scripts/bench_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+INGEST_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CASES = {
+    'lazy (import ingest.main)': "import ingest.main",
+    'eager (all parsers + typesense)': (
+        "import ingest.main, ingest.pdf_letters, ingest.html_letters, "
+        "ingest.discover_letters, ingest.index_typesense"
+    ),
+    'no-op run (main --no-index, empty seed)': (
+        "import sys; sys.argv=['ingest', '--no-index', '--out', '/tmp/ingest-bench']\n"
+        "from ingest.main import main\n"
+        "try:\n    main()\nexcept SystemExit:\n    pass"
+    ),
+}
+
+
+def time_case(code: str, runs: int):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-c', code], cwd=INGEST_DIR, capture_output=True, text=True)
+        samples.append((time.perf_counter() - t0) * 1000)
+        if proc.returncode != 0:
+            return None, proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed'
+    return samples, None
+
+
+def main(runs: int):
+    print(f"Cold-start timings over {runs} runs (ms)")
+    for name, code in CASES.items():
+        samples, err = time_case(code, runs)
+        if samples is None:
+            print(f"- {name}: error: {err}")
+            continue
+        print(f"- {name}: median {statistics.median(samples):.1f}  min {min(samples):.1f}  max {max(samples):.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
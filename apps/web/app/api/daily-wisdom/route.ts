@@ -1,6 +1,9 @@
 import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
+import { GenerationWatch } from '../../lib/corpus-generation';
+import { quoteFor, SentenceRow } from '../../lib/snippets';
+import { loadAllSections } from '../../lib/letters';
 
 interface Section {
   id: string;
@@ -10,6 +13,9 @@ interface Section {
   source: string;
   anchor: string;
   text: string;
+  sentences?: SentenceRow[];
+  quote_span?: [number, number] | null;
+  quote_score?: number;
   topics?: Array<{
     topic_id: string;
     topic_name: string;
@@ -33,34 +39,32 @@ let sectionsCache: Section[] | null = null;
 let topicsCache: { topics: Topic[] } | null = null;
 let dailyWisdomCache: { [date: string]: any } = {};
 let cacheTime = 0;
-const CACHE_TTL = 60 * 60 * 1000; // 1 hour
+const CACHE_TTL = 60 * 60 * 1000; // 1 hour (only without a published corpus generation)
+const generation = new GenerationWatch();
+
+// A new corpus generation reloads sections/topics; a day's pick survives
+// unless its own year changed
+function dropStaleCaches() {
+  const changes = generation.poll();
+  if (!changes) return;
+  sectionsCache = null;
+  topicsCache = null;
+  Object.keys(dailyWisdomCache).forEach(date => {
+    if (changes.all || changes.years.has(dailyWisdomCache[date]?.section?.year)) {
+      delete dailyWisdomCache[date];
+    }
+  });
+}
 
 function loadSections(): Section[] {
-  if (sectionsCache && Date.now() - cacheTime < CACHE_TTL) {
+  dropStaleCaches();
+  if (sectionsCache && generation.isFresh(cacheTime, CACHE_TTL)) {
     return sectionsCache;
   }
 
-  const sections: Section[] = [];
-  
   try {
-    const dataDir = path.resolve(process.cwd(), '../../data/normalized');
-    const files = fs.readdirSync(dataDir).filter(f => f.startsWith('letters_') && f.endsWith('.jsonl'));
-    
-    for (const file of files) {
-      const filePath = path.join(dataDir, file);
-      const content = fs.readFileSync(filePath, 'utf8');
-      const lines = content.split('\n').filter(Boolean);
-      
-      for (const line of lines) {
-        try {
-          const section = JSON.parse(line);
-          sections.push(section);
-        } catch (error) {
-          console.error(`Error parsing line in ${file}:`, error);
-        }
-      }
-    }
-    
+    // Plain JSONL or gzip shards, whichever layout ingest wrote
+    const sections: Section[] = loadAllSections();
     sectionsCache = sections;
     cacheTime = Date.now();
     return sections;
@@ -71,7 +75,8 @@ function loadSections(): Section[] {
 }
 
 function loadTopics() {
-  if (topicsCache && Date.now() - cacheTime < CACHE_TTL) {
+  dropStaleCaches();
+  if (topicsCache && generation.isFresh(cacheTime, CACHE_TTL)) {
     return topicsCache;
   }
 
@@ -145,6 +150,9 @@ function calculateWisdomScore(section: Section, topics: Topic[], dateRandom: ()
   if (text.trim().endsWith('.') || text.trim().endsWith('!')) {
     score += 5;
   }
+
+  // Quotability precomputed at ingest (length, first person, no figures)
+  score += (section.quote_score ?? 0) * 10;
   
   // Boost inspirational/wisdom keywords
   const wisdomKeywords = [
@@ -218,6 +226,7 @@ function selectDailyWisdom(sections: Section[], topics: Topic[], targetDate: Dat
   
   const result = {
     section: selected.section,
+    quote: quoteFor(selected.section, 400),
     score: selected.score,
     primary_topic: primaryTopic,
     date: dateString,
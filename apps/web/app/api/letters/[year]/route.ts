@@ -1,16 +1,34 @@
 import { NextRequest } from 'next/server'
+import { GenerationWatch } from '../../../lib/corpus-generation'
+import { loadYear } from '../../../lib/letters'
 
 // Cache for letter data
 const letterCache = new Map<string, any>()
-const CACHE_TTL = 10 * 60 * 1000 // 10 minutes
+const CACHE_TTL = 10 * 60 * 1000 // 10 minutes (only without a published corpus generation)
+const generation = new GenerationWatch()
+
+function compareAnchors(a: any, b: any) {
+  const ma = /^¶(\d+)([a-z]*)$/.exec(String(a.anchor)) || ['', '0', '']
+  const mb = /^¶(\d+)([a-z]*)$/.exec(String(b.anchor)) || ['', '0', '']
+  const diff = parseInt(ma[1], 10) - parseInt(mb[1], 10)
+  if (diff) return diff
+  // '' < 'a' < 'z' < 'aa' keeps ¶12, ¶12a, ¶12b, ... in reading order
+  return ma[2].length - mb[2].length || (ma[2] < mb[2] ? -1 : ma[2] > mb[2] ? 1 : 0)
+}
 
 export async function GET(_req: NextRequest, { params }: { params: { year: string } }) {
   const { year } = params
   
-  // Check cache first
+  // Check cache first; a new corpus generation drops only the years it touched
+  const changes = generation.poll()
+  if (changes?.all) {
+    letterCache.clear()
+  } else if (changes) {
+    changes.years.forEach(y => letterCache.delete(`letter:${y}`))
+  }
   const cacheKey = `letter:${year}`
   const cached = letterCache.get(cacheKey)
-  if (cached && Date.now() - cached.timestamp < CACHE_TTL) {
+  if (cached && generation.isFresh(cached.timestamp, CACHE_TTL)) {
     return new Response(JSON.stringify({ sections: cached.data }), { 
       status: 200, 
       headers: { 'Content-Type': 'application/json', 'X-Cache': 'HIT' } 
@@ -33,12 +51,8 @@ export async function GET(_req: NextRequest, { params }: { params: { year: strin
     })
     const data = await r.json()
     const hits = (data.hits || []).map((h: any) => h.document)
-    // Sort by anchor number (¶N)
-    hits.sort((a: any, b: any) => {
-      const pa = parseInt(String(a.anchor).replace(/[^0-9]/g, '') || '0', 10)
-      const pb = parseInt(String(b.anchor).replace(/[^0-9]/g, '') || '0', 10)
-      return pa - pb
-    })
+    // Sort by anchor (¶N, then aligned insertions ¶Na, ¶Nb)
+    hits.sort(compareAnchors)
     const sections = hits.map((h: any) => ({ id: h.id, anchor: h.anchor, text: h.text, year: h.year, title: h.title, section_checksum: h.section_checksum, doc_sha256: h.doc_sha256, parser_version: h.parser_version }))
     
     // Cache the result
@@ -48,22 +62,12 @@ export async function GET(_req: NextRequest, { params }: { params: { year: strin
   } catch (e: any) {
     // Fallback to local normalized JSONL
     try {
-      const fs = await import('fs')
-      const path = await import('path')
-      const normDir = path.resolve(process.cwd(), '../../data/normalized')
-      const file = path.join(normDir, `letters_${year}.jsonl`)
-      
-      if (!fs.existsSync(file)) {
+      // Plain JSONL or the gzip shard written by `ingest.main --compress`
+      const hits = loadYear(year)
+      if (!hits) {
         return new Response(JSON.stringify({ error: 'letter_not_found' }), { status: 404 })
       }
-      
-      const lines = fs.readFileSync(file, 'utf8').split('\n').filter(Boolean)
-      const hits = lines.map(l => JSON.parse(l))
-      hits.sort((a: any, b: any) => {
-        const pa = parseInt(String(a.anchor).replace(/[^0-9]/g, '') || '0', 10)
-        const pb = parseInt(String(b.anchor).replace(/[^0-9]/g, '') || '0', 10)
-        return pa - pb
-      })
+      hits.sort(compareAnchors)
       const sections = hits.map((h: any) => ({ id: h.id, anchor: h.anchor, text: h.text, year: h.year, title: h.title, section_checksum: h.section_checksum, doc_sha256: h.doc_sha256, parser_version: h.parser_version }))
       
       // Cache the result
@@ -72,7 +76,7 @@ export async function GET(_req: NextRequest, { params }: { params: { year: strin
       // Clean old cache entries
       if (letterCache.size > 20) {
         const oldEntries = Array.from(letterCache.entries())
-          .filter(([_, value]) => Date.now() - value.timestamp > CACHE_TTL)
+          .filter(([_, value]) => !generation.isFresh(value.timestamp, CACHE_TTL))
         oldEntries.forEach(([key]) => letterCache.delete(key))
       }
       
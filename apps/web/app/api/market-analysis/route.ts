@@ -1,4 +1,5 @@
 import { NextRequest } from 'next/server'
+import { loadMetrics, metricSeries } from '../../lib/metrics'
 
 // Cache for market analysis data
 const analysisCache = new Map<string, any>()
@@ -176,7 +177,7 @@ const MOCK_MARKET_ANALYSIS: MarketAnalysis = {
 
 export async function GET(req: NextRequest) {
   const { searchParams } = new URL(req.url)
-  const section = searchParams.get('section') // 'trends', 'sectors', 'opportunities', 'risks'
+  const section = searchParams.get('section') // 'trends', 'sectors', 'opportunities', 'risks', 'history'
   const format = searchParams.get('format') || 'full'
   
   // Check cache
@@ -205,6 +206,12 @@ export async function GET(req: NextRequest) {
       key_themes: extractKeyThemes(result),
       next_review_date: new Date(Date.now() + 24 * 60 * 60 * 1000).toISOString() // Tomorrow
     }
+
+    // Berkshire's own record from the letters, each figure linked to its section
+    const history = berkshireRecord()
+    if (history) {
+      result.berkshire_record = history
+    }
     
     // Filter by section if requested
     if (section) {
@@ -233,6 +240,9 @@ export async function GET(req: NextRequest) {
             key_themes: result.insights.key_themes
           }
         },
+        'history': {
+          berkshire_record: result.berkshire_record || null
+        },
         'risks': {
           risk_factors: result.risk_factors,
           market_temperature: result.market_temperature,
@@ -280,6 +290,26 @@ export async function GET(req: NextRequest) {
   }
 }
 
+function berkshireRecord() {
+  const store = loadMetrics()
+  if (!store) return null
+  const bookValue = metricSeries(store, 'bvps_change')
+  const sp500 = new Map(metricSeries(store, 'sp500_return').map(f => [f.year, f]))
+  const years = bookValue
+    .filter(f => sp500.has(f.year))
+    .map(f => ({
+      year: f.year,
+      book_value_change: f.value,
+      sp500_return: sp500.get(f.year)!.value,
+      source: { year: f.source_year, anchor: f.anchor, char_start: f.char_start, char_end: f.char_end }
+    }))
+  return {
+    version: store.strings.version,
+    years,
+    years_ahead_of_sp500: years.filter(y => y.book_value_change > y.sp500_return).length
+  }
+}
+
 function determineMarketPhase(analysis: MarketAnalysis): string {
   const { market_temperature, fear_greed_indicator, opportunity_score } = analysis
   
@@ -0,0 +1,27 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { loadMetrics, metricSeries } from '../../lib/metrics';
+
+// Figures extracted from the letters by `python -m ingest.metrics build`.
+//   GET /api/metrics                                  -> available metrics and units
+//   GET /api/metrics?metric=bvps_change&from=&to=&all= -> series with source anchors
+
+export async function GET(request: NextRequest) {
+  const store = loadMetrics();
+  if (!store) {
+    return NextResponse.json({ error: 'Metrics have not been built' }, { status: 404 });
+  }
+  const { searchParams } = new URL(request.url);
+  const metric = searchParams.get('metric');
+  const headers = { 'Cache-Control': 'public, max-age=300', ETag: `"${store.strings.version}"` };
+  if (!metric) {
+    return NextResponse.json({ metrics: store.strings.units, version: store.strings.version }, { headers });
+  }
+  if (!store.strings.metrics.includes(metric)) {
+    return NextResponse.json({ error: 'Unknown metric' }, { status: 404 });
+  }
+  const from = searchParams.get('from') ? parseInt(searchParams.get('from')!) : undefined;
+  const to = searchParams.get('to') ? parseInt(searchParams.get('to')!) : undefined;
+  const all = searchParams.get('all') === '1' || searchParams.get('all') === 'true';
+  const facts = metricSeries(store, metric, from, to, all);
+  return NextResponse.json({ metric, facts, version: store.strings.version }, { headers });
+}
@@ -1,4 +1,6 @@
 import { NextRequest } from 'next/server';
+import { readSection } from '../../lib/letters';
+import { quoteFor } from '../../lib/snippets';
 
 export async function GET(req: NextRequest) {
   const { searchParams } = new URL(req.url);
@@ -15,36 +17,17 @@ export async function GET(req: NextRequest) {
   let quote = null;
   
   try {
-    const fs = await import('fs');
-    const path = await import('path');
-    
-    const normDir = path.resolve(process.cwd(), '../../data/normalized');
-    const file = path.join(normDir, `letters_${year}.jsonl`);
-    
-    if (fs.existsSync(file)) {
-      const content = fs.readFileSync(file, 'utf8');
-      const lines = content.split('\n').filter(Boolean);
-      
-      for (const line of lines) {
-        try {
-          const doc = JSON.parse(line);
-          if (doc.anchor === decodeURIComponent(anchor)) {
-            quote = doc;
-            break;
-          }
-        } catch {}
-      }
-    }
+    quote = readSection(year, decodeURIComponent(anchor));
   } catch {}
 
   if (!quote) {
     return new Response('Quote not found', { status: 404 });
   }
 
-  // Truncate text for image if too long
+  // Whole sentences from the offsets stored at ingest, so the card never cuts mid-word
   const maxLength = 280;
-  const displayText = quote.text.length > maxLength 
-    ? quote.text.substring(0, maxLength) + '...'
+  const displayText = quote.text.length > maxLength
+    ? quoteFor(quote, maxLength).text
     : quote.text;
 
   // Generate SVG image
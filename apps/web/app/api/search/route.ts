@@ -1,91 +1,141 @@
 import { NextRequest } from 'next/server'
+import { GenerationWatch } from '../../lib/corpus-generation'
+import { readLines, yearFiles } from '../../lib/letters'
+import { snippetFor } from '../../lib/snippets'
 
 // In-memory cache for search results and file content
 const cache = new Map<string, any>()
 const fileCache = new Map<string, any[]>()
-const CACHE_TTL = 5 * 60 * 1000 // 5 minutes
+const CACHE_TTL = 5 * 60 * 1000 // 5 minutes (only without a published corpus generation)
+const generation = new GenerationWatch()
+
+// Drop cached results/files for the years and topics a new corpus generation touched
+function evictChanged() {
+  const changes = generation.poll()
+  if (!changes) return
+  if (changes.all) {
+    cache.clear()
+    fileCache.clear()
+    return
+  }
+  cache.forEach((entry, key) => {
+    if (entry.year === 'all' || changes.years.has(parseInt(entry.year, 10)) || changes.topics.has(entry.topic)) {
+      cache.delete(key)
+    }
+  })
+  fileCache.forEach((_, file) => {
+    const fileYear = parseInt(file.match(/letters_(\d{4})\.jsonl/)?.[1] || '0', 10)
+    if (changes.years.has(fileYear)) fileCache.delete(file)
+  })
+}
+
+// Map a topic slug or display name to its id; ids pass through unchanged
+async function resolveTopicId(topic: string): Promise<string> {
+  try {
+    const fs = await import('fs')
+    const path = await import('path')
+    const topicsPath = path.resolve(process.cwd(), '../../data/topics.json')
+    const { topics } = JSON.parse(fs.readFileSync(topicsPath, 'utf8'))
+    const lower = topic.toLowerCase()
+    const match = topics.find((t: { id: string; slug?: string; name?: string }) =>
+      t.id === topic || t.slug === topic || (t.name || '').toLowerCase() === lower)
+    return match ? match.id : topic
+  } catch {
+    return topic
+  }
+}
 
 export async function GET(req: NextRequest) {
   const { searchParams } = new URL(req.url)
   const q = searchParams.get('q') || ''
   const year = searchParams.get('year')
-  const topic = searchParams.get('topic') // Add topic filter
+  const topic = searchParams.get('topic') // Topic id, slug or name
+  const confidence = searchParams.get('confidence') // Confidence of the section's top topic: high | medium | low
 
   const host = process.env.NEXT_PUBLIC_TYPESENSE_HOST || 'localhost'
   const port = process.env.NEXT_PUBLIC_TYPESENSE_PORT || '8108'
   const protocol = process.env.NEXT_PUBLIC_TYPESENSE_PROTOCOL || 'http'
   const apiKey = process.env.TYPESENSE_API_KEY || 'xyz'
 
+  const baseFilter = 'source:=letters' + (year ? ` && year:=${year}` : '')
   const searchBody: any = {
     q,
     query_by: 'text',
     per_page: 20,
-    filter_by: 'source:=letters'
+    filter_by: baseFilter
+  }
+  // Topic tags are indexed as faceted fields, so filtering and counts run in Typesense
+  const topicId = topic ? await resolveTopicId(topic) : null
+  if (topicId) {
+    searchBody.filter_by += ` && topics:=[\`${topicId}\`]`
   }
-  if (year) {
-    searchBody.filter_by += ` && year:=${year}`
+  if (confidence) {
+    searchBody.filter_by += ` && topic_confidence:=[\`${confidence}\`]`
   }
+  searchBody.facet_by = 'topics,topic_confidence'
 
-  try {
+  const runSearch = async (body: any) => {
     const r = await fetch(`${protocol}://${host}:${port}/collections/sections/documents/search`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
         'X-TYPESENSE-API-KEY': apiKey
       },
-      body: JSON.stringify(searchBody)
+      body: JSON.stringify(body)
     })
-    const data = await r.json()
+    return { ok: r.ok, status: r.status, data: await r.json().catch(() => ({})) }
+  }
+
+  try {
+    let result = await runSearch(searchBody)
+    let warning: string | undefined
+    if (!result.ok && /topics|topic_confidence/.test(String(result.data.message || ''))) {
+      // Collection not migrated to the faceted topic fields yet: search without them
+      const { facet_by, ...legacyBody } = searchBody
+      result = await runSearch({ ...legacyBody, filter_by: baseFilter })
+      if (topicId || confidence) {
+        warning = 'Topic filters are unavailable until the sections collection is migrated'
+      }
+    }
+    if (!result.ok) {
+      const message = result.data.message || `Typesense returned ${result.status}`
+      return new Response(JSON.stringify({ error: message }), { status: 502, headers: { 'Content-Type': 'application/json' } })
+    }
+    const data = result.data
     const hits = (data.hits || []).map((h: any) => h.document)
-    return new Response(JSON.stringify({ hits }), { status: 200, headers: { 'Content-Type': 'application/json' } })
+    const facets: { [field: string]: Array<{ value: string; count: number }> } = {}
+    for (const f of data.facet_counts || []) {
+      facets[f.field_name] = (f.counts || []).map((c: any) => ({ value: c.value, count: c.count }))
+    }
+    return new Response(JSON.stringify({ hits, facets, ...(warning ? { warning } : {}) }), { status: 200, headers: { 'Content-Type': 'application/json' } })
   } catch (e: any) {
     // Fallback: search local normalized files with optimized performance and caching
     try {
       // Check cache first
-      const cacheKey = `search:${q}:${year || 'all'}:${topic || 'all'}`
+      evictChanged()
+      const cacheKey = `search:${q}:${year || 'all'}:${topic || 'all'}:${confidence || 'all'}`
       const cached = cache.get(cacheKey)
-      if (cached && Date.now() - cached.timestamp < CACHE_TTL) {
+      if (cached && generation.isFresh(cached.timestamp, CACHE_TTL)) {
         return new Response(JSON.stringify({ hits: cached.data }), { 
           status: 200, 
           headers: { 'Content-Type': 'application/json', 'X-Cache': 'HIT' } 
         })
       }
 
-      const fs = await import('fs')
-      const path = await import('path')
-      const normDir = path.resolve(process.cwd(), '../../data/normalized')
-      
-      if (!fs.existsSync(normDir)) {
-        return new Response(JSON.stringify({ hits: [] }), { status: 200, headers: { 'Content-Type': 'application/json' } })
-      }
-      
-      const files = fs.readdirSync(normDir).filter(f => f.startsWith('letters_') && f.endsWith('.jsonl'))
+      // Plain JSONL or gzip shards, newest year first for better user experience
+      const files = yearFiles()
       const results: any[] = []
       const queryLower = q.toLowerCase()
       const queryWords = queryLower.split(/\s+/).filter(word => word.length > 2)
       
-      // Sort files by year (most recent first) for better user experience
-      files.sort((a, b) => {
-        const yearA = parseInt(a.match(/letters_(\d{4})\.jsonl/)?.[1] || '0', 10)
-        const yearB = parseInt(b.match(/letters_(\d{4})\.jsonl/)?.[1] || '0', 10)
-        return yearB - yearA
-      })
-      
-      for (const file of files) {
-        const yearMatch = file.match(/letters_(\d{4})\.jsonl/)
-        const fileYear = yearMatch ? parseInt(yearMatch[1], 10) : undefined
-        
+      for (const { year: fileYear, file: full } of files) {
         // Skip file if year filter doesn't match
         if (year && fileYear !== parseInt(year, 10)) continue
         
-        const full = path.join(normDir, file)
-        
         // Check file cache first
         let documents = fileCache.get(full)
         if (!documents) {
-          const content = fs.readFileSync(full, 'utf8')
-          const lines = content.split('\n').filter(Boolean)
-          documents = lines.map(line => {
+          documents = readLines(full).map(line => {
             try {
               const doc = JSON.parse(line)
               // Pre-compute lowercase text for faster searching
@@ -159,11 +209,16 @@ export async function GET(req: NextRequest) {
                 t.topic_id === topic || t.topic_name.toLowerCase().includes(topic.toLowerCase())
               )
             }
+            if (confidence) {
+              const top = (doc.topics || []).reduce((a: any, t: any) => (!a || t.score > a.score ? t : a), null)
+              passesTopicFilter = passesTopicFilter && top?.confidence === confidence
+            }
             
             if (passesTopicFilter) {
               // Remove search text before adding to results
               const { _searchText, ...cleanDoc } = doc
-              results.push({ ...cleanDoc, _score: score })
+              const snippet = queryWords.length ? snippetFor(cleanDoc, queryWords) : null
+              results.push({ ...cleanDoc, _score: score, snippet })
             }
           }
           
@@ -185,13 +240,15 @@ export async function GET(req: NextRequest) {
       const finalResults = results.slice(0, 20).map(({ _score, ...doc }) => doc)
       
       // Cache the results
-      cache.set(cacheKey, { data: finalResults, timestamp: Date.now() })
+      cache.set(cacheKey, { data: finalResults, timestamp: Date.now(), year: year || 'all', topic: topic || 'all' })
       
       // Clean old cache entries periodically
       if (cache.size > 100) {
         const oldEntries = Array.from(cache.entries())
-          .filter(([_, value]) => Date.now() - value.timestamp > CACHE_TTL)
+          .filter(([_, value]) => !generation.isFresh(value.timestamp, CACHE_TTL))
         oldEntries.forEach(([key]) => cache.delete(key))
+        // With unbounded freshness, cap the size by dropping the oldest entries
+        for (const key of Array.from(cache.keys()).slice(0, Math.max(0, cache.size - 500))) cache.delete(key)
       }
       
       return new Response(JSON.stringify({ hits: finalResults }), { 
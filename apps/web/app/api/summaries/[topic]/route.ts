@@ -0,0 +1,101 @@
+import { NextRequest, NextResponse } from 'next/server';
+import fs from 'fs';
+import path from 'path';
+
+// Serves the offline extractive summaries built by `python -m ingest.summaries`.
+// Artifacts are immutable per corpus version, so they are cached until latest.json
+// changes; only the current version's topics are kept.
+
+interface SummarySentence {
+  text: string;
+  year: number;
+  anchor: string;
+  section_id: string;
+  char_start: number;
+  char_end: number;
+  score: number;
+}
+
+interface TopicSummaries {
+  topic_id: string;
+  topic_name: string;
+  corpus_version: string;
+  periods: {
+    [period: string]: { candidates: number; sections: number; sentences: SummarySentence[] };
+  };
+}
+
+const summariesDir = path.resolve(process.cwd(), '../../data/summaries');
+let latestCache: { mtimeMs: number; version: string } | null = null;
+let topicCache: { version: string; topics: { [topicId: string]: TopicSummaries } } = { version: '', topics: {} };
+
+function latestVersion(): string | null {
+  try {
+    const latestPath = path.join(summariesDir, 'latest.json');
+    const { mtimeMs } = fs.statSync(latestPath);
+    if (!latestCache || latestCache.mtimeMs !== mtimeMs) {
+      const latest = JSON.parse(fs.readFileSync(latestPath, 'utf8'));
+      latestCache = { mtimeMs, version: latest.version };
+    }
+    return latestCache.version;
+  } catch {
+    return null;
+  }
+}
+
+function resolveTopicId(topic: string): string {
+  // Accept a slug as well as a topic id
+  try {
+    const topicsPath = path.resolve(process.cwd(), '../../data/topics.json');
+    const { topics } = JSON.parse(fs.readFileSync(topicsPath, 'utf8'));
+    const match = topics.find((t: { id: string; slug?: string }) => t.slug === topic || t.id === topic);
+    return match ? match.id : topic;
+  } catch {
+    return topic;
+  }
+}
+
+export async function GET(
+  request: NextRequest,
+  { params }: { params: { topic: string } }
+) {
+  const version = latestVersion();
+  if (!version) {
+    return NextResponse.json({ error: 'Summaries have not been built' }, { status: 404 });
+  }
+
+  const topicId = resolveTopicId(params.topic);
+  if (!/^[\w-]+$/.test(topicId)) {
+    return NextResponse.json({ error: 'Invalid topic' }, { status: 400 });
+  }
+  const cacheKey = `${version}:${topicId}`;
+  if (topicCache.version !== version) {
+    // A new build supersedes every cached topic of the old one
+    topicCache = { version, topics: {} };
+  }
+  if (!topicCache.topics[topicId]) {
+    try {
+      const filePath = path.join(summariesDir, version, `${topicId}.json`);
+      topicCache.topics[topicId] = JSON.parse(fs.readFileSync(filePath, 'utf8'));
+    } catch {
+      return NextResponse.json({ error: 'Topic summary not found' }, { status: 404 });
+    }
+  }
+  const summary = topicCache.topics[topicId];
+
+  // ?period=1990 or ?period=1990s; omit for every period of the topic
+  const period = new URL(request.url).searchParams.get('period');
+  if (period && !summary.periods[period]) {
+    return NextResponse.json({ error: 'No summary for this period' }, { status: 404 });
+  }
+
+  return NextResponse.json(
+    {
+      topic_id: summary.topic_id,
+      topic_name: summary.topic_name,
+      corpus_version: summary.corpus_version,
+      periods: period ? { [period]: summary.periods[period] } : summary.periods,
+    },
+    { headers: { 'Cache-Control': 'public, max-age=300', ETag: `"${cacheKey}"` } }
+  );
+}
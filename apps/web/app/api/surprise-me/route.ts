@@ -1,6 +1,9 @@
 import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
+import { GenerationWatch } from '../../lib/corpus-generation';
+import { quoteFor, SentenceRow } from '../../lib/snippets';
+import { loadAllSections } from '../../lib/letters';
 
 interface Section {
   id: string;
@@ -10,6 +13,9 @@ interface Section {
   source: string;
   anchor: string;
   text: string;
+  sentences?: SentenceRow[];
+  quote_span?: [number, number] | null;
+  quote_score?: number;
   topics?: Array<{
     topic_id: string;
     topic_name: string;
@@ -32,34 +38,25 @@ interface Topic {
 let sectionsCache: Section[] | null = null;
 let topicsCache: { topics: Topic[] } | null = null;
 let cacheTime = 0;
-const CACHE_TTL = 30 * 60 * 1000; // 30 minutes
+const CACHE_TTL = 30 * 60 * 1000; // 30 minutes (only without a published corpus generation)
+const generation = new GenerationWatch();
+
+function dropStaleCaches() {
+  if (generation.poll()) {
+    sectionsCache = null;
+    topicsCache = null;
+  }
+}
 
 function loadSections(): Section[] {
-  if (sectionsCache && Date.now() - cacheTime < CACHE_TTL) {
+  dropStaleCaches();
+  if (sectionsCache && generation.isFresh(cacheTime, CACHE_TTL)) {
     return sectionsCache;
   }
 
-  const sections: Section[] = [];
-  
   try {
-    const dataDir = path.resolve(process.cwd(), '../../data/normalized');
-    const files = fs.readdirSync(dataDir).filter(f => f.startsWith('letters_') && f.endsWith('.jsonl'));
-    
-    for (const file of files) {
-      const filePath = path.join(dataDir, file);
-      const content = fs.readFileSync(filePath, 'utf8');
-      const lines = content.split('\n').filter(Boolean);
-      
-      for (const line of lines) {
-        try {
-          const section = JSON.parse(line);
-          sections.push(section);
-        } catch (error) {
-          console.error(`Error parsing line in ${file}:`, error);
-        }
-      }
-    }
-    
+    // Plain JSONL or gzip shards, whichever layout ingest wrote
+    const sections: Section[] = loadAllSections();
     sectionsCache = sections;
     cacheTime = Date.now();
     return sections;
@@ -70,7 +67,8 @@ function loadSections(): Section[] {
 }
 
 function loadTopics() {
-  if (topicsCache && Date.now() - cacheTime < CACHE_TTL) {
+  dropStaleCaches();
+  if (topicsCache && generation.isFresh(cacheTime, CACHE_TTL)) {
     return topicsCache;
   }
 
@@ -123,6 +121,9 @@ function calculateSurpriseScore(section: Section, topics: Topic[]): number {
   if (text.trim().endsWith('.') || text.trim().endsWith('!') || text.trim().endsWith('?')) {
     score += 10;
   }
+
+  // Quotability precomputed at ingest (length, first person, no figures)
+  score += (section.quote_score ?? 0) * 15;
   
   // Boost for wisdom/insight keywords
   const insightKeywords = [
@@ -238,6 +239,7 @@ export async function GET(request: NextRequest) {
     
     return NextResponse.json({
       section: selected.section,
+      quote: quoteFor(selected.section, 280),
       score: selected.score,
       primary_topic: primaryTopic,
       selection_pool_size: candidateSections.length,
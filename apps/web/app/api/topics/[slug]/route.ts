@@ -1,6 +1,8 @@
 import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
+import { GenerationWatch } from '../../../lib/corpus-generation';
+import { loadAllSections } from '../../../lib/letters';
 
 interface Section {
   id: string;
@@ -32,10 +34,19 @@ interface Topic {
 let sectionsCache: { [key: string]: Section[] } = {};
 let topicsCache: { topics: Topic[] } | null = null;
 let cacheTime = 0;
-const CACHE_TTL = 5 * 60 * 1000; // 5 minutes
+const CACHE_TTL = 5 * 60 * 1000; // 5 minutes (only without a published corpus generation)
+const generation = new GenerationWatch();
+
+function dropStaleCaches() {
+  if (generation.poll()) {
+    sectionsCache = {};
+    topicsCache = null;
+  }
+}
 
 function loadTopics() {
-  if (topicsCache && Date.now() - cacheTime < CACHE_TTL) {
+  dropStaleCaches();
+  if (topicsCache && generation.isFresh(cacheTime, CACHE_TTL)) {
     return topicsCache;
   }
 
@@ -53,31 +64,14 @@ function loadTopics() {
 
 function loadSections(): Section[] {
   const cacheKey = 'all_sections';
-  if (sectionsCache[cacheKey] && Date.now() - cacheTime < CACHE_TTL) {
+  dropStaleCaches();
+  if (sectionsCache[cacheKey] && generation.isFresh(cacheTime, CACHE_TTL)) {
     return sectionsCache[cacheKey];
   }
 
-  const sections: Section[] = [];
-  
   try {
-    const dataDir = path.resolve(process.cwd(), '../../data/normalized');
-    const files = fs.readdirSync(dataDir).filter(f => f.startsWith('letters_') && f.endsWith('.jsonl'));
-    
-    for (const file of files) {
-      const filePath = path.join(dataDir, file);
-      const content = fs.readFileSync(filePath, 'utf8');
-      const lines = content.split('\n').filter(Boolean);
-      
-      for (const line of lines) {
-        try {
-          const section = JSON.parse(line);
-          sections.push(section);
-        } catch (error) {
-          console.error(`Error parsing line in ${file}:`, error);
-        }
-      }
-    }
-    
+    // Plain JSONL or gzip shards, whichever layout ingest wrote
+    const sections: Section[] = loadAllSections();
     sectionsCache[cacheKey] = sections;
     return sections;
   } catch (error) {
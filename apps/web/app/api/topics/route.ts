@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
+import { GenerationWatch } from '../../lib/corpus-generation';
 
 interface Topic {
   id: string;
@@ -18,10 +19,15 @@ interface TopicsData {
 
 let topicsCache: TopicsData | null = null;
 let cacheTime = 0;
-const CACHE_TTL = 5 * 60 * 1000; // 5 minutes
+const CACHE_TTL = 5 * 60 * 1000; // 5 minutes (only without a published corpus generation)
+const generation = new GenerationWatch();
 
 function loadTopics(): TopicsData {
-  if (topicsCache && Date.now() - cacheTime < CACHE_TTL) {
+  // Re-tagging publishes a new generation; that is when topic data can change
+  if (generation.poll()) {
+    topicsCache = null;
+  }
+  if (topicsCache && generation.isFresh(cacheTime, CACHE_TTL)) {
     return topicsCache;
   }
 
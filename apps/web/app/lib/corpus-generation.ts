@@ -0,0 +1,125 @@
+import fs from 'fs';
+import path from 'path';
+
+// Corpus generation + change feed published by ingest and tagging
+// (apps/ingest/ingest/changefeed.py). Route caches stay valid until the
+// generation moves, then drop only the years/topics the feed lists. Without a
+// published generation, routes fall back to their TTLs. Hand edits to
+// topics.json bump no generation, so a change to its mtime drops every cache,
+// and GENERATION_MAX_AGE bounds cache life even when the generation never moves.
+
+const normDir = path.resolve(process.cwd(), '../../data/normalized');
+const generationFile = path.join(normDir, 'corpus_generation.json');
+const feedFile = path.join(normDir, 'changes.jsonl');
+const topicsFile = path.resolve(process.cwd(), '../../data/topics.json');
+// One stat of each tiny file per second, shared by every route in the process
+const STAT_INTERVAL = 1000;
+// Backstop for anything that changes data without publishing a generation
+const GENERATION_MAX_AGE = 60 * 60 * 1000;
+
+interface ChangeEntry {
+  generation: number;
+  producer: string;
+  years: number[];
+  sections: { [year: string]: { changed: string[] | '*'; removed: string[] } };
+  topics: string[];
+}
+
+export interface CorpusChanges {
+  all: boolean;
+  years: Set<number>;
+  topics: Set<string>;
+}
+
+let lastStat = 0;
+let lastMtime = 0;
+let currentGeneration: number | null = null;
+let topicsMtime = 0;
+
+function statTopics() {
+  try {
+    topicsMtime = fs.statSync(topicsFile).mtimeMs;
+  } catch {
+    topicsMtime = 0;
+  }
+}
+
+export function corpusGeneration(): number | null {
+  const now = Date.now();
+  if (now - lastStat < STAT_INTERVAL) {
+    return currentGeneration;
+  }
+  lastStat = now;
+  statTopics();
+  try {
+    const { mtimeMs } = fs.statSync(generationFile);
+    if (mtimeMs !== lastMtime) {
+      currentGeneration = JSON.parse(fs.readFileSync(generationFile, 'utf8')).generation;
+      lastMtime = mtimeMs;
+    }
+  } catch {
+    currentGeneration = null;
+    lastMtime = 0;
+  }
+  return currentGeneration;
+}
+
+function changesSince(generation: number): CorpusChanges {
+  const changes: CorpusChanges = { all: false, years: new Set(), topics: new Set() };
+  try {
+    const entries: ChangeEntry[] = fs.readFileSync(feedFile, 'utf8')
+      .split('\n')
+      .filter(Boolean)
+      .map(line => JSON.parse(line))
+      .filter((e: ChangeEntry) => e.generation > generation);
+    // The feed is compacted; if it no longer reaches back far enough, drop everything
+    if (!entries.length || entries[0].generation !== generation + 1) {
+      changes.all = true;
+    }
+    for (const entry of entries) {
+      entry.years.forEach(y => changes.years.add(y));
+      entry.topics.forEach(t => changes.topics.add(t));
+    }
+  } catch {
+    changes.all = true;
+  }
+  return changes;
+}
+
+// One per route module: remembers the generation that module's caches were built at.
+export class GenerationWatch {
+  private seen: number | null = null;
+  private seenTopics = 0;
+
+  // True when a generation is published, i.e. caches only need the long backstop age
+  get active(): boolean {
+    return corpusGeneration() !== null;
+  }
+
+  // What changed since the previous poll, or null when nothing did
+  poll(): CorpusChanges | null {
+    const current = corpusGeneration();
+    if (current === null) {
+      return null;
+    }
+    const previous = this.seen;
+    const topicsEdited = previous !== null && topicsMtime !== this.seenTopics;
+    this.seenTopics = topicsMtime;
+    if (current === previous && !topicsEdited) {
+      return null;
+    }
+    this.seen = current;
+    if (previous === null || topicsEdited) {
+      // First poll (caches may predate the generation file) or topics.json was
+      // edited in place: start clean
+      return { all: true, years: new Set(), topics: new Set() };
+    }
+    return changesSince(previous);
+  }
+
+  // Cache freshness: generation-based (up to GENERATION_MAX_AGE) when
+  // available, otherwise the route TTL
+  isFresh(timestamp: number, ttl: number): boolean {
+    return Date.now() - timestamp < (this.active ? GENERATION_MAX_AGE : ttl);
+  }
+}
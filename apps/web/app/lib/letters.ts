@@ -0,0 +1,93 @@
+import fs from 'fs';
+import path from 'path';
+import zlib from 'zlib';
+
+// Reader for the normalized year files written by ingest, in either layout:
+// plain `letters_{year}.jsonl`, or the `--compress` multi-member gzip shard
+// `letters_{year}.jsonl.gz` with its `letters_{year}.idx.json` block index
+// (apps/ingest/ingest/shards.py).
+
+export const normDir = path.resolve(process.cwd(), '../../data/normalized');
+
+const YEAR_FILE_RE = /^letters_(\d{4})\.jsonl(\.gz)?$/;
+
+export interface YearFile {
+  year: number;
+  file: string;
+}
+
+interface ShardIndex {
+  file: string;
+  bytes?: number;
+  blocks: Array<[number, number]>;
+  anchors: { [anchor: string]: [number, number] };
+  ids: { [id: string]: [number, number] };
+}
+
+// Every year on disk, newest first; a plain file wins if both layouts exist
+export function yearFiles(): YearFile[] {
+  if (!fs.existsSync(normDir)) return [];
+  const byYear = new Map<number, string>();
+  for (const name of fs.readdirSync(normDir)) {
+    const m = YEAR_FILE_RE.exec(name);
+    if (!m) continue;
+    const year = parseInt(m[1], 10);
+    if (!byYear.has(year) || !m[2]) byYear.set(year, path.join(normDir, name));
+  }
+  return Array.from(byYear, ([year, file]) => ({ year, file })).sort((a, b) => b.year - a.year);
+}
+
+// Non-empty JSONL lines of one year file (gzip shards are inflated whole)
+export function readLines(file: string): string[] {
+  const raw = fs.readFileSync(file);
+  const content = file.endsWith('.gz') ? zlib.gunzipSync(raw).toString('utf8') : raw.toString('utf8');
+  return content.split('\n').filter(Boolean);
+}
+
+function parseLines(file: string): any[] {
+  const sections: any[] = [];
+  for (const line of readLines(file)) {
+    try {
+      sections.push(JSON.parse(line));
+    } catch (error) {
+      console.error(`Error parsing line in ${path.basename(file)}:`, error);
+    }
+  }
+  return sections;
+}
+
+// All sections of one year, or null when the year is not on disk
+export function loadYear(year: number | string): any[] | null {
+  const entry = yearFiles().find(f => f.year === Number(year));
+  return entry ? parseLines(entry.file) : null;
+}
+
+// Every section of every year, newest year first
+export function loadAllSections(): any[] {
+  return yearFiles().flatMap(({ file }) => parseLines(file));
+}
+
+// One section by anchor; a shard lookup is one seek plus one small gzip block decode
+export function readSection(year: number | string, anchor: string): any | null {
+  const indexFile = path.join(normDir, `letters_${year}.idx.json`);
+  if (fs.existsSync(indexFile)) {
+    const index: ShardIndex = JSON.parse(fs.readFileSync(indexFile, 'utf8'));
+    const pos = index.anchors?.[anchor] || index.ids?.[anchor];
+    const fd = fs.openSync(path.join(normDir, index.file), 'r');
+    try {
+      // An index from a different write than the shard (mid-swap) has the wrong
+      // offsets; its byte count will not match, so fall through to a scan
+      if (fs.fstatSync(fd).size === index.bytes) {
+        if (!pos) return null;
+        const [offset, length] = index.blocks[pos[0]];
+        const buf = Buffer.alloc(length);
+        fs.readSync(fd, buf, 0, length, offset);
+        const lines = zlib.gunzipSync(buf).toString('utf8').split('\n').filter(Boolean);
+        return JSON.parse(lines[pos[1]]);
+      }
+    } finally {
+      fs.closeSync(fd);
+    }
+  }
+  return (loadYear(year) || []).find(doc => doc.anchor === anchor || doc.id === anchor) || null;
+}
@@ -0,0 +1,143 @@
+import fs from 'fs';
+import path from 'path';
+
+// Reader for the columnar metrics store built by `python -m ingest.metrics build`
+// (one .npy file per column, rows sorted by metric then year). Columns are loaded
+// once per corpus version and looked up with a binary search, no text scanning.
+
+export interface MetricFact {
+  metric: string;
+  year: number;
+  value: number;
+  unit: string;
+  source_year: number;
+  section_id: string;
+  anchor: string;
+  char_start: number;
+  char_end: number;
+  method: string;
+  sources?: number;
+}
+
+interface MetricStrings {
+  version: string;
+  metrics: string[];
+  units: { [metric: string]: string };
+  methods: string[];
+  sections: Array<[string, string]>;
+}
+
+type Column = Int8Array | Int16Array | Int32Array | Float64Array;
+
+interface Store {
+  strings: MetricStrings;
+  columns: { [name: string]: Column };
+  keys: Float64Array;
+}
+
+const COLUMNS = ['year', 'metric', 'value', 'source_year', 'section', 'char_start', 'char_end', 'method'];
+const DTYPES: { [descr: string]: (buf: ArrayBuffer) => Column } = {
+  '<i1': buf => new Int8Array(buf),
+  '|i1': buf => new Int8Array(buf),
+  '<i2': buf => new Int16Array(buf),
+  '<i4': buf => new Int32Array(buf),
+  '<f8': buf => new Float64Array(buf),
+};
+
+const metricsDir = path.resolve(process.cwd(), '../../data/metrics');
+let storeCache: { mtimeMs: number; store: Store } | null = null;
+
+// Minimal .npy parser: 1-D little-endian arrays of the dtypes above
+function readNpy(filePath: string): Column {
+  const bytes = fs.readFileSync(filePath);
+  const major = bytes[6];
+  const headerLen = major === 1 ? bytes.readUInt16LE(8) : bytes.readUInt32LE(8);
+  const dataStart = (major === 1 ? 10 : 12) + headerLen;
+  const header = bytes.toString('latin1', major === 1 ? 10 : 12, dataStart);
+  const descr = /'descr':\s*'([^']+)'/.exec(header)?.[1] || '';
+  const make = DTYPES[descr];
+  if (!make) throw new Error(`Unsupported dtype ${descr} in ${filePath}`);
+  // Copy into a fresh buffer so the typed array is aligned
+  const data = bytes.subarray(dataStart);
+  return make(data.buffer.slice(data.byteOffset, data.byteOffset + data.byteLength));
+}
+
+export function loadMetrics(): Store | null {
+  try {
+    const latestPath = path.join(metricsDir, 'latest.json');
+    const { mtimeMs } = fs.statSync(latestPath);
+    if (!storeCache || storeCache.mtimeMs !== mtimeMs) {
+      const { version } = JSON.parse(fs.readFileSync(latestPath, 'utf8'));
+      const dir = path.join(metricsDir, version);
+      const strings: MetricStrings = JSON.parse(fs.readFileSync(path.join(dir, 'strings.json'), 'utf8'));
+      const columns: { [name: string]: Column } = {};
+      for (const name of COLUMNS) {
+        columns[name] = readNpy(path.join(dir, `${name}.npy`));
+      }
+      const keys = new Float64Array(columns.year.length);
+      for (let i = 0; i < keys.length; i++) {
+        keys[i] = columns.metric[i] * 10000 + columns.year[i];
+      }
+      storeCache = { mtimeMs, store: { strings, columns, keys } };
+    }
+    return storeCache.store;
+  } catch {
+    return null;
+  }
+}
+
+// First index whose key is >= target (or > target when `after`)
+function bisect(keys: Float64Array, target: number, after = false): number {
+  let lo = 0;
+  let hi = keys.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (keys[mid] < target || (after && keys[mid] === target)) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
+
+function row(store: Store, i: number): MetricFact {
+  const { strings, columns: c } = store;
+  const metric = strings.metrics[c.metric[i]];
+  const [section_id, anchor] = strings.sections[c.section[i]];
+  return {
+    metric,
+    year: c.year[i],
+    value: c.value[i],
+    unit: strings.units[metric],
+    source_year: c.source_year[i],
+    section_id,
+    anchor,
+    char_start: c.char_start[i],
+    char_end: c.char_end[i],
+    method: strings.methods[c.method[i]],
+  };
+}
+
+// One preferred fact per year in [from, to]; every source when `allSources`
+export function metricSeries(
+  store: Store,
+  metric: string,
+  from?: number,
+  to?: number,
+  allSources = false
+): MetricFact[] {
+  const m = store.strings.metrics.indexOf(metric);
+  if (m < 0) return [];
+  const lo = bisect(store.keys, m * 10000 + (from ?? 0));
+  const hi = bisect(store.keys, m * 10000 + (to ?? 9999), true);
+  const out: MetricFact[] = [];
+  for (let i = lo; i < hi; i++) {
+    if (allSources) {
+      out.push(row(store, i));
+    } else if (i === lo || store.keys[i] !== store.keys[i - 1]) {
+      // Rows within a year are already in preference order
+      const fact = row(store, i);
+      fact.sources = bisect(store.keys, store.keys[i], true) - i;
+      out.push(fact);
+    }
+  }
+  return out;
+}
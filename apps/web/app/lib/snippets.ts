@@ -0,0 +1,105 @@
+// Sentence offsets and quotability features stored on each section at ingest
+// (apps/ingest/ingest/snippets.py). Snippets and quote cards slice `text` with
+// them; rows written before the offsets existed fall back to a regex split.
+// Stored offsets count Python code points while JS strings index UTF-16 units,
+// so they are converted before slicing; Snippet offsets are UTF-16 indexes.
+
+export const HAS_NUMBER = 1;
+export const FIRST_PERSON = 2;
+export const COMPLETE = 4;
+
+// [start, end, words, flags]
+export type SentenceRow = [number, number, number, number];
+
+export interface SentenceFields {
+  text: string;
+  sentences?: SentenceRow[];
+  quote_span?: [number, number] | null;
+  quote_score?: number;
+}
+
+export interface Snippet {
+  start: number;
+  end: number;
+  text: string;
+}
+
+// Code-point offset -> UTF-16 index; identity unless text has astral characters
+function codePointIndex(text: string): (offset: number) => number {
+  if (!/[\uD800-\uDFFF]/.test(text)) return offset => offset;
+  const units: number[] = [];
+  let unit = 0;
+  for (const ch of text) {
+    units.push(unit);
+    unit += ch.length;
+  }
+  units.push(unit);
+  return offset => units[Math.min(offset, units.length - 1)];
+}
+
+function quoteSpan(section: SentenceFields): [number, number] | null {
+  if (!section.quote_span) return null;
+  const at = codePointIndex(section.text);
+  return [at(section.quote_span[0]), at(section.quote_span[1])];
+}
+
+function sentenceSpans(section: SentenceFields): Array<[number, number]> {
+  if (section.sentences) {
+    const at = codePointIndex(section.text);
+    return section.sentences.map(([start, end]) => [at(start), at(end)]);
+  }
+  const spans: Array<[number, number]> = [];
+  const re = /[^.!?]+(?:[.!?]+["'”’)\]]*|$)/g;
+  let m: RegExpExecArray | null;
+  while ((m = re.exec(section.text)) !== null && m[0]) {
+    const lead = m[0].length - m[0].trimStart().length;
+    const body = m[0].trim();
+    if (body) spans.push([m.index + lead, m.index + lead + body.length]);
+  }
+  return spans;
+}
+
+function slice(section: SentenceFields, start: number, end: number): Snippet {
+  return { start, end, text: section.text.slice(start, end) };
+}
+
+// Sentence with the most query-word hits; the quote span when none match
+export function snippetFor(section: SentenceFields, words: string[]): Snippet | null {
+  const spans = sentenceSpans(section);
+  if (spans.length === 0) return null;
+  const lower = words.map(w => w.toLowerCase());
+  let best: [number, number] | null = null;
+  let bestHits = 0;
+  for (const [start, end] of spans) {
+    const sentence = section.text.slice(start, end).toLowerCase();
+    const hits = lower.filter(w => sentence.includes(w)).length;
+    if (hits > bestHits) {
+      best = [start, end];
+      bestHits = hits;
+    }
+  }
+  const [start, end] = best || quoteSpan(section) || spans[0];
+  return slice(section, start, end);
+}
+
+// Best quotable window, else whole leading sentences up to maxLength
+export function quoteFor(section: SentenceFields, maxLength: number): Snippet {
+  const span = quoteSpan(section);
+  if (span && span[1] - span[0] <= maxLength) {
+    return slice(section, span[0], span[1]);
+  }
+  const spans = sentenceSpans(section);
+  const start = spans.length ? spans[0][0] : 0;
+  let end = start;
+  for (const [, e] of spans) {
+    if (e - start > maxLength) break;
+    end = e;
+  }
+  if (end > start) {
+    return slice(section, start, end);
+  }
+  // A single sentence longer than the card: cut at a word boundary
+  const cut = section.text.slice(0, maxLength);
+  const text = cut.slice(0, Math.max(cut.lastIndexOf(' '), 1)) + '...';
+  return { start: 0, end: cut.length, text };
+}
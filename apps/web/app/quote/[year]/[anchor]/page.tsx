@@ -1,5 +1,7 @@
 import QuoteCard from "../../../components/quote-card";
 import { Metadata } from 'next';
+import { redirect } from 'next/navigation';
+import { readSection } from '../../../lib/letters';
 
 interface QuotePageProps {
   params: {
@@ -12,30 +14,33 @@ interface QuotePageProps {
 }
 
 async function getQuoteData(year: string, anchor: string) {
+  try {
+    return readSection(year, decodeURIComponent(anchor));
+  } catch {
+    return null;
+  }
+}
+
+// Anchors retired by a parser change are listed in letters_{year}.redirects.json
+async function resolveRedirect(year: string, anchor: string): Promise<string | null> {
   try {
     const fs = await import('fs');
     const path = await import('path');
-    
-    const normDir = path.resolve(process.cwd(), '../../data/normalized');
-    const file = path.join(normDir, `letters_${year}.jsonl`);
-    
+    const file = path.resolve(process.cwd(), '../../data/normalized', `letters_${year}.redirects.json`);
     if (!fs.existsSync(file)) {
       return null;
     }
-    
-    const content = fs.readFileSync(file, 'utf8');
-    const lines = content.split('\n').filter(Boolean);
-    
-    for (const line of lines) {
-      try {
-        const doc = JSON.parse(line);
-        if (doc.anchor === decodeURIComponent(anchor)) {
-          return doc;
-        }
-      } catch {}
+    const { redirects } = JSON.parse(fs.readFileSync(file, 'utf8'));
+    let current = decodeURIComponent(anchor);
+    const seen = new Set<string>();
+    while (redirects[current] && !seen.has(current)) {
+      seen.add(current);
+      current = redirects[current].to;
+      if (!current) {
+        return null;
+      }
     }
-    
-    return null;
+    return seen.size ? current : null;
   } catch {
     return null;
   }
@@ -86,6 +91,10 @@ export default async function QuotePage({ params, searchParams }: QuotePageProps
   const quote = await getQuoteData(params.year, params.anchor);
 
   if (!quote) {
+    const moved = await resolveRedirect(params.year, params.anchor);
+    if (moved) {
+      redirect(`/quote/${params.year}/${encodeURIComponent(moved)}`);
+    }
     return (
       <div style={{
         minHeight: '100vh',
@@ -3,10 +3,12 @@ import os
 import sys
 from typing import List, Dict
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'apps', 'ingest'))
+from ingest.sections import load_sections
 
-def load_jsonl(path: str) -> List[Dict]:
-    with open(path, 'r') as f:
-        return [json.loads(line) for line in f if line.strip()]
+
+def load_jsonl(path: str) -> List:
+    return list(load_sections(path))
 
 
 def search_local(normalized_dir: str, q: str, year: int, k: int = 10) -> List[Dict]:
@@ -0,0 +1,311 @@
+"""Concurrent load generator for the search and discovery endpoints.
+
+Samples realistic requests from the local corpus (phrases from section text,
+topic keywords and slugs, years on disk), replays them open-loop at a target
+rate over keep-alive HTTP/1.1 connections (TLS for an https:// base), and
+reports throughput, latency percentiles/histograms and X-Cache hit rates per
+endpoint.
+
+Targets:
+- web:     the Next.js app (/api/search, /api/topics/[slug], /api/daily-wisdom, /api/letters/[year])
+- service: `python -m ingest.search_service` (/search, /topics/{slug}, Typesense-style letter browse)
+
+Usage:
+  python eval/load_test.py --base http://localhost:3000 --rps 50 --duration 30
+  python eval/load_test.py --target service --base http://127.0.0.1:8108 --rps 200 --max-p99-ms 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import ssl
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'apps', 'ingest'))
+from ingest.shards import iter_sections, list_years
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+DEFAULT_MIX = 'search=0.6,topic=0.15,daily=0.1,letter=0.15'
+_WORD_RE = re.compile(r"[A-Za-z]{4,}")
+
+
+def load_samples(normalized_dir: str, topics_path: str, max_sections: int = 5000, seed: int = 7) -> Dict:
+    rng = random.Random(seed)
+    years = list_years(normalized_dir)
+    phrases: List[str] = []
+    seen = 0
+    for year in years:
+        for s in iter_sections(normalized_dir, year):
+            seen += 1
+            # Reservoir-sample phrases so memory stays bounded on large corpora
+            words = _WORD_RE.findall(s.get('text', ''))
+            if not words:
+                continue
+            n = rng.choice([1, 1, 2, 2, 3])
+            start = rng.randrange(max(len(words) - n, 0) + 1)
+            phrase = ' '.join(words[start:start + n]).lower()
+            if len(phrases) < max_sections:
+                phrases.append(phrase)
+            else:
+                j = rng.randrange(seen)
+                if j < max_sections:
+                    phrases[j] = phrase
+    topics = []
+    if os.path.exists(topics_path):
+        with open(topics_path, 'r', encoding='utf-8') as f:
+            topics = json.load(f).get('topics', [])
+    keywords = [k for t in topics for k in t.get('keywords', [])]
+    slugs = [t.get('slug') or t['id'] for t in topics]
+    return {'years': years, 'phrases': phrases, 'keywords': keywords, 'slugs': slugs,
+            'topic_ids': [t['id'] for t in topics]}
+
+
+def make_request(kind: str, target: str, samples: Dict, rng: random.Random) -> Tuple[str, str, Optional[bytes]]:
+    """Return (method, path, body) for one sampled request of ``kind``."""
+    years = samples['years'] or [2023]
+    if kind == 'search':
+        pool = samples['phrases'] + samples['keywords'] * 3
+        q = rng.choice(pool) if pool else 'value'
+        year = rng.choice(years) if rng.random() < 0.2 else None
+        topic = rng.choice(samples['topic_ids']) if samples['topic_ids'] and rng.random() < 0.15 else None
+        qs = f"q={quote(q)}" + (f"&year={year}" if year else '') + (f"&topic={quote(topic)}" if topic else '')
+        return 'GET', (f"/api/search?{qs}" if target == 'web' else f"/search?{qs}"), None
+    if kind == 'topic':
+        slug = rng.choice(samples['slugs']) if samples['slugs'] else 'moats'
+        return 'GET', (f"/api/topics/{quote(slug)}" if target == 'web' else f"/topics/{quote(slug)}"), None
+    if kind == 'daily':
+        return 'GET', '/api/daily-wisdom', None
+    if kind == 'letter':
+        year = rng.choice(years)
+        if target == 'web':
+            return 'GET', f"/api/letters/{year}", None
+        body = json.dumps({'q': '*', 'query_by': 'text', 'per_page': 200,
+                           'filter_by': f'source:=letters && year:={year}'}).encode()
+        return 'POST', '/collections/sections/documents/search', body
+    raise ValueError(f"Unknown request kind: {kind}")
+
+
+class Connection:
+    def __init__(self, host: str, port: int, tls: Optional[ssl.SSLContext] = None):
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[bytes]) -> Tuple[int, Dict[str, str], int]:
+        if self.writer is None or self.writer.is_closing():
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.tls)
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nConnection: keep-alive\r\n"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        self.writer.write(head.encode('latin-1') + b"\r\n" + (body or b''))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed')
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        size = 0
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                chunk_len = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(chunk_len + 2)
+                size += chunk_len
+                if chunk_len == 0:
+                    break
+        elif 'content-length' in headers:
+            size = int(headers['content-length'])
+            await self.reader.readexactly(size)
+        else:
+            size = len(await self.reader.read())
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close':
+            self.writer.close()
+            self.writer = None
+        return status, headers, size
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def percentile(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(int(round(p / 100.0 * (len(sorted_vals) - 1))), len(sorted_vals) - 1)
+    return sorted_vals[k]
+
+
+def histogram(vals: List[float]) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for b in BUCKETS_MS:
+        out[f"<={b}ms"] = 0
+    out[f">{BUCKETS_MS[-1]}ms"] = 0
+    for v in vals:
+        for b in BUCKETS_MS:
+            if v <= b:
+                out[f"<={b}ms"] += 1
+                break
+        else:
+            out[f">{BUCKETS_MS[-1]}ms"] += 1
+    return out
+
+
+async def run(args, samples: Dict) -> Dict:
+    url = urlsplit(args.base)
+    if url.scheme not in ('http', 'https'):
+        raise ValueError(f"Unsupported scheme in --base: {args.base}")
+    tls = ssl.create_default_context() if url.scheme == 'https' else None
+    host, port = url.hostname, url.port or (443 if tls else 80)
+    mix = [(k, float(v)) for k, v in (part.split('=') for part in args.mix.split(','))]
+    if args.target == 'service':
+        mix = [(k, w) for k, w in mix if k != 'daily']
+    kinds, weights = zip(*mix)
+    rng = random.Random(args.seed)
+
+    pool: asyncio.Queue = asyncio.Queue()
+    for _ in range(args.concurrency):
+        pool.put_nowait(Connection(host, port, tls))
+
+    stats: Dict[str, Dict] = defaultdict(lambda: {'latency_ms': [], 'service_ms': [], 'errors': 0,
+                                                  'status': defaultdict(int), 'cache': defaultdict(int),
+                                                  'bytes': 0})
+    total = int(args.rps * args.duration)
+    start = time.perf_counter() + 0.05
+
+    async def one(i: int, kind: str, req):
+        scheduled = start + i / args.rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        conn = await pool.get()
+        sent = time.perf_counter()
+        st = stats[kind]
+        try:
+            status, headers, size = await asyncio.wait_for(conn.request(*req), timeout=args.timeout)
+            done = time.perf_counter()
+            st['status'][status] += 1
+            st['bytes'] += size
+            st['cache'][headers.get('x-cache', 'NONE').upper()] += 1
+            if status >= 400:
+                st['errors'] += 1
+            # From scheduled time: includes queueing, so overload is not hidden
+            st['latency_ms'].append((done - scheduled) * 1000)
+            st['service_ms'].append((done - sent) * 1000)
+        except Exception:
+            st['errors'] += 1
+            conn.close()
+            conn = Connection(host, port, tls)
+        finally:
+            pool.put_nowait(conn)
+
+    tasks = []
+    for i in range(total):
+        kind = rng.choices(kinds, weights)[0]
+        tasks.append(one(i, kind, make_request(kind, args.target, samples, rng)))
+    t0 = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - t0
+    while not pool.empty():
+        pool.get_nowait().close()
+
+    report = {'target': args.target, 'base': args.base, 'rps_target': args.rps, 'duration_sec': round(elapsed, 2),
+              'requests': total, 'endpoints': {}}
+    all_lat: List[float] = []
+    errors = 0
+    for kind, st in sorted(stats.items()):
+        lat = sorted(st['latency_ms'])
+        svc = sorted(st['service_ms'])
+        all_lat.extend(lat)
+        errors += st['errors']
+        hits, misses = st['cache'].get('HIT', 0), st['cache'].get('MISS', 0)
+        report['endpoints'][kind] = {
+            'count': sum(st['status'].values()) + (st['errors'] - sum(n for c, n in st['status'].items() if c >= 400)),
+            'ok': sum(n for c, n in st['status'].items() if c < 400),
+            'errors': st['errors'],
+            'status': dict(st['status']),
+            'p50_ms': round(percentile(lat, 50), 2),
+            'p90_ms': round(percentile(lat, 90), 2),
+            'p99_ms': round(percentile(lat, 99), 2),
+            'max_ms': round(lat[-1], 2) if lat else 0.0,
+            'service_p50_ms': round(percentile(svc, 50), 2),
+            'service_p99_ms': round(percentile(svc, 99), 2),
+            'cache_hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+            'mean_bytes': int(st['bytes'] / len(lat)) if lat else 0,
+            'histogram': histogram(lat),
+        }
+    all_lat.sort()
+    report['throughput_rps'] = round(len(all_lat) / elapsed, 1) if elapsed else 0.0
+    report['errors'] = errors
+    report['p50_ms'] = round(percentile(all_lat, 50), 2)
+    report['p99_ms'] = round(percentile(all_lat, 99), 2)
+    return report
+
+
+def print_report(report: Dict):
+    print(f"Target {report['target']} {report['base']}: {report['requests']} requests in "
+          f"{report['duration_sec']}s → {report['throughput_rps']} rps (target {report['rps_target']}), "
+          f"errors {report['errors']}, p50 {report['p50_ms']} ms, p99 {report['p99_ms']} ms")
+    for kind, ep in report['endpoints'].items():
+        hit = f"{ep['cache_hit_rate'] * 100:.0f}%" if ep['cache_hit_rate'] is not None else 'n/a'
+        print(f"\n[{kind}] ok {ep['ok']}  errors {ep['errors']}  p50 {ep['p50_ms']}  p90 {ep['p90_ms']}  "
+              f"p99 {ep['p99_ms']}  max {ep['max_ms']} ms  cache hit {hit}")
+        peak = max(ep['histogram'].values()) or 1
+        for bucket, n in ep['histogram'].items():
+            if n:
+                print(f"  {bucket:>9} {n:6d} {'#' * max(1, int(40 * n / peak))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test search and discovery endpoints')
+    parser.add_argument('--base', default='http://localhost:3000', help='Server base URL')
+    parser.add_argument('--target', choices=['web', 'service'], default='web', help='Route layout to hit')
+    parser.add_argument('--rps', type=float, default=20.0, help='Target requests per second (open loop)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds of traffic to schedule')
+    parser.add_argument('--concurrency', type=int, default=32, help='Keep-alive connections')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout (s)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Endpoint weights, e.g. search=0.6,topic=0.2,letter=0.2')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--data', default=os.path.join(REPO_ROOT, 'data', 'normalized'), help='Normalized JSONL dir for sampling')
+    parser.add_argument('--topics', default=os.path.join(REPO_ROOT, 'data', 'topics.json'))
+    parser.add_argument('--json', help='Write the full report to this path')
+    parser.add_argument('--max-p99-ms', type=float, help='Exit non-zero if overall p99 exceeds this')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='Exit non-zero above this error rate')
+    args = parser.parse_args()
+
+    samples = load_samples(args.data, args.topics, seed=args.seed)
+    print(f"Sampled {len(samples['phrases'])} phrases, {len(samples['keywords'])} topic keywords, "
+          f"{len(samples['years'])} years")
+    report = asyncio.run(run(args, samples))
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if report['requests'] and report['errors'] / report['requests'] > args.max_error_rate:
+        print(f"\nFAIL: error rate {report['errors'] / report['requests']:.3f} > {args.max_error_rate}")
+        failed = True
+    if args.max_p99_ms is not None and report['p99_ms'] > args.max_p99_ms:
+        print(f"\nFAIL: p99 {report['p99_ms']} ms > {args.max_p99_ms} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
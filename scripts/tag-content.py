@@ -12,127 +12,60 @@ from pathlib import Path
 from typing import Dict, List, Set, Tuple
 from collections import defaultdict
 
+sys.path.append(str(Path(__file__).resolve().parent.parent / "apps" / "ingest"))
+from ingest.changefeed import publish
+from ingest.shards import iter_sections, list_years, write_year, year_path
+from ingest.tagging import TopicModel, clean_text, new_stats, tag_sections
+
 def load_topics(topics_file: Path) -> Dict:
     """Load topic definitions from JSON file."""
     with open(topics_file, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def clean_text(text: str) -> str:
-    """Clean and normalize text for keyword matching."""
-    # Convert to lowercase
-    text = text.lower()
-    # Remove excessive whitespace and normalize
-    text = re.sub(r'\s+', ' ', text)
-    # Remove special characters but keep alphanumeric and basic punctuation
-    text = re.sub(r'[^\w\s\-\.]', ' ', text)
-    return text.strip()
+def compile_topics(topics) -> TopicModel:
+    """Compile topic definitions once; accepts a loaded topics dict or an existing model."""
+    return topics if isinstance(topics, TopicModel) else TopicModel(topics)
 
 def calculate_topic_score(section_text: str, topic: Dict) -> Tuple[float, List[str]]:
     """Calculate topic relevance score based on keyword matching."""
-    clean_section = clean_text(section_text)
-    keywords = topic['keywords']
-    matches = []
-    score = 0.0
-    
-    for keyword in keywords:
-        keyword_clean = clean_text(keyword)
-        
-        # Exact phrase matching (higher weight)
-        if keyword_clean in clean_section:
-            matches.append(keyword)
-            # Weight by keyword length and priority
-            weight = len(keyword_clean.split()) * topic.get('priority', 3)
-            score += weight * 2
-        
-        # Individual word matching within the phrase
-        keyword_words = keyword_clean.split()
-        word_matches = sum(1 for word in keyword_words if word in clean_section)
-        if word_matches > 0:
-            # Partial match scoring
-            partial_score = (word_matches / len(keyword_words)) * topic.get('priority', 3)
-            score += partial_score
-    
-    # Normalize score by section length to avoid bias toward longer sections
-    normalized_score = score / max(len(clean_section.split()), 1) * 100
-    
-    return normalized_score, matches
+    _, score, matches = TopicModel({'topics': [topic]}).score(section_text)[0]
+    return score, matches
 
-def tag_section(section: Dict, topics: Dict) -> List[Dict]:
+def tag_section(section: Dict, topics) -> List[Dict]:
     """Tag a single section with relevant topics."""
-    section_text = section.get('text', '')
-    results = []
-    
-    for topic in topics['topics']:
-        score, matches = calculate_topic_score(section_text, topic)
-        
-        # Only include if score meets threshold
-        if score > 0.1:  # Minimum relevance threshold
-            results.append({
-                'topic_id': topic['id'],
-                'topic_name': topic['name'],
-                'score': round(score, 3),
-                'matched_keywords': matches,
-                'confidence': 'high' if score > 2.0 else 'medium' if score > 0.5 else 'low'
-            })
-    
-    # Sort by score descending
-    results.sort(key=lambda x: x['score'], reverse=True)
-    return results
+    return compile_topics(topics).tag(section.get('text', ''))
 
-def process_letter_file(file_path: Path, topics: Dict) -> Dict:
-    """Process a single letter JSONL file and add topic tags."""
+def process_letter_file(data_dir: Path, year: int, topics) -> Dict:
+    """Tag one year's sections, read from whichever layout is on disk."""
     results = {
-        'file': str(file_path),
-        'processed_sections': 0,
-        'tagged_sections': 0,
-        'topic_distribution': defaultdict(int),
-        'sections': []
+        'file': year_path(str(data_dir), year),
+        **new_stats(),
+        'sections': [],
+        'error': None
     }
+    model = compile_topics(topics)
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                if not line.strip():
-                    continue
-                
-                try:
-                    section = json.loads(line)
-                    results['processed_sections'] += 1
-                    
-                    # Tag the section
-                    section_tags = tag_section(section, topics)
-                    
-                    if section_tags:
-                        results['tagged_sections'] += 1
-                        
-                        # Add topics to section
-                        section['topics'] = section_tags
-                        
-                        # Update distribution
-                        for tag in section_tags:
-                            results['topic_distribution'][tag['topic_id']] += 1
-                    
-                    results['sections'].append(section)
-                    
-                except json.JSONDecodeError as e:
-                    print(f"JSON decode error on line {line_num}: {e}")
-                except Exception as e:
-                    print(f"Error processing line {line_num}: {e}")
-    
+        for section in tag_sections(iter_sections(str(data_dir), year), model, results):
+            results['sections'].append(section)
     except Exception as e:
-        print(f"Error reading file {file_path}: {e}")
+        results['error'] = str(e)
+        print(f"Error reading file {results['file']}: {e}")
     
     return results
 
-def save_tagged_content(results: Dict, output_file: Path):
-    """Save tagged content back to JSONL format."""
+def save_tagged_content(results: Dict, data_dir: Path, year: int):
+    """Save tagged content back in the layout it was read from."""
+    if results['error']:
+        # A partial read must not replace the year on disk
+        print(f"Skipping save of {results['file']} after read error")
+        return
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for section in results['sections']:
-                f.write(json.dumps(section, ensure_ascii=False) + '\n')
-        print(f"Saved tagged content to {output_file}")
+        out_path = write_year(str(data_dir), year, results['sections'],
+                              compress=results['file'].endswith('.gz'))
+        print(f"Saved tagged content to {out_path}")
     except Exception as e:
-        print(f"Error saving to {output_file}: {e}")
+        print(f"Error saving to {results['file']}: {e}")
 
 def generate_tagging_report(all_results: List[Dict], topics: Dict) -> str:
     """Generate a comprehensive tagging report."""
@@ -193,6 +126,7 @@ def main():
     
     print(f"Loading topics from {topics_file}")
     topics = load_topics(topics_file)
+    model = TopicModel(topics)
     print(f"Loaded {len(topics['topics'])} topics")
     
     # Find data files
@@ -201,25 +135,35 @@ def main():
         print(f"Error: Data directory not found at {data_dir}")
         sys.exit(1)
     
-    letter_files = list(data_dir.glob("letters_*.jsonl"))
-    if not letter_files:
+    years = list_years(str(data_dir))
+    if not years:
         print(f"Error: No letter files found in {data_dir}")
         sys.exit(1)
     
-    print(f"Found {len(letter_files)} letter files")
+    print(f"Found {len(years)} letter files")
     
     # Process each file
     all_results = []
-    for file_path in sorted(letter_files):
-        print(f"\nProcessing {file_path.name}...")
-        results = process_letter_file(file_path, topics)
+    changes = {}
+    changed_topics = set()
+    for year in years:
+        print(f"\nProcessing {os.path.basename(year_path(str(data_dir), year))}...")
+        results = process_letter_file(data_dir, year, model)
         all_results.append(results)
         
         print(f"  - Processed: {results['processed_sections']} sections")
         print(f"  - Tagged: {results['tagged_sections']} sections")
         
         # Save tagged content (overwrite original for now)
-        save_tagged_content(results, file_path)
+        save_tagged_content(results, data_dir, year)
+        if results['changed_ids'] and not results['error']:
+            changes[year] = {'changed': results['changed_ids']}
+            changed_topics.update(results['changed_topics'])
+    
+    # Tell caches exactly which sections/topics got new tags
+    if changes or changed_topics:
+        generation = publish(str(data_dir), 'tag', changes.keys(), changes, changed_topics)
+        print(f"Published corpus generation {generation} ({len(changes)} years changed)")
     
     # Generate and save report
     report = generate_tagging_report(all_results, topics)
@@ -4,6 +4,7 @@ Data Quality Validation Script for Buffett OS
 Validates integrity, completeness, and quality of letter data.
 """
 
+import gzip
 import json
 import os
 import sys
@@ -12,6 +13,11 @@ from pathlib import Path
 from typing import Dict, List, Set
 from collections import defaultdict
 
+sys.path.append(str(Path(__file__).resolve().parent.parent / "apps" / "ingest"))
+from ingest.sections import Section
+from ingest.changefeed import mark_validated
+from ingest.shards import list_years, year_path
+
 def validate_section_structure(section: Dict) -> List[str]:
     """Validate that a section has all required fields."""
     required_fields = [
@@ -54,6 +60,15 @@ def validate_section_integrity(section: Dict) -> List[str]:
         if char_start >= char_end:
             errors.append(f"Invalid character range: {char_start}-{char_end}")
     
+    # Sentence offsets (optional) must slice inside the text, in order
+    prev_end = 0
+    for sentence in section.get('sentences') or []:
+        start, end = sentence[0], sentence[1]
+        if not (prev_end <= start < end <= len(text)):
+            errors.append(f"Invalid sentence offsets {start}-{end} in {section.get('id', 'unknown')}")
+            break
+        prev_end = end
+    
     return errors
 
 def validate_section_content(section: Dict) -> List[str]:
@@ -81,7 +96,7 @@ def validate_section_content(section: Dict) -> List[str]:
     return errors
 
 def validate_letter_file(file_path: Path) -> Dict:
-    """Validate a single letter JSONL file."""
+    """Validate a single letter file (JSONL or gzip shard)."""
     results = {
         'file': str(file_path),
         'total_sections': 0,
@@ -97,13 +112,14 @@ def validate_letter_file(file_path: Path) -> Dict:
     seen_anchors = set()
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
+        opener = gzip.open if str(file_path).endswith('.gz') else open
+        with opener(file_path, 'rt', encoding='utf-8') as f:
             for line_num, line in enumerate(f, 1):
                 if not line.strip():
                     continue
                 
                 try:
-                    section = json.loads(line)
+                    section = Section.from_dict(json.loads(line))
                     results['total_sections'] += 1
                     
                     # Check for duplicates
@@ -225,8 +241,8 @@ def main():
     
     print(f"Validating data in: {data_dir}")
     
-    # Find all letter JSONL files
-    letter_files = list(data_dir.glob("letters_*.jsonl"))
+    # Find all letter files, plain JSONL or --compress gzip shards
+    letter_files = [Path(year_path(str(data_dir), year)) for year in list_years(str(data_dir))]
     
     if not letter_files:
         print(f"Error: No letter files found in {data_dir}")
@@ -236,7 +252,7 @@ def main():
     
     # Validate each file
     validation_results = []
-    for file_path in sorted(letter_files):
+    for file_path in letter_files:
         print(f"Validating {file_path.name}...")
         result = validate_letter_file(file_path)
         validation_results.append(result)
@@ -254,6 +270,9 @@ def main():
     
     # Print summary
     total_errors = sum(len(r['errors']) for r in validation_results)
+    generation = mark_validated(str(data_dir), total_errors == 0, total_errors)
+    if generation:
+        print(f"Recorded validation of corpus generation {generation}")
     if total_errors == 0:
         print("✅ All data files passed validation!")
     else: